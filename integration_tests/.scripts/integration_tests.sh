@@ -10,7 +10,7 @@ do
   esac
 done
 
-declare -a SUPPORTED_DATABASES=("bigquery" "databricks" "snowflake")
+declare -a SUPPORTED_DATABASES=("bigquery" "databricks" "duckdb" "snowflake")
 
 # set to lower case
 DATABASE="$(echo $DATABASE | tr '[:upper:]' '[:lower:]')"
@@ -23,7 +23,7 @@ fi
 
 for db in ${DATABASES[@]}; do
 
-  if  [ $db == 'bigquery' ]; then
+  if  [ $db == 'bigquery' ] || [ $db == 'duckdb' ]; then
     echo "Snowplow web integration tests: Seeding data and doing first run"
 
     eval "dbt seed --target $db --full-refresh" || exit 1;
@@ -32,6 +32,17 @@ for db in ${DATABASES[@]}; do
 
   fi
 
+  if  [ $db == 'duckdb' ]; then
+    echo "Snowplow normalize integration tests: incremental run, updating the manifest"
+
+    eval "dbt run --target $db" || exit 1;
+
+    echo "Snowplow normalize integration tests: incremental run, skipping empty models"
+
+    eval "dbt run --target $db --vars '{snowplow__skip_empty_models: true}'" || exit 1;
+
+  fi
+
   echo "Snowplow normalize integration tests: snakeify case"
 
   eval "dbt run-operation test_snakeify_case --target $db" || exit 1;
@@ -40,6 +51,18 @@ for db in ${DATABASES[@]}; do
 
   eval "dbt run-operation test_normalize_events --target $db" || exit 1;
 
+  echo "Snowplow normalize integration tests: normalize events projection"
+
+  eval "dbt run-operation test_normalize_events_projection --target $db" || exit 1;
+
+  echo "Snowplow normalize integration tests: get incremental strategy"
+
+  eval "dbt run-operation test_get_incremental_strategy --target $db" || exit 1;
+
+  echo "Snowplow normalize integration tests: rollup measure"
+
+  eval "dbt run-operation test_rollup_measure --target $db" || exit 1;
+
   echo "Snowplow normalize integration tests: users table"
 
   eval "dbt run-operation test_users_table --target $db" || exit 1;
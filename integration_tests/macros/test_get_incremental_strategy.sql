@@ -0,0 +1,82 @@
+{# This tests the incremental strategy each warehouse falls back to for each requested strategy.
+This doesn't run on any actual data, we are just comparing the text that is generated.
+
+It runs 4 tests:
+1) merge
+2) append
+3) insert_overwrite
+4) delete+insert
+
+#}
+
+{% macro test_get_incremental_strategy() %}
+
+    {{ return(adapter.dispatch('test_get_incremental_strategy', 'snowplow_normalize_integration_tests')()) }}
+
+{% endmacro %}
+
+{% macro snowflake__test_get_incremental_strategy() %}
+
+    {% set expected_dict = {
+        "merge" : "merge",
+        "append" : "append",
+        "insert_overwrite" : "delete+insert",
+        "delete_insert" : "delete+insert"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_incremental_strategies(expected_dict) }}
+
+{% endmacro %}
+
+{% macro bigquery__test_get_incremental_strategy() %}
+
+    {% set expected_dict = {
+        "merge" : "merge",
+        "append" : "merge",
+        "insert_overwrite" : "insert_overwrite",
+        "delete_insert" : "merge"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_incremental_strategies(expected_dict) }}
+
+{% endmacro %}
+
+{% macro databricks__test_get_incremental_strategy() %}
+
+    {% set expected_dict = {
+        "merge" : "merge",
+        "append" : "append",
+        "insert_overwrite" : "insert_overwrite",
+        "delete_insert" : "merge"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_incremental_strategies(expected_dict) }}
+
+{% endmacro %}
+
+{% macro duckdb__test_get_incremental_strategy() %}
+
+    {% set expected_dict = {
+        "merge" : "delete+insert",
+        "append" : "append",
+        "insert_overwrite" : "delete+insert",
+        "delete_insert" : "delete+insert"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_incremental_strategies(expected_dict) }}
+
+{% endmacro %}
+
+{% macro assert_incremental_strategies(expected_dict) %}
+
+    {% set results_dict = {
+        "merge" : snowplow_normalize.get_incremental_strategy('merge'),
+        "append" : snowplow_normalize.get_incremental_strategy('append'),
+        "insert_overwrite" : snowplow_normalize.get_incremental_strategy('insert_overwrite'),
+        "delete_insert" : snowplow_normalize.get_incremental_strategy('delete+insert')
+        }
+    %}
+
+    {{ dbt_unittest.assert_equals(expected_dict, results_dict) }}
+
+{% endmacro %}
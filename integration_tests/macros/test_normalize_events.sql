@@ -156,3 +156,48 @@ It runs 9 tests:
 
 
 {% endmacro %}
+
+
+{% macro duckdb__test_normalize_events() %}
+
+    {% set expected_dict = {
+        "flat_cols_only" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table -- context column(s) from the event table from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "sde_plus_cols" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table , UNSTRUCT_EVENT_TEST_1.test_id as test_id , UNSTRUCT_EVENT_TEST_1.test_class as test_class -- context column(s) from the event table from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "sde_plus_cols_w_alias" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table , UNSTRUCT_EVENT_TEST_1.test_id as my_alias_test_id , UNSTRUCT_EVENT_TEST_1.test_class as my_alias_test_class -- context column(s) from the event table from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "sde_plus_1_context" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table , UNSTRUCT_EVENT_TEST_1.test_id as test_id , UNSTRUCT_EVENT_TEST_1.test_class as test_class -- context column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "sde_plus_2_context" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table , UNSTRUCT_EVENT_TEST_1.test_id as test_id , UNSTRUCT_EVENT_TEST_1.test_class as test_class -- context column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXTS_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXTS_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "sde_plus_2_context_w_alias" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table , UNSTRUCT_EVENT_TEST_1.test_id as test_id , UNSTRUCT_EVENT_TEST_1.test_class as test_class -- context column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as test1_context_test_id , CONTEXTS_TEST_1[1].context_test_class as test1_context_test_class , CONTEXTS_TEST2_1[1].context_test_id2 as test2_context_test_id2 , CONTEXTS_TEST2_1[1].context_test_class2 as test2_context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "context_only" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table -- context column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXTS_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXTS_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')",
+        "multiple_base_events" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table -- context column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXTS_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXTS_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name','page_ping')",
+        "multiple_sde_events" : "select event_id , collector_tstamp -- Flat columns from event table , app_id -- self describing events columns from event table , UNSTRUCT_EVENT_TEST_1.test_id as test1_test_id , UNSTRUCT_EVENT_TEST_1.test_class as test1_test_class , UNSTRUCT_EVENT_TEST2_1.test_word as test2_test_word , UNSTRUCT_EVENT_TEST2_1.test_idea as test2_test_idea -- context column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXTS_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXTS_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where event_name in ('event_name')"
+    } %}
+
+    {% set results_dict ={
+        "flat_cols_only" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], [], [], [], [], [], [], [], [], true).split()|join(' '),
+        "sde_plus_cols" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], [], [], [], [], [], true).split()|join(' '),
+        "sde_plus_cols_w_alias" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], ['my_alias'], [], [], [], [], true).split()|join(' '),
+        "sde_plus_1_context" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], [], ['CONTEXTS_TEST_1_0_0'], [['contextTestId', 'contextTestClass']], [['string', 'integer']], [], true).split()|join(' '),
+        "sde_plus_2_context" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], [], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], [], true).split()|join(' '),
+        "sde_plus_2_context_w_alias" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], [], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'],['contextTestId2', 'contextTestClass2'] ], [['boolean', 'string'], ['interger', 'string']], ['test1', 'test2'], true).split()|join(' '),
+        "context_only" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], [], [], [], [], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'],['contextTestId2', 'contextTestClass2'] ], [['boolean', 'string'], ['interger', 'string']], [], true).split()|join(' '),
+        "multiple_base_events" : snowplow_normalize.normalize_events(['event_name', 'page_ping'], ['app_id'], [], [], [], [], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'],['contextTestId2', 'contextTestClass2'] ], [['boolean', 'string'], ['interger', 'string']], [], true).split()|join(' '),
+        "multiple_sde_events" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1', 'UNSTRUCT_EVENT_TEST2_1_0_1'], [['testId', 'testClass'], ['testWord', 'testIdea']], [['number', 'string']], ['test1', 'test2'], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'],['contextTestId2', 'contextTestClass2'] ], [['boolean', 'string'], ['interger', 'string']], [], true).split()|join(' ')
+        }
+    %}
+
+
+    {# {{ print(results_dict['flat_cols_only'])}} #}
+    {# {{ print(results_dict['sde_plus_cols'])}} #}
+    {# {{ print(results_dict['sde_plus_cols_w_alias'])}} #}
+    {# {{ print(results_dict['sde_plus_1_context'])}} #}
+    {# {{ print(results_dict['sde_plus_2_context'])}} #}
+    {# {{ print(results_dict['sde_plus_2_context_w_alias'])}} #}
+    {# {{ print(results_dict['context_only'])}} #}
+    {# {{ print(results_dict['multiple_base_events'])}} #}
+    {# {{ print(results_dict['multiple_sde_events'])}} #}
+
+
+    {{ dbt_unittest.assert_dict_equals(expected_dict, results_dict) }}
+
+
+{% endmacro %}
@@ -0,0 +1,51 @@
+{# This tests that the normalize events projection macro, used by models generated with precompute_projection, produces the same sql as the normalize events macro for the same inputs.
+The projections are what the python script produces for these inputs. Comments are removed as they are not the same between the two macros.
+
+It runs 3 tests:
+1) Just flat columns, no sde or context
+2) SDE with alias + 2 contexts
+3) 2 SDEs + 2 contexts with aliases
+
+#}
+
+{% macro test_normalize_events_projection() %}
+
+    {% set re = modules.re %}
+
+    {% set expected_dict = {
+        "flat_cols_only" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], [], [], [], [], [], [], [], [], true),
+        "sde_w_alias_plus_2_context" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], ['my_alias'], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['integer', 'string']], [], true),
+        "multiple_sde_events" : snowplow_normalize.normalize_events(['event_name'], ['app_id'], ['UNSTRUCT_EVENT_TEST_1_0_1', 'UNSTRUCT_EVENT_TEST2_1_0_1'], [['testId', 'testClass'], ['testWord', 'testIdea']], [['number', 'string'], ['string', 'string']], ['test1', 'test2'], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['integer', 'string']], ['test1', 'test2'], true)
+    } %}
+
+    {% set results_dict = {
+        "flat_cols_only" : snowplow_normalize.normalize_events_projection(['event_name'], ['app_id'], {"snowflake": [], "databricks": [], "bigquery": []}, true),
+        "sde_w_alias_plus_2_context" : snowplow_normalize.normalize_events_projection(['event_name'], ['app_id'], {
+            "snowflake": ["UNSTRUCT_EVENT_TEST_1:testId::string as my_alias_test_id", "UNSTRUCT_EVENT_TEST_1:testClass::boolean as my_alias_test_class", "CONTEXTS_TEST_1[0]:contextTestId::boolean as context_test_id", "CONTEXTS_TEST_1[0]:contextTestClass::string as context_test_class", "CONTEXTS_TEST2_1[0]:contextTestId2::integer as context_test_id2", "CONTEXTS_TEST2_1[0]:contextTestClass2::string as context_test_class2"],
+            "databricks": ["UNSTRUCT_EVENT_TEST_1.test_id as my_alias_test_id", "UNSTRUCT_EVENT_TEST_1.test_class as my_alias_test_class", "CONTEXTS_TEST_1[0].context_test_id as context_test_id", "CONTEXTS_TEST_1[0].context_test_class as context_test_class", "CONTEXTS_TEST2_1[0].context_test_id2 as context_test_id2", "CONTEXTS_TEST2_1[0].context_test_class2 as context_test_class2"],
+            "bigquery": [["unstruct_event_test_1", ["test_id", "test_class"], ["my_alias_test_id", "my_alias_test_class"], ["string", "boolean"]], ["contexts_test_1", ["context_test_id", "context_test_class"], ["context_test_id", "context_test_class"], ["boolean", "string"]], ["contexts_test2_1", ["context_test_id2", "context_test_class2"], ["context_test_id2", "context_test_class2"], ["integer", "string"]]],
+            "snakeify_check": ["testId testClass contextTestId contextTestClass contextTestId2 contextTestClass2", "test_id test_class context_test_id context_test_class context_test_id2 context_test_class2"]
+        }, true),
+        "multiple_sde_events" : snowplow_normalize.normalize_events_projection(['event_name'], ['app_id'], {
+            "snowflake": ["UNSTRUCT_EVENT_TEST_1:testId::number as test1_test_id", "UNSTRUCT_EVENT_TEST_1:testClass::string as test1_test_class", "UNSTRUCT_EVENT_TEST2_1:testWord::string as test2_test_word", "UNSTRUCT_EVENT_TEST2_1:testIdea::string as test2_test_idea", "CONTEXTS_TEST_1[0]:contextTestId::boolean as test1_context_test_id", "CONTEXTS_TEST_1[0]:contextTestClass::string as test1_context_test_class", "CONTEXTS_TEST2_1[0]:contextTestId2::integer as test2_context_test_id2", "CONTEXTS_TEST2_1[0]:contextTestClass2::string as test2_context_test_class2"],
+            "databricks": ["UNSTRUCT_EVENT_TEST_1.test_id as test1_test_id", "UNSTRUCT_EVENT_TEST_1.test_class as test1_test_class", "UNSTRUCT_EVENT_TEST2_1.test_word as test2_test_word", "UNSTRUCT_EVENT_TEST2_1.test_idea as test2_test_idea", "CONTEXTS_TEST_1[0].context_test_id as test1_context_test_id", "CONTEXTS_TEST_1[0].context_test_class as test1_context_test_class", "CONTEXTS_TEST2_1[0].context_test_id2 as test2_context_test_id2", "CONTEXTS_TEST2_1[0].context_test_class2 as test2_context_test_class2"],
+            "bigquery": [["unstruct_event_test_1", ["test_id", "test_class"], ["test1_test_id", "test1_test_class"], ["number", "string"]], ["unstruct_event_test2_1", ["test_word", "test_idea"], ["test2_test_word", "test2_test_idea"], ["string", "string"]], ["contexts_test_1", ["context_test_id", "context_test_class"], ["test1_context_test_id", "test1_context_test_class"], ["boolean", "string"]], ["contexts_test2_1", ["context_test_id2", "context_test_class2"], ["test2_context_test_id2", "test2_context_test_class2"], ["integer", "string"]]]
+        }, true)
+    } %}
+
+    {# Remove comments and whitespace before comparing #}
+    {% set expected_clean = {} %}
+    {% set results_clean = {} %}
+    {% for key in expected_dict %}
+        {% do expected_clean.update({key: re.sub('--[^\n]*', '', expected_dict[key]).split()|join(' ')}) %}
+        {% do results_clean.update({key: re.sub('--[^\n]*', '', results_dict[key]).split()|join(' ')}) %}
+        {# The DuckDB projection uses the lower case columns from the BigQuery projection, DuckDB identifiers are case insensitive #}
+        {% if target.type == 'duckdb' %}
+            {% do expected_clean.update({key: expected_clean[key]|lower}) %}
+            {% do results_clean.update({key: results_clean[key]|lower}) %}
+        {% endif %}
+    {% endfor %}
+
+    {{ dbt_unittest.assert_dict_equals(expected_clean, results_clean) }}
+
+{% endmacro %}
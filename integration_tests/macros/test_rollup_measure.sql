@@ -0,0 +1,78 @@
+{# This tests the aggregate expression of each type of rollup measure.
+This doesn't run on any actual data, we are just comparing the text that is generated.
+
+It runs 4 tests:
+1) count
+2) count_distinct
+3) sum
+4) hll_sketch (not on DuckDB)
+
+#}
+
+{% macro test_rollup_measure() %}
+
+    {{ return(adapter.dispatch('test_rollup_measure', 'snowplow_normalize_integration_tests')()) }}
+
+{% endmacro %}
+
+{% macro snowflake__test_rollup_measure() %}
+
+    {% set expected_dict = {
+        "count" : "count(*)",
+        "count_distinct" : "approx_count_distinct(user_id)",
+        "sum" : "sum(value)",
+        "hll_sketch" : "hll_export(hll_accumulate(user_id))"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_rollup_measures(expected_dict) }}
+
+{% endmacro %}
+
+{% macro bigquery__test_rollup_measure() %}
+
+    {% set expected_dict = {
+        "count" : "count(*)",
+        "count_distinct" : "approx_count_distinct(user_id)",
+        "sum" : "sum(value)",
+        "hll_sketch" : "hll_count.init(user_id)"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_rollup_measures(expected_dict) }}
+
+{% endmacro %}
+
+{% macro databricks__test_rollup_measure() %}
+
+    {% set expected_dict = {
+        "count" : "count(*)",
+        "count_distinct" : "approx_count_distinct(user_id)",
+        "sum" : "sum(value)",
+        "hll_sketch" : "hll_sketch_agg(user_id)"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_rollup_measures(expected_dict) }}
+
+{% endmacro %}
+
+{% macro duckdb__test_rollup_measure() %}
+
+    {% set expected_dict = {
+        "count" : "count(*)",
+        "count_distinct" : "approx_count_distinct(user_id)",
+        "sum" : "sum(value)"
+    } %}
+
+    {{ snowplow_normalize_integration_tests.assert_rollup_measures(expected_dict) }}
+
+{% endmacro %}
+
+{% macro assert_rollup_measures(expected_dict) %}
+
+    {% set results_dict = {} %}
+    {% for measure_type in expected_dict.keys() %}
+        {% do results_dict.update({measure_type: snowplow_normalize.rollup_measure({'type': measure_type, 'column': 'value' if measure_type == 'sum' else 'user_id', 'alias': measure_type})}) %}
+    {% endfor %}
+
+    {{ dbt_unittest.assert_equals(expected_dict, results_dict) }}
+
+{% endmacro %}
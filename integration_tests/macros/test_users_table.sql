@@ -122,6 +122,50 @@ It runs 6 tests:
     } %}
 
 
+    {% set results_dict ={
+        "1_context" : snowplow_normalize.users_table('user_id', '', '', ['CONTEXTS_TEST_1_0_0'], [['contextTestId', 'contextTestClass']], [['string', 'integer']], remove_new_event_check = true).split()|join(' '),
+        "2_context" : snowplow_normalize.users_table('user_id', '', '',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], remove_new_event_check = true).split()|join(' '),
+        "custom_user_field" : snowplow_normalize.users_table('testId', '', '',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], remove_new_event_check = true).split()|join(' '),
+        "custom_user_field_sde" : snowplow_normalize.users_table('testId', 'UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1_0_0', '',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], remove_new_event_check = true).split()|join(' '),
+        "custom_user_field_context" : snowplow_normalize.users_table('testId', '', 'CONTEXTS_COM_ZENDESK_SNOWPLOW_USER_1_0_0',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], remove_new_event_check = true).split()|join(' '),
+        "custom_user_field_both" : snowplow_normalize.users_table('testId', 'UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1_0_0', 'CONTEXTS_COM_ZENDESK_SNOWPLOW_USER_1_0_0',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], remove_new_event_check = true).split()|join(' '),
+        "custom_user_field_both_w_alias" : snowplow_normalize.users_table('testId', 'UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1_0_0', 'CONTEXTS_COM_ZENDESK_SNOWPLOW_USER_1_0_0',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], 'my_user_id', remove_new_event_check = true).split()|join(' '),
+        "custom_user_field_both_w_alias_and_flat" : snowplow_normalize.users_table('testId', 'UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1_0_0', 'CONTEXTS_COM_ZENDESK_SNOWPLOW_USER_1_0_0',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], 'my_user_id', ['app_id', 'network_user_id'], remove_new_event_check = true).split()|join(' '),
+        }
+    %}
+
+
+    {# {{ print(results_dict['1_context'])}} #}
+    {# {{ print(results_dict['2_context'])}} #}
+    {# {{ print(results_dict['custom_user_field'])}} #}
+    {# {{ print(results_dict['custom_user_field_sde'])}} #}
+    {# {{ print(results_dict['custom_user_field_context'])}} #}
+    {# {{ print(results_dict['custom_user_field_both'])}} #}
+    {# {{ print(results_dict['custom_user_field_both_w_alias'])}} #}
+    {# {{ print(results_dict['custom_user_field_both_w_alias_and_flat'])}} #}
+
+
+    {{ dbt_unittest.assert_equals(expected_dict, results_dict) }}
+
+
+{% endmacro %}
+
+
+{% macro duckdb__test_users_table() %}
+
+    {% set expected_dict = {
+            "1_context" : "with defined_user_id as ( select user_id as user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "2_context" : "with defined_user_id as ( select user_id as user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "custom_user_field" : "with defined_user_id as ( select test_id as user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "custom_user_field_sde" : "with defined_user_id as ( select UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1.test_id as user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "custom_user_field_context" : "with defined_user_id as ( select CONTEXTS_COM_ZENDESK_SNOWPLOW_USER_1[1].test_id as user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "custom_user_field_both" : "with defined_user_id as ( select UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1.test_id as user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "custom_user_field_both_w_alias" : "with defined_user_id as ( select UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1.test_id as my_user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by my_user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where my_user_id is not null ) select * exclude (rn) from users_ordering where rn = 1",
+            "custom_user_field_both_w_alias_and_flat" : "with defined_user_id as ( select UNSTRUCT_EVENT_COM_GOOGLE_ANALYTICS_MEASUREMENT_PROTOCOL_USER_1.test_id as my_user_id , collector_tstamp as latest_collector_tstamp -- Flat columns from event table , app_id , network_user_id -- user column(s) from the event table , CONTEXTS_TEST_1[1].context_test_id as context_test_id , CONTEXTS_TEST_1[1].context_test_class as context_test_class , CONTEXT_TEST2_1[1].context_test_id2 as context_test_id2 , CONTEXT_TEST2_1[1].context_test_class2 as context_test_class2 from "~ref('snowplow_normalize_base_events_this_run')~" where 1 = 1 ), users_ordering as ( select a.* , row_number() over (partition by my_user_id order by latest_collector_tstamp desc) as rn from defined_user_id a where my_user_id is not null ) select * exclude (rn) from users_ordering where rn = 1"
+    } %}
+
+
+
     {% set results_dict ={
         "1_context" : snowplow_normalize.users_table('user_id', '', '', ['CONTEXTS_TEST_1_0_0'], [['contextTestId', 'contextTestClass']], [['string', 'integer']], remove_new_event_check = true).split()|join(' '),
         "2_context" : snowplow_normalize.users_table('user_id', '', '',['CONTEXTS_TEST_1_0_0', 'CONTEXT_TEST2_1_0_5'], [['contextTestId', 'contextTestClass'], ['contextTestId2', 'contextTestClass2']], [['boolean', 'string'], ['interger', 'string']], remove_new_event_check = true).split()|join(' '),
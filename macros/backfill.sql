@@ -0,0 +1,68 @@
+{# Run-operations used by utils/snowplow_normalize_backfill.py to read and record backfill progress in the incremental manifest #}
+
+{% macro get_backfill_status(models) %}
+    {{ return(adapter.dispatch('get_backfill_status', 'snowplow_normalize')(models)) }}
+{% endmacro %}
+
+{% macro default__get_backfill_status(models) %}
+    {%- set status = {} -%}
+    {%- for model in models -%}
+        {%- do status.update({model: none}) -%}
+    {%- endfor -%}
+
+    {%- set status_query -%}
+        select
+            model,
+            last_success
+        from {{ snowplow_utils.get_incremental_manifest_table_relation('snowplow_normalize') }}
+        where model in ('{{ models|join("','") }}')
+    {%- endset -%}
+
+    {%- set missing = [] -%}
+    {# The counts model is only enabled with snowplow__skip_empty_models, as resolved for the package, so each chunk has to rebuild it before its models read it #}
+    {%- set counts_enabled = graph.nodes.values()|selectattr('name', 'equalto', 'snowplow_normalize_base_event_counts_this_run')|list|length > 0 -%}
+    {%- if execute -%}
+        {%- set results = run_query(status_query) -%}
+        {%- for row in results.rows -%}
+            {%- do status.update({row[0]: row[1]|string if row[1] is not none else none}) -%}
+        {%- endfor -%}
+
+        {# Models without a table are created by their first run, so the driver runs the first chunk on its own before any in parallel #}
+        {%- for node in graph.nodes.values() if node.resource_type == 'model' and node.name in models -%}
+            {%- if adapter.get_relation(database = node.database, schema = node.schema, identifier = node.alias) is none -%}
+                {%- do missing.append(node.name) -%}
+            {%- endif -%}
+        {%- endfor -%}
+    {%- endif -%}
+
+    {# Printed on a single line with a marker so the driver can find it among the rest of the dbt logs #}
+    {% do log('SNOWPLOW_BACKFILL_STATUS: ' ~ tojson(status), info=True) %}
+    {% do log('SNOWPLOW_BACKFILL_MISSING: ' ~ tojson(missing), info=True) %}
+    {% do log('SNOWPLOW_BACKFILL_COUNTS: ' ~ tojson(counts_enabled), info=True) %}
+{% endmacro %}
+
+
+{% macro update_backfill_manifest(models, last_success) %}
+    {{ return(adapter.dispatch('update_backfill_manifest', 'snowplow_normalize')(models, last_success)) }}
+{% endmacro %}
+
+{% macro default__update_backfill_manifest(models, last_success) %}
+    {# Never move a model backwards, a model already ahead of the backfill keeps its own last_success #}
+    {%- set update_query -%}
+        merge into {{ snowplow_utils.get_incremental_manifest_table_relation('snowplow_normalize') }} m
+        using (
+            {% for model in models -%}
+            select '{{ model }}' as model, {{ snowplow_utils.cast_to_tstamp(last_success) }} as last_success
+            {% if not loop.last %}union all{% endif %}
+            {% endfor -%}
+        ) s
+        on m.model = s.model
+        when matched then update set last_success = greatest(m.last_success, s.last_success)
+        when not matched then insert (model, last_success) values (s.model, s.last_success)
+    {%- endset -%}
+
+    {%- if execute -%}
+        {% do run_query(update_query) %}
+        {% do log('Snowplow: Backfill manifest updated to ' ~ last_success ~ ' for ' ~ models|join(', '), info=True) %}
+    {%- endif -%}
+{% endmacro %}
@@ -0,0 +1,42 @@
+{# Cast a field to the type from the python script, only where the type is more precise than the column type from the loader #}
+{% macro cast_field(field, type) %}
+    {{ return(adapter.dispatch('cast_field', 'snowplow_normalize')(field, type)) }}
+{% endmacro %}
+
+{% macro default__cast_field(field, type) %}
+    {%- if type -%}
+        {{ return(field ~ '::' ~ type) }}
+    {%- else -%}
+        {{ return(field) }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro bigquery__cast_field(field, type) %}
+    {%- set cast_types = {'timestamp': 'timestamp', 'date': 'date', 'int': 'int64', 'bigint': 'int64', 'double': 'float64'} -%}
+    {%- set cast_type = cast_types.get((type or '').split('(')[0]) -%}
+    {%- if cast_type -%}
+        {{ return('cast(' ~ field ~ ' as ' ~ cast_type ~ ')') }}
+    {%- else -%}
+        {{ return(field) }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro databricks__cast_field(field, type) %}
+    {%- set cast_types = {'timestamp': 'timestamp', 'date': 'date', 'int': 'int', 'bigint': 'bigint', 'double': 'double'} -%}
+    {%- set cast_type = cast_types.get((type or '').split('(')[0]) -%}
+    {%- if cast_type -%}
+        {{ return('cast(' ~ field ~ ' as ' ~ cast_type ~ ')') }}
+    {%- else -%}
+        {{ return(field) }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro duckdb__cast_field(field, type) %}
+    {%- set cast_types = {'timestamp': 'timestamp', 'date': 'date', 'int': 'integer', 'bigint': 'bigint', 'double': 'double'} -%}
+    {%- set cast_type = cast_types.get((type or '').split('(')[0]) -%}
+    {%- if cast_type -%}
+        {{ return('cast(' ~ field ~ ' as ' ~ cast_type ~ ')') }}
+    {%- else -%}
+        {{ return(field) }}
+    {%- endif -%}
+{% endmacro %}
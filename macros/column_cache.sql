@@ -0,0 +1,72 @@
+{# List the columns of a relation once per invocation, shared by every model that needs them #}
+
+{% macro get_cached_columns(relation) %}
+    {{ return(adapter.dispatch('get_cached_columns', 'snowplow_normalize')(relation)) }}
+{% endmacro %}
+
+{% macro default__get_cached_columns(relation) %}
+    {# The graph is a single object for the whole invocation, so it can hold the cache across models. The relations are built before any model that uses them compiles, so the columns do not change within a run #}
+    {%- if 'snowplow_normalize_column_cache' not in graph -%}
+        {%- do graph.update({'snowplow_normalize_column_cache': {}}) -%}
+    {%- endif -%}
+    {%- set column_cache = graph['snowplow_normalize_column_cache'] -%}
+    {%- set relation_key = relation|string -%}
+
+    {%- if relation_key not in column_cache -%}
+        {%- do column_cache.update({relation_key: adapter.get_columns_in_relation(relation)}) -%}
+    {%- endif -%}
+
+    {{ return(column_cache[relation_key]) }}
+{% endmacro %}
+
+
+{# A version of snowplow_utils.combine_column_versions that uses the cached columns, producing the same coalesced fields #}
+{% macro combine_cached_column_versions(relation, column_prefix, required_fields = [], include_field_alias = true) %}
+    {{ return(adapter.dispatch('combine_cached_column_versions', 'snowplow_normalize')(relation, column_prefix, required_fields, include_field_alias)) }}
+{% endmacro %}
+
+{% macro default__combine_cached_column_versions(relation, column_prefix, required_fields = [], include_field_alias = true) %}
+    {# Required fields are either a field name, a (field name, alias) pair, or a (field name, alias, type) triple to cast the field #}
+    {%- set required_names = [] -%}
+    {%- set required_aliases = {} -%}
+    {%- set required_types = {} -%}
+    {%- for field in required_fields -%}
+        {%- set field_name = field if field is string else field[0] -%}
+        {%- do required_names.append(field_name) -%}
+        {%- do required_aliases.update({field_name: field if field is string else field[1]}) -%}
+        {%- do required_types.update({field_name: field[2] if field is not string and field|length > 2 else none}) -%}
+    {%- endfor -%}
+
+    {# Fields are ordered as they first appear across the column versions, latest version first, with the path to the field in each version #}
+    {%- set field_order = [] -%}
+    {%- set field_paths = {} -%}
+    {%- for column in snowplow_normalize.get_cached_columns(relation)|sort(attribute='name', reverse=true) -%}
+        {%- if column.name.lower().startswith(column_prefix.lower()) -%}
+            {%- set column_path = column.name ~ ('[safe_offset(0)]' if column.mode == 'REPEATED' else '') -%}
+            {%- for field in column.fields -%}
+                {%- for field_name in required_names if field_name.split('.')[0] == field.name -%}
+                    {# Nested fields are a dot separated path, only included if this version of the column has them #}
+                    {%- set nested = namespace(field=field) -%}
+                    {%- for part in field_name.split('.')[1:] if nested.field -%}
+                        {%- set nested.field = nested.field.fields|selectattr('name', 'equalto', part)|first -%}
+                    {%- endfor -%}
+                    {%- if nested.field -%}
+                        {%- if field_name not in field_paths -%}
+                            {%- do field_order.append(field_name) -%}
+                            {%- do field_paths.update({field_name: []}) -%}
+                        {%- endif -%}
+                        {%- do field_paths[field_name].append(column_path ~ '.' ~ field_name) -%}
+                    {%- endif -%}
+                {%- endfor -%}
+            {%- endfor -%}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {%- set coalesced_fields = [] -%}
+    {%- for field_name in field_order -%}
+        {%- set coalesced_field = snowplow_normalize.cast_field('coalesce(' ~ field_paths[field_name]|join(', ') ~ ')', required_types[field_name]) -%}
+        {%- do coalesced_fields.append(coalesced_field ~ (' as ' ~ required_aliases[field_name] if include_field_alias else '')) -%}
+    {%- endfor -%}
+
+    {{ return(coalesced_fields) }}
+{% endmacro %}
@@ -0,0 +1,78 @@
+{# Aggregate a normalized event model by day, rebuilding only the days with events in this run #}
+{% macro daily_rollup(events_relation, event_names, dimensions = [], measures = []) %}
+    {{ return(adapter.dispatch('daily_rollup', 'snowplow_normalize')(events_relation, event_names, dimensions, measures)) }}
+{% endmacro %}
+
+{% macro default__daily_rollup(events_relation, event_names, dimensions = [], measures = []) %}
+{# The ref is outside the execute check so dbt records the dependency when parsing #}
+{%- set this_run_relation = ref('snowplow_normalize_base_events_this_run') -%}
+{%- set day_limits = [none, none] -%}
+{%- if execute and is_incremental() -%}
+    {%- set limits_query -%}
+        select
+            cast(min(collector_tstamp) as date) as lower_day,
+            cast(max(collector_tstamp) as date) as upper_day
+        from {{ this_run_relation }}
+        where event_name in ('{{ event_names|join("','") }}')
+    {%- endset -%}
+    {%- set day_limits = run_query(limits_query).rows[0] -%}
+{%- endif -%}
+
+select
+    cast(collector_tstamp as date) as rollup_date
+    {%- for dimension in dimensions %}
+    , {{ dimension }}
+    {%- endfor %}
+    {%- for measure in measures %}
+    , {{ snowplow_normalize.rollup_measure(measure) }} as {{ measure['alias'] }}
+    {%- endfor %}
+from
+    {{ events_relation }}
+where
+    {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {#- Whole days are aggregated again from the event model, so the approximate distinct counts and sketches are never added across runs #}
+    {%- if is_incremental() -%}
+        {%- if day_limits[0] is none %}
+    and 1 = 0
+        {%- else %}
+    and collector_tstamp >= {{ snowplow_utils.cast_to_tstamp(day_limits[0]|string) }}
+    and collector_tstamp < {{ snowplow_utils.timestamp_add('day', 1, snowplow_utils.cast_to_tstamp(day_limits[1]|string)) }}
+        {%- endif -%}
+    {%- endif %}
+group by {{ range(1, dimensions|length + 2)|join(', ') }}
+{% endmacro %}
+
+
+{# The select expression of a rollup measure, one of count, count_distinct (approximate), sum, or hll_sketch #}
+{% macro rollup_measure(measure) %}
+    {%- if measure['type'] == 'count' -%}
+        {{ return('count(*)') }}
+    {%- elif measure['type'] == 'count_distinct' -%}
+        {{ return('approx_count_distinct(' ~ measure['column'] ~ ')') }}
+    {%- elif measure['type'] == 'sum' -%}
+        {{ return('sum(' ~ measure['column'] ~ ')') }}
+    {%- elif measure['type'] == 'hll_sketch' -%}
+        {{ return(adapter.dispatch('rollup_sketch', 'snowplow_normalize')(measure['column'])) }}
+    {%- endif -%}
+    {{ exceptions.raise_compiler_error("Snowplow Error: Rollup measure type " ~ measure['type'] ~ " is not supported, please use one of count, count_distinct, sum, or hll_sketch.") }}
+{% endmacro %}
+
+{# Sketches can be combined across days and dimensions to count distinct values over any period #}
+{% macro default__rollup_sketch(column) %}
+    {{ exceptions.raise_compiler_error("Snowplow Error: hll_sketch rollup measures are not supported on " ~ target.type ~ ", please use count_distinct.") }}
+{% endmacro %}
+
+{# Combine with hll_estimate(hll_combine(hll_import(<column>))) #}
+{% macro snowflake__rollup_sketch(column) %}
+    {{ return('hll_export(hll_accumulate(' ~ column ~ '))') }}
+{% endmacro %}
+
+{# Combine with hll_count.merge(<column>) #}
+{% macro bigquery__rollup_sketch(column) %}
+    {{ return('hll_count.init(' ~ column ~ ')') }}
+{% endmacro %}
+
+{# Combine with hll_sketch_estimate(hll_union_agg(<column>)) #}
+{% macro databricks__rollup_sketch(column) %}
+    {{ return('hll_sketch_agg(' ~ column ~ ')') }}
+{% endmacro %}
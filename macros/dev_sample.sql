@@ -0,0 +1,67 @@
+{# Sampling of events on the dev target, so development runs process a fraction of the events. All values return no sampling on any other target #}
+
+{% macro get_dev_sample_rate() %}
+    {%- set sample_rate = snowplow_utils.get_value_by_target(
+                                    dev_value=var('snowplow__dev_sample_rate', 1),
+                                    default_value=1,
+                                    dev_target_name=var('snowplow__dev_target_name')
+                                    ) -%}
+    {%- if sample_rate <= 0 or sample_rate > 1 -%}
+        {{ exceptions.raise_compiler_error("Snowplow Error: snowplow__dev_sample_rate must be greater than 0 and at most 1, got " ~ sample_rate ~ ".") }}
+    {%- endif -%}
+    {{ return(sample_rate) }}
+{% endmacro %}
+
+
+{# A deterministic sample on the hash of the event_id, so every model (and every run) keeps the same events #}
+{% macro dev_sample_filter(event_id_field = 'event_id') %}
+    {{ return(adapter.dispatch('dev_sample_filter', 'snowplow_normalize')(event_id_field)) }}
+{% endmacro %}
+
+{% macro default__dev_sample_filter(event_id_field = 'event_id') %}
+    {{ return('abs(mod(hash(' ~ event_id_field ~ '), 10000)) < ' ~ (snowplow_normalize.get_dev_sample_rate() * 10000)|int) }}
+{% endmacro %}
+
+{% macro bigquery__dev_sample_filter(event_id_field = 'event_id') %}
+    {{ return('abs(mod(farm_fingerprint(' ~ event_id_field ~ '), 10000)) < ' ~ (snowplow_normalize.get_dev_sample_rate() * 10000)|int) }}
+{% endmacro %}
+
+{% macro databricks__dev_sample_filter(event_id_field = 'event_id') %}
+    {{ return('pmod(xxhash64(' ~ event_id_field ~ '), 10000) < ' ~ (snowplow_normalize.get_dev_sample_rate() * 10000)|int) }}
+{% endmacro %}
+
+{% macro duckdb__dev_sample_filter(event_id_field = 'event_id') %}
+    {{ return('hash(' ~ event_id_field ~ ') % 10000 < ' ~ (snowplow_normalize.get_dev_sample_rate() * 10000)|int) }}
+{% endmacro %}
+
+
+{# The events relation with its alias, block sampled on the dev target when snowplow__dev_tablesample_percent is below 100 so less of the table is scanned #}
+{% macro dev_tablesample(relation, alias) %}
+    {%- set tablesample_percent = snowplow_utils.get_value_by_target(
+                                    dev_value=var('snowplow__dev_tablesample_percent', 100),
+                                    default_value=100,
+                                    dev_target_name=var('snowplow__dev_target_name')
+                                    ) -%}
+    {%- if tablesample_percent >= 100 -%}
+        {{ return(relation ~ ' as ' ~ alias) }}
+    {%- endif -%}
+    {{ return(adapter.dispatch('dev_tablesample', 'snowplow_normalize')(relation, alias, tablesample_percent)) }}
+{% endmacro %}
+
+{# A fixed seed, so repeated dev runs over unchanged data read the same blocks #}
+{% macro default__dev_tablesample(relation, alias, tablesample_percent) %}
+    {{ return(relation ~ ' as ' ~ alias ~ ' sample system (' ~ tablesample_percent ~ ') seed (42)') }}
+{% endmacro %}
+
+{# BigQuery does not support a seed, so the blocks read change between runs #}
+{% macro bigquery__dev_tablesample(relation, alias, tablesample_percent) %}
+    {{ return(relation ~ ' as ' ~ alias ~ ' tablesample system (' ~ tablesample_percent ~ ' percent)') }}
+{% endmacro %}
+
+{% macro databricks__dev_tablesample(relation, alias, tablesample_percent) %}
+    {{ return(relation ~ ' tablesample (' ~ tablesample_percent ~ ' percent) repeatable (42) as ' ~ alias) }}
+{% endmacro %}
+
+{% macro duckdb__dev_tablesample(relation, alias, tablesample_percent) %}
+    {{ return(relation ~ ' as ' ~ alias ~ ' tablesample system (' ~ tablesample_percent ~ ' percent) repeatable (42)') }}
+{% endmacro %}
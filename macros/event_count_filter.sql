@@ -0,0 +1,97 @@
+{# Skip a model when none of its events are in this run, using the per event name counts in snowplow_normalize_base_event_counts_this_run #}
+{% macro event_count_filter(event_names = none) %}
+    {# The ref is outside the execute check so dbt records the dependency when parsing #}
+    {%- set counts_relation = ref('snowplow_normalize_base_event_counts_this_run') -%}
+    {%- if not execute -%}
+        {{ return('1 = 1') }}
+    {%- endif -%}
+
+    {%- if snowplow_normalize.is_empty_run() -%}
+        {% do log('Snowplow: No events in this run, skipping the read of the events for ' ~ model.name, info=True) %}
+        {{ return('1 = 0') }}
+    {%- endif -%}
+
+    {%- set event_counts = snowplow_normalize.get_event_counts(counts_relation) -%}
+    {# Nothing is skipped without counts of this run, e.g. a dbt compile of a new project or a run that doesn't select the counts model #}
+    {%- if event_counts is none -%}
+        {{ return('1 = 1') }}
+    {%- endif -%}
+    {%- set n_events = namespace(total = 0) -%}
+    {%- for event_name, count in event_counts.items() if not event_names or event_name in event_names -%}
+        {%- set n_events.total = n_events.total + count -%}
+    {%- endfor -%}
+    {%- if n_events.total == 0 -%}
+        {% do log('Snowplow: No events for ' ~ model.name ~ ' in this run, skipping the read of the events', info=True) %}
+        {{ return('1 = 0') }}
+    {%- endif -%}
+    {{ return('1 = 1') }}
+{% endmacro %}
+
+{# The counts per event name of the run, queried by the first model to need them and kept on the graph, which every model of the invocation shares.
+   None if the counts model is not run in this invocation, as its table then holds the counts of an earlier run, or if the counts table does not exist #}
+{% macro get_event_counts(counts_relation) %}
+    {%- if 'model.snowplow_normalize.snowplow_normalize_base_event_counts_this_run' not in selected_resources -%}
+        {{ return(none) }}
+    {%- endif -%}
+    {%- set cached = graph.get('snowplow_normalize_event_counts') -%}
+    {%- if cached and cached['invocation_id'] == invocation_id -%}
+        {{ return(cached['counts']) }}
+    {%- endif -%}
+    {%- set event_counts = none -%}
+    {%- if adapter.get_relation(counts_relation.database, counts_relation.schema, counts_relation.identifier) is not none -%}
+        {%- set results = run_query('select event_name, n_events from ' ~ counts_relation) -%}
+        {%- set event_counts = {} -%}
+        {%- for row in results.rows -%}
+            {%- do event_counts.update({row[0]: row[1]}) -%}
+        {%- endfor -%}
+    {%- endif -%}
+    {%- do graph.update({'snowplow_normalize_event_counts': {'invocation_id': invocation_id, 'counts': event_counts}}) -%}
+    {{ return(event_counts) }}
+{% endmacro %}
+
+
+{# Whether the events table has any events within the limits of the run, checked once by the limits model so an empty run is known before the events are read #}
+{% macro run_has_events(limits_query) %}
+    {%- if not execute -%}
+        {{ return('true') }}
+    {%- endif -%}
+    {%- set limits = run_query(limits_query) -%}
+    {%- set lower_limit = snowplow_utils.cast_to_tstamp(limits.columns[0].values()[0]) -%}
+    {%- set upper_limit = snowplow_utils.cast_to_tstamp(limits.columns[1].values()[0]) -%}
+    {%- set probe_query -%}
+        select 1 as has_events
+        from {{ var('snowplow__events') }} as a
+        where
+            a.{{ var('snowplow__session_timestamp', 'collector_tstamp') }} >= {{ lower_limit }}
+            and a.{{ var('snowplow__session_timestamp', 'collector_tstamp') }} <= {{ upper_limit }}
+            {% if var('snowplow__derived_tstamp_partitioned', true) and target.type == 'bigquery' -%}
+            and a.derived_tstamp >= {{ snowplow_utils.timestamp_add('hour', -1, lower_limit) }}
+            and a.derived_tstamp <= {{ upper_limit }}
+            {% endif -%}
+            and {{ snowplow_utils.app_id_filter(var("snowplow__app_id", [])) }}
+        limit 1
+    {%- endset -%}
+    {{ return('true' if run_query(probe_query).rows else 'false') }}
+{% endmacro %}
+
+{# Whether the limits model found no events in the run, false when snowplow__skip_empty_models is off, the limits model is not run in this invocation, or the limits table does not have the flag yet #}
+{% macro is_empty_run() %}
+    {# The ref is outside the execute check so dbt records the dependency when parsing #}
+    {%- set limits_relation = ref('snowplow_normalize_base_new_event_limits') -%}
+    {%- if not execute or not var('snowplow__skip_empty_models', false) or 'model.snowplow_normalize.snowplow_normalize_base_new_event_limits' not in selected_resources -%}
+        {{ return(false) }}
+    {%- endif -%}
+    {%- set cached = graph.get('snowplow_normalize_empty_run') -%}
+    {%- if cached and cached['invocation_id'] == invocation_id -%}
+        {{ return(cached['empty_run']) }}
+    {%- endif -%}
+    {%- set empty_run = namespace(value = false) -%}
+    {%- if adapter.get_relation(limits_relation.database, limits_relation.schema, limits_relation.identifier) is not none -%}
+        {%- if 'has_events' in adapter.get_columns_in_relation(limits_relation)|map(attribute='name')|map('lower')|list -%}
+            {%- set results = run_query('select has_events from ' ~ limits_relation) -%}
+            {%- set empty_run.value = results.rows|length > 0 and not results.rows[0][0] -%}
+        {%- endif -%}
+    {%- endif -%}
+    {%- do graph.update({'snowplow_normalize_empty_run': {'invocation_id': invocation_id, 'empty_run': empty_run.value}}) -%}
+    {{ return(empty_run.value) }}
+{% endmacro %}
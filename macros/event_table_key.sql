@@ -0,0 +1,9 @@
+{# A fixed width key for a row of the filtered events table, the md5 of the event_id and the id of the model, used by filtered_events_key hash #}
+{% macro event_table_key(event_id_field, event_table_id) %}
+    {{ return(adapter.dispatch('event_table_key', 'snowplow_normalize')(event_id_field, event_table_id)) }}
+{% endmacro %}
+
+{% macro default__event_table_key(event_id_field, event_table_id) %}
+    {# The full 128 bit md5 as a hex string, a truncated 64 bit hash can collide and silently merge two events at high volumes #}
+    {{ return(dbt.hash(dbt.concat([event_id_field, "'-" ~ event_table_id ~ "'"]))) }}
+{% endmacro %}
@@ -0,0 +1,26 @@
+{# Return the closest incremental strategy to the one requested that the warehouse supports #}
+{% macro get_incremental_strategy(strategy) %}
+    {%- if strategy not in ['merge', 'append', 'insert_overwrite', 'delete+insert'] -%}
+        {{ exceptions.raise_compiler_error("Snowplow Error: Incremental strategy " ~ strategy ~ " is not supported, please use one of merge, append, insert_overwrite, or delete+insert.") }}
+    {%- endif -%}
+    {{ return(adapter.dispatch('get_incremental_strategy', 'snowplow_normalize')(strategy)) }}
+{% endmacro %}
+
+{% macro default__get_incremental_strategy(strategy) %}
+    {# Snowflake tables have no partitions to overwrite, deleting and inserting on the unique key replaces the same events #}
+    {{ return({'insert_overwrite': 'delete+insert'}.get(strategy, strategy)) }}
+{% endmacro %}
+
+{% macro bigquery__get_incremental_strategy(strategy) %}
+    {# A merge without a unique key only inserts, so is the same as an append #}
+    {{ return({'append': 'merge', 'delete+insert': 'merge'}.get(strategy, strategy)) }}
+{% endmacro %}
+
+{% macro databricks__get_incremental_strategy(strategy) %}
+    {{ return({'delete+insert': 'merge'}.get(strategy, strategy)) }}
+{% endmacro %}
+
+{% macro duckdb__get_incremental_strategy(strategy) %}
+    {# dbt-duckdb only supports append and delete+insert, deleting and inserting on the unique key replaces the same events #}
+    {{ return({'merge': 'delete+insert', 'insert_overwrite': 'delete+insert'}.get(strategy, strategy)) }}
+{% endmacro %}
@@ -0,0 +1,52 @@
+{# Restrict a model to the events after its own manifest watermark, used when snowplow__independent_model_windows is enabled #}
+
+{% macro model_window_filter(session_timestamp = var('snowplow__session_timestamp', 'collector_tstamp'), model_name = none) %}
+    {{ return(adapter.dispatch('model_window_filter', 'snowplow_normalize')(session_timestamp, model_name)) }}
+{% endmacro %}
+
+{% macro default__model_window_filter(session_timestamp = var('snowplow__session_timestamp', 'collector_tstamp'), model_name = none) %}
+    {# Nothing to filter on if the mode is off, at parse time, or if the model is being built for the first time #}
+    {%- if not var('snowplow__independent_model_windows', false) or not execute or not is_incremental() -%}
+        {{ return('1 = 1') }}
+    {%- endif -%}
+
+    {# A list of models gets the earliest watermark of them, as the filtered events table does for each event model it reads #}
+    {%- set model_names = [model_name] if model_name is string else (model_name or [model.name]) -%}
+
+    {# Models in the same group share a single watermark, the earliest of the group #}
+    {%- set window_models = [] -%}
+    {%- for name in model_names -%}
+        {%- set ns = namespace(grouped = false) -%}
+        {%- for group_name, group_models in var('snowplow__model_window_groups', {}).items() -%}
+            {%- if name in group_models -%}
+                {%- do window_models.extend(group_models) -%}
+                {%- set ns.grouped = true -%}
+            {%- endif -%}
+        {%- endfor -%}
+        {%- if not ns.grouped -%}
+            {%- do window_models.append(name) -%}
+        {%- endif -%}
+    {%- endfor -%}
+    {%- set window_models = window_models|unique|list -%}
+
+    {%- set manifest_query -%}
+        select
+            min(last_success) as last_success,
+            count(*) as models
+        from {{ snowplow_utils.get_incremental_manifest_table_relation('snowplow_normalize') }}
+        where model in ('{{ window_models|join("','") }}')
+    {%- endset -%}
+
+    {%- set results = run_query(manifest_query) -%}
+    {%- set last_success = results.columns[0].values()[0] -%}
+    {%- set matched_models = results.columns[1].values()[0] -%}
+
+    {# A model (or group member) missing from the manifest needs the full window of the run #}
+    {%- if last_success is none or matched_models < window_models|length -%}
+        {{ return('1 = 1') }}
+    {%- endif -%}
+
+    {%- set lower_limit = snowplow_utils.timestamp_add('hour', -var('snowplow__lookback_window_hours', 6), snowplow_utils.cast_to_tstamp(last_success)) -%}
+
+    {{ return(session_timestamp ~ ' >= ' ~ lower_limit) }}
+{% endmacro %}
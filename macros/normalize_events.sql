@@ -1,8 +1,8 @@
-{% macro normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false) %}
-    {{ return(adapter.dispatch('normalize_events', 'snowplow_normalize')(event_names, flat_cols, sde_cols, sde_keys, sde_types, sde_aliases, context_cols, context_keys, context_types, context_aliases, remove_new_event_check)) }}
+{% macro normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false, events_relation = none) %}
+    {{ return(adapter.dispatch('normalize_events', 'snowplow_normalize')(event_names, flat_cols, sde_cols, sde_keys, sde_types, sde_aliases, context_cols, context_keys, context_types, context_aliases, remove_new_event_check, events_relation)) }}
 {% endmacro %}
 
-{% macro snowflake__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false) %}
+{% macro snowflake__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false, events_relation = none) %}
 {# Remove down to major version for Snowflake columns, drop 2 last _X values #}
 {%- set sde_cols_clean = [] -%}
 {%- for ind in range(sde_cols|length) -%}
@@ -28,9 +28,9 @@ select
         {%- for col, col_ind in zip(sde_cols_clean, range(sde_cols_clean|length)) -%} {# Loop over each sde column #}
             {%- for key, type in zip(sde_keys[col_ind], sde_types[col_ind]) -%} {# Loop over each key within the sde column #}
                 {% if sde_aliases|length > 0 -%}
-                    , {{ col }}:{{ key }}::{{ type }} as {{ sde_aliases[col_ind] }}_{{ snowplow_normalize.snakeify_case(key) }} {# Alias should align across all warehouses in snakecase #}
+                    , {{ col }}:{{ key }}::{{ type }} as {{ sde_aliases[col_ind] }}_{{ snowplow_normalize.snakeify_case(key)|replace('.', '_') }} {# Alias should align across all warehouses in snakecase, nested keys are joined with an underscore #}
                 {% else -%}
-                    , {{ col }}:{{ key }}::{{ type }} as {{ snowplow_normalize.snakeify_case(key) }}
+                    , {{ col }}:{{ key }}::{{ type }} as {{ snowplow_normalize.snakeify_case(key)|replace('.', '_') }}
                 {% endif -%}
             {%- endfor -%}
         {%- endfor -%}
@@ -40,24 +40,30 @@ select
         {%- for col, col_ind in zip(context_cols_clean, range(context_cols_clean|length)) -%} {# Loop over each context column #}
             {%- for key, type in zip(context_keys[col_ind], context_types[col_ind]) -%} {# Loop over each key within the context column #}
                 {% if context_aliases|length > 0 -%}
-                    , {{ col }}[0]:{{ key }}::{{ type }} as {{ context_aliases[col_ind] }}_{{ snowplow_normalize.snakeify_case(key) }} {# Alias should align across all warehouses in snakecase #}
+                    , {{ col }}[0]:{{ key }}::{{ type }} as {{ context_aliases[col_ind] }}_{{ snowplow_normalize.snakeify_case(key)|replace('.', '_') }} {# Alias should align across all warehouses in snakecase, nested keys are joined with an underscore #}
                 {% else -%}
-                    , {{ col }}[0]:{{ key }}::{{ type }} as {{ snowplow_normalize.snakeify_case(key) }}
+                    , {{ col }}[0]:{{ key }}::{{ type }} as {{ snowplow_normalize.snakeify_case(key)|replace('.', '_') }}
                 {% endif -%}
             {%- endfor -%}
         {%- endfor -%}
     {%- endif %}
 from
-    {{ ref('snowplow_normalize_base_events_this_run') }}
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
 where
     event_name in ('{{ event_names|join("','") }}')
     {% if not remove_new_event_check %}
         and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
     {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
 {% endmacro %}
 
 
-{% macro bigquery__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false) %}
+{% macro bigquery__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false, events_relation = none) %}
 {# Remove down to major version for bigquery combine columns macro, drop 2 last _X values #}
 {%- set sde_cols_clean = [] -%}
 {%- for ind in range(sde_cols|length) -%}
@@ -103,18 +109,20 @@ select
     {% if sde_cols|length > 0 %}
         {%- for col, col_ind in zip(sde_cols_clean, range(sde_cols|length)) -%} {# Loop over each sde column, get coalesced version of keys #}
             {# Prep the alias columns #}
-            {%- if sde_aliases|length > 0 -%}
-                {%- set required_aliases = [] -%}
-                {%- for i in range(sde_keys_clean[col_ind]|length) -%}
-                    {%- do required_aliases.append(sde_aliases[col_ind] ~ '_' ~ sde_keys_clean[col_ind][i]) -%}
-                {%- endfor -%}
-            {%- else -%}
-                {%- set required_aliases = sde_keys_clean[col_ind] -%}
-            {%- endif -%}
-            {%- set sde_col_list = snowplow_utils.combine_column_versions(
+            {%- set col_types = sde_types[col_ind] if sde_types|length > col_ind else [] -%}
+            {%- set required_fields = [] -%}
+            {%- for i in range(sde_keys_clean[col_ind]|length) -%} {# Nested keys are joined with an underscore #}
+                {%- if sde_aliases|length > 0 -%}
+                    {%- set required_alias = sde_aliases[col_ind] ~ '_' ~ sde_keys_clean[col_ind][i]|replace('.', '_') -%}
+                {%- else -%}
+                    {%- set required_alias = sde_keys_clean[col_ind][i]|replace('.', '_') -%}
+                {%- endif -%}
+                {%- do required_fields.append((sde_keys_clean[col_ind][i], required_alias, col_types[i] if col_types|length > i else none)) -%}
+            {%- endfor -%}
+            {%- set sde_col_list = snowplow_normalize.combine_cached_column_versions(
                                         relation=ref('snowplow_normalize_base_events_this_run'),
                                         column_prefix=col.lower(),
-                                        required_fields = zip(sde_keys_clean[col_ind], required_aliases)
+                                        required_fields = required_fields
                                         ) -%}
             {%- for field, key_ind in zip(sde_col_list, range(sde_col_list|length)) -%} {# Loop over each key within the column, appling the bespoke alias as needed #}
                 , {{field}}
@@ -125,18 +133,20 @@ select
     {% if context_cols|length > 0 %}
         {%- for col, col_ind in zip(context_cols_clean, range(context_cols|length)) -%} {# Loop over each context column, get coalesced version of keys #}
             {# Prep the alias columns #}
-            {%- if context_aliases|length > 0 -%}
-                {%- set required_aliases = [] -%}
-                {%- for i in range(context_keys_clean[col_ind]|length) -%}
-                    {%- do required_aliases.append(context_aliases[col_ind] ~ '_' ~ context_keys_clean[col_ind][i]) -%}
-                {%- endfor -%}
-            {%- else -%}
-                {%- set required_aliases = context_keys_clean[col_ind] -%}
-            {%- endif -%}
-            {%- set cont_col_list = snowplow_utils.combine_column_versions(
+            {%- set col_types = context_types[col_ind] if context_types|length > col_ind else [] -%}
+            {%- set required_fields = [] -%}
+            {%- for i in range(context_keys_clean[col_ind]|length) -%} {# Nested keys are joined with an underscore #}
+                {%- if context_aliases|length > 0 -%}
+                    {%- set required_alias = context_aliases[col_ind] ~ '_' ~ context_keys_clean[col_ind][i]|replace('.', '_') -%}
+                {%- else -%}
+                    {%- set required_alias = context_keys_clean[col_ind][i]|replace('.', '_') -%}
+                {%- endif -%}
+                {%- do required_fields.append((context_keys_clean[col_ind][i], required_alias, col_types[i] if col_types|length > i else none)) -%}
+            {%- endfor -%}
+            {%- set cont_col_list = snowplow_normalize.combine_cached_column_versions(
                                         relation=ref('snowplow_normalize_base_events_this_run'),
                                         column_prefix=col.lower(),
-                                        required_fields = zip(context_keys_clean[col_ind], required_aliases)
+                                        required_fields = required_fields
                                         ) -%}
             {%- for field, key_ind in zip(cont_col_list, range(cont_col_list|length)) -%} {# Loop over each key within the column #}
                 , {{field}}
@@ -144,15 +154,21 @@ select
         {%- endfor -%}
     {%- endif %}
 from
-    {{ ref('snowplow_normalize_base_events_this_run') }}
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
 where
     event_name in ('{{ event_names|join("','") }}')
     {% if not remove_new_event_check %}
         and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
     {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
 {% endmacro %}
 
-{% macro databricks__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false) %}
+{% macro databricks__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false, events_relation = none) %}
 {# Remove down to major version for Databricks columns, drop 2 last _X values #}
 {%- set sde_cols_clean = [] -%}
 {%- for ind in range(sde_cols|length) -%}
@@ -199,11 +215,13 @@ select
     -- self describing events columns from event table
     {% if sde_cols_clean|length > 0 %}
         {%- for col, col_ind in zip(sde_cols_clean, range(sde_cols_clean|length)) -%} {# Loop over each sde column #}
+            {%- set col_types = sde_types[col_ind] if sde_types|length > col_ind else [] -%}
             {%- for key in sde_keys_clean[col_ind] -%} {# Loop over each key within the sde column #}
+                {%- set field = snowplow_normalize.cast_field(col ~ '.' ~ key, col_types[loop.index0] if col_types|length > loop.index0 else none) -%}
                 {% if sde_aliases|length > 0 -%}
-                    , {{ col }}.{{ key }} as {{ sde_aliases[col_ind] }}_{{ key }}
+                    , {{ field }} as {{ sde_aliases[col_ind] }}_{{ key|replace('.', '_') }}
                 {% else -%}
-                    , {{ col }}.{{ key }} as {{ key }}
+                    , {{ field }} as {{ key|replace('.', '_') }}
                 {% endif -%}
             {%- endfor -%}
         {%- endfor -%}
@@ -212,20 +230,113 @@ select
     -- context column(s) from the event table
     {% if context_cols_clean|length > 0 %}
         {%- for col, col_ind in zip(context_cols_clean, range(context_cols_clean|length)) -%} {# Loop over each context column #}
+            {%- set col_types = context_types[col_ind] if context_types|length > col_ind else [] -%}
             {%- for key in context_keys_clean[col_ind] -%} {# Loop over each key within the context column #}
+                {%- set field = snowplow_normalize.cast_field(col ~ '[0].' ~ key, col_types[loop.index0] if col_types|length > loop.index0 else none) -%}
                 {% if context_aliases|length > 0 -%}
-                    , {{ col }}[0].{{ key }} as {{ context_aliases[col_ind] }}_{{ key }}
+                    , {{ field }} as {{ context_aliases[col_ind] }}_{{ key|replace('.', '_') }}
                 {% else -%}
-                    , {{ col }}[0].{{ key }} as {{ key }}
+                    , {{ field }} as {{ key|replace('.', '_') }}
                 {% endif -%}
             {%- endfor -%}
         {%- endfor -%}
     {%- endif %}
 from
-    {{ ref('snowplow_normalize_base_events_this_run') }}
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
 where
     event_name in ('{{ event_names|join("','") }}')
     {% if not remove_new_event_check %}
         and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
     {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro duckdb__normalize_events(event_names, flat_cols = [], sde_cols = [], sde_keys = [], sde_types = [], sde_aliases = [], context_cols = [], context_keys = [], context_types = [], context_aliases = [], remove_new_event_check = false, events_relation = none) %}
+{# DuckDB events are read with the same shape as Databricks (e.g. from the lake loader), a struct column per major version, drop 2 last _X values #}
+{%- set sde_cols_clean = [] -%}
+{%- for ind in range(sde_cols|length) -%}
+    {% do sde_cols_clean.append('_'.join(sde_cols[ind].split('_')[:-2])) -%}
+{%- endfor -%}
+
+{%- set context_cols_clean = [] -%}
+{%- for ind in range(context_cols|length) -%}
+    {% do context_cols_clean.append('_'.join(context_cols[ind].split('_')[:-2])) -%}
+{%- endfor -%}
+
+{# Replace keys with snake_case where needed #}
+{%- set sde_keys_clean = [] -%}
+{%- set context_keys_clean = [] -%}
+
+{%- for ind1 in range(sde_keys|length) -%}
+    {%- set sde_key_clean = [] -%}
+    {%- for ind2 in range(sde_keys[ind1]|length) -%}
+        {% do sde_key_clean.append(snowplow_normalize.snakeify_case(sde_keys[ind1][ind2])) -%}
+    {%- endfor -%}
+    {% do sde_keys_clean.append(sde_key_clean) -%}
+{%- endfor -%}
+
+{%- for ind1 in range(context_keys|length) -%}
+    {%- set context_key_clean = [] -%}
+    {%- for ind2 in range(context_keys[ind1]|length) -%}
+        {% do context_key_clean.append(snowplow_normalize.snakeify_case(context_keys[ind1][ind2])) -%}
+    {%- endfor -%}
+    {% do context_keys_clean.append(context_key_clean) -%}
+{%- endfor -%}
+
+select
+    event_id
+    , collector_tstamp
+    -- Flat columns from event table
+    {% if flat_cols|length > 0 %}
+        {%- for col in flat_cols -%}
+            , {{ col }}
+        {% endfor -%}
+    {%- endif -%}
+    -- self describing events columns from event table
+    {% if sde_cols_clean|length > 0 %}
+        {%- for col, col_ind in zip(sde_cols_clean, range(sde_cols_clean|length)) -%} {# Loop over each sde column #}
+            {%- set col_types = sde_types[col_ind] if sde_types|length > col_ind else [] -%}
+            {%- for key in sde_keys_clean[col_ind] -%} {# Loop over each key within the sde column #}
+                {%- set field = snowplow_normalize.cast_field(col ~ '.' ~ key, col_types[loop.index0] if col_types|length > loop.index0 else none) -%}
+                {% if sde_aliases|length > 0 -%}
+                    , {{ field }} as {{ sde_aliases[col_ind] }}_{{ key|replace('.', '_') }}
+                {% else -%}
+                    , {{ field }} as {{ key|replace('.', '_') }}
+                {% endif -%}
+            {%- endfor -%}
+        {%- endfor -%}
+    {%- endif %}
+
+    -- context column(s) from the event table
+    {% if context_cols_clean|length > 0 %}
+        {%- for col, col_ind in zip(context_cols_clean, range(context_cols_clean|length)) -%} {# Loop over each context column, DuckDB lists are 1-indexed #}
+            {%- set col_types = context_types[col_ind] if context_types|length > col_ind else [] -%}
+            {%- for key in context_keys_clean[col_ind] -%} {# Loop over each key within the context column #}
+                {%- set field = snowplow_normalize.cast_field(col ~ '[1].' ~ key, col_types[loop.index0] if col_types|length > loop.index0 else none) -%}
+                {% if context_aliases|length > 0 -%}
+                    , {{ field }} as {{ context_aliases[col_ind] }}_{{ key|replace('.', '_') }}
+                {% else -%}
+                    , {{ field }} as {{ key|replace('.', '_') }}
+                {% endif -%}
+            {%- endfor -%}
+        {%- endfor -%}
+    {%- endif %}
+from
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
+where
+    event_name in ('{{ event_names|join("','") }}')
+    {% if not remove_new_event_check %}
+        and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
 {% endmacro %}
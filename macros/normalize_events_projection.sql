@@ -0,0 +1,120 @@
+{# A lightweight version of normalize_events for models generated with precompute_projection, where the column expressions have already been resolved by the python script #}
+
+{% macro normalize_events_projection(event_names, flat_cols = [], projection = {}, remove_new_event_check = false, events_relation = none) %}
+    {# The names were snakecased by the python script, so check they match the snakeify_case macro in case it has been overridden, models generated before the check have no entry #}
+    {%- if 'snakeify_check' in projection -%}
+        {%- set keys, snake_keys = projection['snakeify_check'] -%}
+        {%- if snowplow_normalize.snakeify_case(keys)|trim != snake_keys -%}
+            {{ exceptions.raise_compiler_error("Snowplow Error: The snakeify_case macro gives different column names than the python script, models generated with precompute_projection don't use overrides of snakeify_case. Please regenerate the models without precompute_projection.") }}
+        {%- endif -%}
+    {%- endif -%}
+    {{ return(adapter.dispatch('normalize_events_projection', 'snowplow_normalize')(event_names, flat_cols, projection, remove_new_event_check, events_relation)) }}
+{% endmacro %}
+
+{% macro default__normalize_events_projection(event_names, flat_cols = [], projection = {}, remove_new_event_check = false, events_relation = none) %}
+{%- set projection_type = 'databricks' if target.type == 'spark' else target.type -%}
+{%- if projection_type not in projection -%}
+    {{ exceptions.raise_compiler_error("Snowplow Error: No precomputed projection for target type " ~ target.type ~ ", please regenerate your models.") }}
+{%- endif -%}
+
+select
+    event_id
+    , collector_tstamp
+    {% if target.type in ['databricks', 'spark'] -%}
+    , DATE(collector_tstamp) as collector_tstamp_date
+    {%- endif %}
+    -- Flat columns from event table
+    {% for col in flat_cols -%}
+        , {{ col }}
+    {% endfor -%}
+    -- self describing event and context columns from the event table
+    {% for col in projection[projection_type] -%}
+        , {{ col }}
+    {% endfor -%}
+from
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
+where
+    event_name in ('{{ event_names|join("','") }}')
+    {% if not remove_new_event_check %}
+        and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
+{% endmacro %}
+
+
+{% macro bigquery__normalize_events_projection(event_names, flat_cols = [], projection = {}, remove_new_event_check = false, events_relation = none) %}
+{%- if 'bigquery' not in projection -%}
+    {{ exceptions.raise_compiler_error("Snowplow Error: No precomputed projection for target type " ~ target.type ~ ", please regenerate your models.") }}
+{%- endif -%}
+
+select
+    event_id
+    , collector_tstamp
+    -- Flat columns from event table
+    {% for col in flat_cols -%}
+        , {{ col }}
+    {% endfor -%}
+    -- self describing event and context columns from the event table
+    {% for column_prefix, keys, aliases, types in projection['bigquery'] -%} {# Minor versions are only known from the table, so coalesce them at compile time #}
+        {%- set col_list = snowplow_normalize.combine_cached_column_versions(
+                                    relation=ref('snowplow_normalize_base_events_this_run'),
+                                    column_prefix=column_prefix,
+                                    required_fields = zip(keys, aliases, types)
+                                    ) -%}
+        {%- for field in col_list -%}
+        , {{ field }}
+        {% endfor -%}
+    {%- endfor %}
+from
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
+where
+    event_name in ('{{ event_names|join("','") }}')
+    {% if not remove_new_event_check %}
+        and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
+{% endmacro %}
+
+
+{% macro duckdb__normalize_events_projection(event_names, flat_cols = [], projection = {}, remove_new_event_check = false, events_relation = none) %}
+{%- if 'bigquery' not in projection -%}
+    {{ exceptions.raise_compiler_error("Snowplow Error: No precomputed projection for target type " ~ target.type ~ ", please regenerate your models.") }}
+{%- endif -%}
+
+select
+    event_id
+    , collector_tstamp
+    -- Flat columns from event table
+    {% for col in flat_cols -%}
+        , {{ col }}
+    {% endfor -%}
+    -- self describing event and context columns from the event table
+    {% for column_prefix, keys, aliases, types in projection['bigquery'] -%} {# DuckDB has the same struct column per major version as Databricks, so the snake case keys for BigQuery are the field names #}
+        {%- for key, alias, type in zip(keys, aliases, types) -%}
+        , {{ snowplow_normalize.cast_field(column_prefix ~ ('[1].' if column_prefix.startswith('contexts') else '.') ~ key, type) }} as {{ alias }}
+        {% endfor -%}
+    {%- endfor %}
+from
+    {{ snowplow_normalize.tier_events(events_relation, event_names) if events_relation else ref('snowplow_normalize_base_events_this_run') }}
+where
+    event_name in ('{{ event_names|join("','") }}')
+    {% if not remove_new_event_check %}
+        and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter(event_names) }}
+    {%- endif -%}
+{% endmacro %}
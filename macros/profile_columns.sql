@@ -0,0 +1,77 @@
+{# Print the null rate and approximate distinct count of every column of the generated models over the latest window, as JSON for the python script #}
+{% macro profile_columns(models = none, lookback_days = 7) %}
+    {{ return(adapter.dispatch('profile_columns', 'snowplow_normalize')(models, lookback_days)) }}
+{% endmacro %}
+
+{% macro default__profile_columns(models = none, lookback_days = 7) %}
+    {# The window ends at the upper limit of the last run, so it is the same whenever the profile is run #}
+    {%- set lower_limit, upper_limit = snowplow_utils.return_limits_from_model(ref('snowplow_normalize_base_new_event_limits'), 'lower_limit', 'upper_limit') -%}
+    {%- set report = {} -%}
+
+    {%- for node in graph.nodes.values() if node.resource_type == 'model' and node.package_name != 'snowplow_normalize' and ('snowplow_normalize_incremental' in node.tags or 'snowplow_normalize_tiered' in node.tags) -%}
+        {%- if models is none or node.name in models -%}
+            {%- set relation = adapter.get_relation(database = node.database, schema = node.schema, identifier = node.alias) -%}
+            {%- if relation is not none -%}
+                {%- set columns = adapter.get_columns_in_relation(relation) -%}
+                {%- set column_names = columns|map(attribute = 'name')|map('lower')|list -%}
+                {# Event models and the filtered events table have a collector_tstamp, the users table the latest one, rollups have neither so are skipped #}
+                {%- set tstamp_column = 'collector_tstamp' if 'collector_tstamp' in column_names else 'latest_collector_tstamp' if 'latest_collector_tstamp' in column_names else none -%}
+                {%- if tstamp_column is not none -%}
+                    {%- set profile_query -%}
+                        select
+                            count(*) as n_rows
+                            {%- for column in columns %}
+                            , {{ snowplow_normalize.profile_count(column) }}
+                            , {{ snowplow_normalize.profile_distinct(column) }}
+                            {%- endfor %}
+                        from {{ relation }}
+                        where {{ tstamp_column }} >= {{ snowplow_utils.timestamp_add('day', -lookback_days, upper_limit) }}
+                            and {{ tstamp_column }} <= {{ upper_limit }}
+                    {%- endset -%}
+                    {%- set row = run_query(profile_query).rows[0] -%}
+                    {# Counts can come back as decimals, which can't be written to JSON #}
+                    {%- set n_rows = row[0]|int -%}
+                    {%- set model_report = {'rows': n_rows, 'columns': {}} -%}
+                    {%- for column in columns -%}
+                        {%- do model_report['columns'].update({column.name|lower: {
+                            'null_rate': (1 - (row[1 + 2 * loop.index0]|int) / n_rows)|round(4) if n_rows > 0 else none,
+                            'approx_distinct': row[2 + 2 * loop.index0]|int if row[2 + 2 * loop.index0] is not none else none
+                        }}) -%}
+                    {%- endfor -%}
+                    {%- do report.update({node.name: model_report}) -%}
+                    {% do log('Snowplow: Profiled ' ~ columns|length ~ ' columns of ' ~ node.name ~ ' over ' ~ n_rows ~ ' rows', info=True) %}
+                {%- endif -%}
+            {%- endif -%}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {% do print(tojson(report)) %}
+{% endmacro %}
+
+
+{# The number of populated values of a column, for its null rate #}
+{% macro profile_count(column) %}
+    {{ return(adapter.dispatch('profile_count', 'snowplow_normalize')(column)) }}
+{% endmacro %}
+
+{% macro default__profile_count(column) %}
+    {{ return('count(' ~ adapter.quote(column.name) ~ ')') }}
+{% endmacro %}
+
+{# BigQuery REPEATED columns are never null, an empty array is the unpopulated value #}
+{% macro bigquery__profile_count(column) %}
+    {%- if column.mode|default('')|upper == 'REPEATED' -%}
+        {{ return('countif(array_length(' ~ adapter.quote(column.name) ~ ') > 0)') }}
+    {%- endif -%}
+    {{ return('count(' ~ adapter.quote(column.name) ~ ')') }}
+{% endmacro %}
+
+
+{# Nested and semi-structured columns can't be counted distinct on every warehouse, so only their null rate is profiled #}
+{% macro profile_distinct(column) %}
+    {%- set data_type = column.data_type|lower -%}
+    {%- if column.mode|default('')|upper == 'REPEATED' or data_type.startswith(('array', 'struct', 'record', 'map', 'json', 'variant', 'object')) -%}
+        {{ return('null') }}
+    {%- endif -%}
+    {{ return('approx_count_distinct(' ~ adapter.quote(column.name) ~ ')') }}
+{% endmacro %}
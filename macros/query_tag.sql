@@ -0,0 +1,66 @@
+{# The query tag (or labels) for a Snowplow model, set at run time with set_sql_header so it can include the invocation and run window #}
+{% macro set_query_tag() %}
+    {# The ref is outside the execute check so dbt records the dependency when parsing. The limits model is what sets the window, so it has none to report #}
+    {%- set limits_relation = ref('snowplow_normalize_base_new_event_limits') if model.name != 'snowplow_normalize_base_new_event_limits' else none -%}
+    {%- if not execute or not var('snowplow__query_tag_structured', false) -%}
+        {{ return(snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt'))) }}
+    {%- endif -%}
+    {{ return(adapter.dispatch('set_query_tag', 'snowplow_normalize')(limits_relation)) }}
+{% endmacro %}
+
+{# Keep in step with the version in dbt_project.yml, checked by test_package_version #}
+{% macro get_package_version() %}
+    {{ return('0.3.3') }}
+{% endmacro %}
+
+{% macro get_query_tag_values(limits_relation = none) %}
+    {%- set tag = {
+        'app': var('snowplow__query_tag', 'snowplow_dbt'),
+        'package': 'snowplow_normalize',
+        'package_version': snowplow_normalize.get_package_version(),
+        'model': model.name,
+        'invocation_id': invocation_id
+    } -%}
+    {%- if limits_relation is not none -%}
+        {%- do tag.update(snowplow_normalize.get_query_tag_limits(limits_relation)) -%}
+    {%- endif -%}
+    {{ return(tag) }}
+{% endmacro %}
+
+{# The limits of the run, queried by the first model to need them and kept on the graph, which every model of the invocation shares, so the limits table is read once per run rather than once per model #}
+{% macro get_query_tag_limits(limits_relation) %}
+    {%- set cached = graph.get('snowplow_normalize_query_tag_limits') -%}
+    {%- if cached and cached['invocation_id'] == invocation_id -%}
+        {{ return(cached['limits']) }}
+    {%- endif -%}
+    {%- set limits = {} -%}
+    {%- if adapter.get_relation(limits_relation.database, limits_relation.schema, limits_relation.identifier) is not none -%}
+        {%- set results = run_query('select lower_limit, upper_limit from ' ~ limits_relation) -%}
+        {%- if results.rows -%}
+            {%- do limits.update({'lower_limit': results.rows[0][0]|string, 'upper_limit': results.rows[0][1]|string}) -%}
+        {%- endif -%}
+    {%- endif -%}
+    {%- do graph.update({'snowplow_normalize_query_tag_limits': {'invocation_id': invocation_id, 'limits': limits}}) -%}
+    {{ return(limits) }}
+{% endmacro %}
+
+
+{# Databricks and DuckDB have no query tags, join the run metrics to the query history by query_id instead #}
+{% macro default__set_query_tag(limits_relation) %}
+    {{ return(snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt'))) }}
+{% endmacro %}
+
+{% macro snowflake__set_query_tag(limits_relation) %}
+    {%- set tag = snowplow_normalize.get_query_tag_values(limits_relation) -%}
+    {{ return("alter session set query_tag = '" ~ tojson(tag)|replace("'", "\\'") ~ "';") }}
+{% endmacro %}
+
+{# BigQuery labels are lower case letters, numbers, underscores, and dashes, up to 63 characters #}
+{% macro bigquery__set_query_tag(limits_relation) %}
+    {%- set tag = snowplow_normalize.get_query_tag_values(limits_relation) -%}
+    {%- set labels = [] -%}
+    {%- for key, value in tag.items() -%}
+        {%- do labels.append(key ~ ':' ~ modules.re.sub('[^a-z0-9_-]', '_', value|string|lower)[:63]) -%}
+    {%- endfor -%}
+    {{ return('set @@query_label = "' ~ labels|join(',') ~ '";') }}
+{% endmacro %}
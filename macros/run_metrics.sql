@@ -0,0 +1,90 @@
+{# Record the outcome of each Snowplow model in the run metrics table, called from the on-run-end hook with the dbt results #}
+
+{% macro base_create_run_metrics() %}
+    {{ return(adapter.dispatch('base_create_run_metrics', 'snowplow_normalize')()) }}
+{% endmacro %}
+
+{% macro default__base_create_run_metrics() %}
+    with prep as (
+        select
+            cast(null as {{ dbt.type_string() }}) as invocation_id,
+            cast(null as {{ dbt.type_string() }}) as model,
+            cast(null as {{ dbt.type_string() }}) as status,
+            cast(null as {{ dbt.type_bigint() }}) as rows_affected,
+            cast(null as {{ dbt.type_float() }}) as execution_time_seconds,
+            cast(null as {{ dbt.type_timestamp() }}) as lower_limit,
+            cast(null as {{ dbt.type_timestamp() }}) as upper_limit,
+            cast(null as {{ dbt.type_bigint() }}) as bytes_processed,
+            cast(null as {{ dbt.type_bigint() }}) as slot_ms,
+            cast(null as {{ dbt.type_string() }}) as query_id,
+            cast('1970-01-01' as {{ dbt.type_timestamp() }}) as run_started_at
+    )
+
+    select *
+    from prep
+    where false
+{% endmacro %}
+
+
+{% macro record_run_metrics(results) %}
+    {{ return(adapter.dispatch('record_run_metrics', 'snowplow_normalize')(results)) }}
+{% endmacro %}
+
+{% macro default__record_run_metrics(results) %}
+    {%- if not execute or not var('snowplow__enable_run_metrics', false) -%}
+        {{ return('') }}
+    {%- endif -%}
+
+    {%- set metrics_relation = ref('snowplow_normalize_run_metrics') -%}
+    {%- if adapter.get_relation(metrics_relation.database, metrics_relation.schema, metrics_relation.identifier) is none -%}
+        {% do log('Snowplow: Run metrics table ' ~ metrics_relation ~ ' does not exist yet, skipping run metrics', info=True) %}
+        {{ return('') }}
+    {%- endif -%}
+
+    {%- set snowplow_results = [] -%}
+    {%- set limits = namespace(ran=false) -%}
+    {%- for result in results if result.node.resource_type == 'model' -%}
+        {%- if result.node.name == 'snowplow_normalize_base_new_event_limits' and result.status|string == 'success' -%}
+            {%- set limits.ran = true -%}
+        {%- endif -%}
+        {%- if ('snowplow_normalize_incremental' in result.node.tags or 'snowplow_normalize_tiered' in result.node.tags) -%}
+            {%- do snowplow_results.append(result) -%}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {%- if not snowplow_results -%}
+        {{ return('') }}
+    {%- endif -%}
+
+    {# The limits table is only the window of this run if it was rebuilt in this run, otherwise it holds the limits of an earlier run #}
+    {%- set limits_relation = ref('snowplow_normalize_base_new_event_limits') -%}
+
+    {%- set insert_query -%}
+        insert into {{ metrics_relation }} (invocation_id, model, status, rows_affected, execution_time_seconds, lower_limit, upper_limit, bytes_processed, slot_ms, query_id, run_started_at)
+        {% for result in snowplow_results -%}
+        {%- set adapter_response = result.adapter_response or {} -%}
+        {#- Snowflake and Databricks return a query_id, BigQuery a job_id, to join to the warehouse query history for credit usage -#}
+        {%- set query_id = adapter_response.get('query_id') or adapter_response.get('job_id') -%}
+        select
+            '{{ invocation_id }}',
+            '{{ result.node.name }}',
+            '{{ result.status }}',
+            cast({{ adapter_response.get('rows_affected') if adapter_response.get('rows_affected') is not none else 'null' }} as {{ dbt.type_bigint() }}),
+            cast({{ result.execution_time or 0 }} as {{ dbt.type_float() }}),
+            {% if limits.ran -%}
+            (select lower_limit from {{ limits_relation }}),
+            (select upper_limit from {{ limits_relation }}),
+            {%- else -%}
+            cast(null as {{ dbt.type_timestamp() }}),
+            cast(null as {{ dbt.type_timestamp() }}),
+            {%- endif %}
+            cast({{ adapter_response.get('bytes_processed') if adapter_response.get('bytes_processed') is not none else 'null' }} as {{ dbt.type_bigint() }}),
+            cast({{ adapter_response.get('slot_ms') if adapter_response.get('slot_ms') is not none else 'null' }} as {{ dbt.type_bigint() }}),
+            {{ "'" ~ query_id ~ "'" if query_id else 'cast(null as ' ~ dbt.type_string() ~ ')' }},
+            {{ snowplow_utils.cast_to_tstamp(run_started_at.strftime('%Y-%m-%d %H:%M:%S')) }}
+        {% if not loop.last %}union all{% endif %}
+        {% endfor -%}
+    {%- endset -%}
+
+    {{ return(insert_query) }}
+{% endmacro %}
@@ -0,0 +1,74 @@
+{# Deduplicate the events of a query on event_id, keeping the first by collector_tstamp, for the snowplow__deduplication_strategy. The query selects the events as alias, without a qualify #}
+{% macro deduplicate_events(events_query, alias = 'a') %}
+    {%- set deduplication_strategy = var('snowplow__deduplication_strategy', 'full') -%}
+    {%- if deduplication_strategy not in ['full', 'duplicates_only', 'none'] -%}
+        {{ exceptions.raise_compiler_error("Snowplow Error: snowplow__deduplication_strategy must be one of 'full', 'duplicates_only', or 'none', got '" ~ deduplication_strategy ~ "'.") }}
+    {%- endif -%}
+    {%- set order_by = ['collector_tstamp', 'etl_tstamp'] if target.type in ['databricks', 'spark'] else ['collector_tstamp'] -%}
+    {%- if deduplication_strategy == 'none' -%}
+        {{ return(events_query) }}
+    {%- elif deduplication_strategy == 'full' or target.type == 'bigquery' -%}
+        {# BigQuery evaluates a CTE again for every reference, so duplicates_only would read the events three times and falls back to full #}
+        {{ return(events_query ~ '\nqualify row_number() over (partition by ' ~ alias ~ '.event_id order by ' ~ alias ~ '.' ~ order_by|join(', ' ~ alias ~ '.') ~ ') = 1') }}
+    {%- endif -%}
+    {# Only the events with a duplicated event_id are sorted, the rest are passed straight through. A null event_id never matches the join so is kept as unique #}
+    {%- set deduplicated_query -%}
+with events_to_deduplicate as (
+{{ events_query }}
+)
+
+, duplicate_event_ids as (
+    select
+        event_id
+    from events_to_deduplicate
+    group by event_id
+    having count(*) > 1
+)
+
+select
+    e.*
+from events_to_deduplicate as e
+left join duplicate_event_ids as d on e.event_id = d.event_id
+where d.event_id is null
+
+union all
+
+select
+    e.*
+from events_to_deduplicate as e
+inner join duplicate_event_ids as d on e.event_id = d.event_id
+qualify row_number() over (partition by e.event_id order by e.{{ order_by|join(', e.') }}) = 1
+    {%- endset -%}
+    {{ return(deduplicated_query) }}
+{% endmacro %}
+
+
+{# The events a table or view model is built from, the full history from snowplow__start_date filtered and deduplicated in the same way as the this run table #}
+{% macro tier_events(events_relation, event_names) %}
+    {{ return(adapter.dispatch('tier_events', 'snowplow_normalize')(events_relation, event_names)) }}
+{% endmacro %}
+
+{% macro default__tier_events(events_relation, event_names) %}
+{%- set events_query -%}
+    select
+        a.*
+    from {{ events_relation }} as a
+    where
+        {# Filtered to the events of the model first, so only those are deduplicated #}
+        a.event_name in ('{{ event_names|join("','") }}')
+        and a.{{ var('snowplow__session_timestamp', 'collector_tstamp') }} >= {{ snowplow_utils.cast_to_tstamp(var('snowplow__start_date')) }}
+        {% if var("snowplow__days_late_allowed") != -1 -%}
+        and a.dvce_sent_tstamp <= {{ snowplow_utils.timestamp_add('day', var("snowplow__days_late_allowed", 3), 'a.dvce_created_tstamp') }}
+        {% endif -%}
+        {% if var('snowplow__derived_tstamp_partitioned', true) and target.type == 'bigquery' -%}
+        and a.derived_tstamp >= {{ snowplow_utils.timestamp_add('hour', -1, snowplow_utils.cast_to_tstamp(var('snowplow__start_date'))) }}
+        {% endif -%}
+        and {{ snowplow_utils.app_id_filter(var("snowplow__app_id", [])) }}
+        {% if snowplow_normalize.get_dev_sample_rate() < 1 -%}
+        and {{ snowplow_normalize.dev_sample_filter('a.event_id') }}
+        {% endif -%}
+{%- endset -%}
+(
+{{ snowplow_normalize.deduplicate_events(events_query, 'a') }}
+) as tier_events
+{% endmacro %}
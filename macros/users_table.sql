@@ -35,7 +35,7 @@ select
     {% if user_cols_clean|length > 0 %}
         {%- for col, col_ind in zip(user_cols_clean, range(user_cols_clean|length)) -%} {# Loop over each context column provided #}
             {%- for key, type in zip(user_keys[col_ind], user_types[col_ind]) -%} {# Loop over the keys in each column #}
-                , {{ col }}[0]:{{ key }}::{{ type }} as {{ snowplow_normalize.snakeify_case(key) }}
+                , {{ col }}[0]:{{ key }}::{{ type }} as {{ snowplow_normalize.snakeify_case(key)|replace('.', '_') }} {# Nested keys are joined with an underscore #}
             {% endfor -%}
         {%- endfor -%}
     {%- endif %}
@@ -46,6 +46,12 @@ where
     {% if not remove_new_event_check %}
         and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
     {%- endif -%}
+    {% if var('snowplow__independent_model_windows', false) %}
+        and {{ snowplow_normalize.model_window_filter() }}
+    {%- endif -%}
+    {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+        and {{ snowplow_normalize.event_count_filter() }}
+    {%- endif -%}
 )
 
 {# Ensure only latest record is upserted into the table #}
@@ -67,14 +73,18 @@ qualify
     {% do user_cols_clean.append('_'.join(user_cols[ind].split('_')[:-2])) -%}
 {%- endfor -%}
 
-{# Replace keys with snake_case where needed #}
+{# Replace keys with snake_case where needed, nested keys are joined with an underscore for the alias #}
 {%- set user_keys_clean = [] -%}
+{%- set user_aliases = [] -%}
 {%- for ind1 in range(user_keys|length) -%}
     {%- set user_key_clean = [] -%}
+    {%- set user_alias = [] -%}
     {%- for ind2 in range(user_keys[ind1]|length) -%}
         {% do user_key_clean.append(snowplow_normalize.snakeify_case(user_keys[ind1][ind2])) -%}
+        {% do user_alias.append(snowplow_normalize.snakeify_case(user_keys[ind1][ind2])|replace('.', '_')) -%}
     {%- endfor -%}
     {% do user_keys_clean.append(user_key_clean) -%}
+    {% do user_aliases.append(user_alias) -%}
 {%- endfor -%}
 {% set user_id_field = snowplow_normalize.snakeify_case(user_id_field) %}
 
@@ -92,7 +102,7 @@ with defined_user_id as (
             {{snowplow_normalize.snakeify_case(user_id_field)}} as {{ snake_user_id }}
         {% elif user_id_sde != '' %}
         {# Coalesce the sde column for the custom user_id field  #}
-            {%- set user_id_sde_coal = snowplow_utils.combine_column_versions(
+            {%- set user_id_sde_coal = snowplow_normalize.combine_cached_column_versions(
                                         relation=ref('snowplow_normalize_base_events_this_run'),
                                         column_prefix= user_id_sde.lower(),
                                         include_field_alias = False,
@@ -102,7 +112,7 @@ with defined_user_id as (
 
         {% elif user_id_context != '' %}
         {# Coalesce the context column for the custom user_id field  #}
-            {%- set user_id_cont_coal = snowplow_utils.combine_column_versions(
+            {%- set user_id_cont_coal = snowplow_normalize.combine_cached_column_versions(
                                         relation=ref('snowplow_normalize_base_events_this_run'),
                                         column_prefix= user_id_context.lower(),
                                         include_field_alias = False,
@@ -120,11 +130,16 @@ with defined_user_id as (
         -- user column(s) from the event table
         {% if user_cols|length > 0 %}
             {%- for col, col_ind in zip(user_cols_clean, range(user_cols|length)) -%}  {# Loop over each context column, getting the coalesced version#}
-                {%- set user_cols_list = snowplow_utils.combine_column_versions(
+                {%- set col_types = user_types[col_ind] if user_types|length > col_ind else [] -%}
+                {%- set required_fields = [] -%}
+                {%- for i in range(user_keys_clean[col_ind]|length) -%}
+                    {%- do required_fields.append((user_keys_clean[col_ind][i], user_aliases[col_ind][i], col_types[i] if col_types|length > i else none)) -%}
+                {%- endfor -%}
+                {%- set user_cols_list = snowplow_normalize.combine_cached_column_versions(
                                             relation=ref('snowplow_normalize_base_events_this_run'),
                                             column_prefix=col.lower(),
                                             include_field_alias = True,
-                                            required_fields = user_keys_clean[col_ind]
+                                            required_fields = required_fields
                                             ) -%}
                 {% for field in user_cols_list %} {# Loop over each field in the column, alias provided by macro #}
                     , {{field}}
@@ -138,6 +153,12 @@ with defined_user_id as (
         {% if not remove_new_event_check %}
             and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
         {%- endif -%}
+        {% if var('snowplow__independent_model_windows', false) %}
+            and {{ snowplow_normalize.model_window_filter() }}
+        {%- endif -%}
+        {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+            and {{ snowplow_normalize.event_count_filter() }}
+        {%- endif -%}
 ),
 
 {# Order data to get the latest data having rn = 1 #}
@@ -207,8 +228,9 @@ with defined_user_id as (
         -- user column(s) from the event table
         {% if user_cols_clean|length > 0 %}
             {%- for col, col_ind in zip(user_cols_clean, range(user_cols_clean|length)) -%} {# Loop over each context column provided #}
+                {%- set col_types = user_types[col_ind] if user_types|length > col_ind else [] -%}
                 {%- for key in user_keys_clean[col_ind] -%} {# Loop over the keys in each column #}
-                    , {{ col }}[0].{{ key }} as {{ key }}
+                    , {{ snowplow_normalize.cast_field(col ~ '[0].' ~ key, col_types[loop.index0] if col_types|length > loop.index0 else none) }} as {{ key|replace('.', '_') }}
                 {% endfor -%}
             {%- endfor -%}
         {%- endif %}
@@ -219,6 +241,12 @@ with defined_user_id as (
         {% if not remove_new_event_check %}
             and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
         {%- endif -%}
+        {% if var('snowplow__independent_model_windows', false) %}
+            and {{ snowplow_normalize.model_window_filter() }}
+        {%- endif -%}
+        {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+            and {{ snowplow_normalize.event_count_filter() }}
+        {%- endif -%}
 
 ),
 
@@ -241,3 +269,89 @@ from
 where
     rn = 1
 {% endmacro %}
+
+{% macro duckdb__users_table(user_id_field = 'user_id', user_id_sde = '', user_id_context = '', user_cols = [], user_keys = [], user_types = [], user_id_alias = 'user_id', flat_cols = [], remove_new_event_check = false) %}
+{# DuckDB events are read with the same shape as Databricks, a struct column per major version, drop 2 last _X values #}
+{%- set user_cols_clean = [] -%}
+{%- for ind in range(user_cols|length) -%}
+    {% do user_cols_clean.append('_'.join(user_cols[ind].split('_')[:-2])) -%}
+{%- endfor -%}
+
+{# Replace keys with snake_case where needed #}
+{%- set user_keys_clean = [] -%}
+{%- for ind1 in range(user_keys|length) -%}
+    {%- set user_key_clean = [] -%}
+    {%- for ind2 in range(user_keys[ind1]|length) -%}
+        {% do user_key_clean.append(snowplow_normalize.snakeify_case(user_keys[ind1][ind2])) -%}
+    {%- endfor -%}
+    {% do user_keys_clean.append(user_key_clean) -%}
+{%- endfor -%}
+{% set user_id_field = snowplow_normalize.snakeify_case(user_id_field) %}
+
+{# Raise a warining if both sde and context are provided as we only use one #}
+{%- if user_id_sde != '' and user_id_context != '' -%}
+{% do exceptions.warn("Snowplow: Both a user_id sde column and context column provided, only the sde column will be used.") %}
+{%- endif -%}
+
+{%- set snake_user_id =  snowplow_normalize.snakeify_case(user_id_alias) -%}
+
+with defined_user_id as (
+    select
+        {% if user_id_sde == '' and user_id_context == ''%}
+            {{ user_id_field }} as {{ snake_user_id }}
+        {% elif user_id_sde != '' %}
+            {{ '_'.join(user_id_sde.split('_')[:-2]) }}.{{ user_id_field }} as {{ snake_user_id }}
+        {% elif user_id_context != '' %}
+            {{ '_'.join(user_id_context.split('_')[:-2]) }}[1].{{ user_id_field }} as {{ snake_user_id }}
+        {%- endif %}
+        , collector_tstamp as latest_collector_tstamp
+        -- Flat columns from event table
+        {% if flat_cols|length > 0 %}
+            {%- for col in flat_cols -%}
+                , {{ col }}
+            {% endfor -%}
+        {%- endif -%}
+        -- user column(s) from the event table
+        {% if user_cols_clean|length > 0 %}
+            {%- for col, col_ind in zip(user_cols_clean, range(user_cols_clean|length)) -%} {# Loop over each context column provided, DuckDB lists are 1-indexed #}
+                {%- set col_types = user_types[col_ind] if user_types|length > col_ind else [] -%}
+                {%- for key in user_keys_clean[col_ind] -%} {# Loop over the keys in each column #}
+                    , {{ snowplow_normalize.cast_field(col ~ '[1].' ~ key, col_types[loop.index0] if col_types|length > loop.index0 else none) }} as {{ key|replace('.', '_') }}
+                {% endfor -%}
+            {%- endfor -%}
+        {%- endif %}
+    from
+        {{ ref('snowplow_normalize_base_events_this_run') }}
+    where
+        1 = 1
+        {% if not remove_new_event_check %}
+            and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+        {%- endif -%}
+        {% if var('snowplow__independent_model_windows', false) %}
+            and {{ snowplow_normalize.model_window_filter() }}
+        {%- endif -%}
+        {% if var('snowplow__skip_empty_models', false) and not remove_new_event_check %}
+            and {{ snowplow_normalize.event_count_filter() }}
+        {%- endif -%}
+
+),
+
+{# Order data to get the latest data having rn = 1 #}
+users_ordering as (
+select
+    a.*
+    , row_number() over (partition by {{ snake_user_id }} order by latest_collector_tstamp desc) as rn
+from
+    defined_user_id a
+where
+    {{ snake_user_id }} is not null
+)
+
+{# Ensure only latest record is upserted into the table #}
+select
+    * exclude (rn)
+from
+    users_ordering
+where
+    rn = 1
+{% endmacro %}
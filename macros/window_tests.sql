@@ -0,0 +1,39 @@
+{# Limit a test to the rows from the lower limit of the last run, so the cost of a test scales with the new events rather than the size of the table #}
+{% macro test_window_filter(tstamp_column = 'collector_tstamp') %}
+    {# The ref is outside the execute check so dbt records the dependency when parsing #}
+    {%- set limits_relation = ref('snowplow_normalize_base_new_event_limits') -%}
+    {%- if not execute or var('snowplow__test_full_history', false) -%}
+        {{ return('1 = 1') }}
+    {%- endif -%}
+    {%- set lower_limit, upper_limit = snowplow_utils.return_limits_from_model(limits_relation, 'lower_limit', 'upper_limit') -%}
+    {{ return(tstamp_column ~ ' >= ' ~ snowplow_utils.timestamp_add('day', -var('snowplow__test_lookback_days', 0), lower_limit)) }}
+{% endmacro %}
+
+
+{# Unique on a column, ignoring nulls as the dbt unique test does, or on a combination of columns #}
+{% test window_unique(model, column_name = none, combination_of_columns = none, tstamp_column = 'collector_tstamp') %}
+{%- set columns = combination_of_columns or [column_name] -%}
+select
+    {{ columns|join(', ') }}
+    , count(*) as n_rows
+from
+    {{ model }}
+where
+    {{ snowplow_normalize.test_window_filter(tstamp_column) }}
+    {%- if combination_of_columns is none %}
+    and {{ column_name }} is not null
+    {%- endif %}
+group by {{ columns|join(', ') }}
+having count(*) > 1
+{% endtest %}
+
+
+{% test window_not_null(model, column_name, tstamp_column = 'collector_tstamp') %}
+select
+    {{ column_name }}
+from
+    {{ model }}
+where
+    {{ snowplow_normalize.test_window_filter(tstamp_column) }}
+    and {{ column_name }} is null
+{% endtest %}
@@ -0,0 +1,12 @@
+{{
+  config(
+    materialized='incremental',
+    full_refresh=snowplow_normalize.allow_refresh(),
+    enabled=var('snowplow__enable_run_metrics', false)
+  )
+}}
+
+-- Boilerplate to generate table.
+-- Table updated as part of end-run hook
+
+{{ snowplow_normalize.base_create_run_metrics() }}
@@ -0,0 +1,17 @@
+{{
+  config(
+    tags=["this_run"],
+    enabled=var('snowplow__skip_empty_models', false)
+  )
+}}
+{% call set_sql_header(config) -%}
+{{ snowplow_normalize.set_query_tag() }}
+{%- endcall %}
+
+select
+    event_name,
+    count(*) as n_events
+
+from {{ ref('snowplow_normalize_base_events_this_run') }}
+
+group by event_name
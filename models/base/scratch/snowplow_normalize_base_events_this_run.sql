@@ -1,16 +1,23 @@
 {{
   config(
     tags=["this_run"],
-    sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt'))
+    materialized=var('snowplow__this_run_materialization', 'table')
   )
 }}
+{% call set_sql_header(config) -%}
+{{ snowplow_normalize.set_query_tag() }}
+{%- endcall %}
 
 {%- set lower_limit, upper_limit, session_start_limit = snowplow_utils.return_base_new_event_limits(ref('snowplow_normalize_base_new_event_limits')) %}
+{%- if var('snowplow__this_run_materialization', 'table') not in ['table', 'view'] -%}
+  {{ exceptions.raise_compiler_error("Snowplow Error: snowplow__this_run_materialization must be one of 'table' or 'view', got '" ~ var('snowplow__this_run_materialization') ~ "'. The on-run-end manifest update reads this model, so it cannot be ephemeral.") }}
+{%- endif %}
 
+{%- set events_query %}
 select
     a.*
 
-from {{ var('snowplow__events') }} as a
+from {{ snowplow_normalize.dev_tablesample(var('snowplow__events'), 'a') }}
 
 where
   {# dvce_sent_tstamp is an optional field and not all trackers/webhooks populate it, this means this filter needs to be optional #}
@@ -26,5 +33,12 @@ where
     and a.derived_tstamp <= {{ upper_limit }}
   {% endif %}
   and {{ snowplow_utils.app_id_filter(var("snowplow__app_id",[])) }}
+  {% if snowplow_normalize.get_dev_sample_rate() < 1 %}
+    and {{ snowplow_normalize.dev_sample_filter('a.event_id') }}
+  {% endif %}
+  {% if snowplow_normalize.is_empty_run() %}
+    and 1 = 0
+  {% endif %}
+{%- endset %}
 
-qualify row_number() over (partition by a.event_id order by a.collector_tstamp{% if target.type in ['databricks', 'spark'] -%}, a.etl_tstamp {%- endif %}) = 1
+{{ snowplow_normalize.deduplicate_events(events_query, 'a') }}
@@ -1,10 +1,23 @@
 {{ config(
-   post_hook=["{{snowplow_utils.print_run_limits(this)}}"],
-   sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt'))
+   post_hook=["{{snowplow_utils.print_run_limits(this)}}"]
    )
 }}
+{% call set_sql_header(config) -%}
+{{ snowplow_normalize.set_query_tag() }}
+{%- endcall %}
 
 
+{%- if var('snowplow__backfill_limits', {}) -%}
+
+{# Limits set explicitly for a single chunk by the backfill driver, see utils/snowplow_normalize_backfill.py #}
+{%- set limits_query -%}
+select
+    {{ snowplow_utils.cast_to_tstamp(var('snowplow__backfill_limits')['lower_limit']) }} as lower_limit,
+    {{ snowplow_utils.cast_to_tstamp(var('snowplow__backfill_limits')['upper_limit']) }} as upper_limit
+{%- endset -%}
+
+{%- else -%}
+
 {%- set models_in_run = snowplow_utils.get_enabled_snowplow_models('snowplow_normalize') -%}
 
 {% set min_last_success,
@@ -21,4 +34,41 @@
                                                          var("snowplow__start_date","2020-01-01")) -%}
 
 
-{{ run_limits_query }}
+{%- set dev_max_window_hours = snowplow_utils.get_value_by_target(
+                                    dev_value=var('snowplow__dev_sample_max_window_hours', -1),
+                                    default_value=-1,
+                                    dev_target_name=var('snowplow__dev_target_name')
+                                    ) %}
+
+{% if dev_max_window_hours != -1 -%}
+
+{# Cap the window of dev runs, the manifest is only moved forward as far as the events processed #}
+{%- set limits_query -%}
+select
+    lower_limit,
+    least(upper_limit, {{ snowplow_utils.timestamp_add('hour', dev_max_window_hours, 'lower_limit') }}) as upper_limit
+from ({{ run_limits_query }}) as run_limits
+{%- endset -%}
+
+{%- else %}
+
+{%- set limits_query = run_limits_query -%}
+
+{%- endif %}
+
+{%- endif %}
+
+{% if var('snowplow__skip_empty_models', false) -%}
+
+{# Flag a run with no events in its window, so the this run table and every model skip reading the events #}
+select
+    run_limits.lower_limit,
+    run_limits.upper_limit,
+    {{ snowplow_normalize.run_has_events(limits_query) }} as has_events
+from ({{ limits_query }}) as run_limits
+
+{%- else %}
+
+{{ limits_query }}
+
+{%- endif %}
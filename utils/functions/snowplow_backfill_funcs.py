@@ -0,0 +1,277 @@
+from datetime import datetime, timedelta
+from typing import Union
+import subprocess
+import argparse
+import json
+import os
+import re
+
+verboseprint = lambda *a, **k: None
+
+def parse_date(date_str: str) -> datetime:
+    """Parse a date or timestamp string from the command line or the manifest
+
+    Args:
+        date_str (str): A date (YYYY-MM-DD) or timestamp (YYYY-MM-DD HH:MM:SS[.ffffff]) string, optionally with a timezone
+
+    Raises:
+        ValueError: If the string is not in a recognised format
+
+    Returns:
+        datetime: The parsed (timezone naive) datetime
+    """
+    # Manifest values can come back with a timezone or a T separator depending on the warehouse
+    cleaned = re.sub(r'([+-]\d{2}:?\d{2}|Z| UTC)$', '', date_str.strip()).replace('T', ' ')
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(cleaned, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f'Unable to parse date {date_str}, expected YYYY-MM-DD or YYYY-MM-DD HH:MM:SS.')
+
+def format_tstamp(tstamp: datetime) -> str:
+    """Format a datetime as a timestamp literal for the run limits
+
+    Args:
+        tstamp (datetime): The timestamp to format
+
+    Returns:
+        str: The timestamp in YYYY-MM-DD HH:MM:SS.ffffff format
+    """
+    return tstamp.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def plan_chunks(start: datetime, end: datetime, chunk_days: int) -> list:
+    """Split a date range into chunks of limits to process
+
+    The run limits are inclusive at both ends, so each upper limit is set 1 microsecond before the next chunk's lower limit to make sure no event is processed by two chunks.
+
+    Args:
+        start (datetime): Start of the range to backfill (inclusive)
+        end (datetime): End of the range to backfill (exclusive)
+        chunk_days (int): Number of days to process in each chunk
+
+    Raises:
+        ValueError: If chunk_days is less than 1
+
+    Returns:
+        list: List of (lower_limit, upper_limit) datetime tuples, in order
+    """
+    if chunk_days < 1:
+        raise ValueError('chunk_days must be at least 1.')
+    chunks = []
+    lower = start
+    while lower < end:
+        next_lower = min(lower + timedelta(days=chunk_days), end)
+        chunks.append((lower, next_lower - timedelta(microseconds=1)))
+        lower = next_lower
+    return chunks
+
+def contiguous_watermark(chunks: list, completed: set) -> Union[datetime, None]:
+    """Get the upper limit of the longest run of completed chunks from the start of the backfill
+
+    Chunks can finish out of order when run in parallel, so only the contiguous prefix is safe to record in the manifest.
+
+    Args:
+        chunks (list): List of (lower_limit, upper_limit) tuples, as returned by plan_chunks
+        completed (set): Set of indexes of the chunks that have completed successfully
+
+    Returns:
+        Union[datetime, None]: The upper limit of the last contiguous completed chunk, None if the first chunk has not completed
+    """
+    watermark = None
+    for i, (_, upper) in enumerate(chunks):
+        if i not in completed:
+            break
+        watermark = upper
+    return watermark
+
+def get_resume_start(start: datetime, status: dict, force: bool = False) -> datetime:
+    """Get the point to (re)start the backfill from, based on the manifest status of the models
+
+    Args:
+        start (datetime): The requested start of the backfill
+        status (dict): Dictionary of model name to last_success (datetime or None) from the manifest
+        force (bool, optional): Re-process from the requested start even where the manifest shows it as processed, e.g. to populate new columns. Defaults to False.
+
+    Returns:
+        datetime: The later of the requested start and the earliest last_success of the models (just after it, as it has already been processed), or the requested start if forced
+    """
+    last_successes = [val for val in status.values()]
+    if force or len(last_successes) == 0 or None in last_successes:
+        return start
+    return max(start, min(last_successes) + timedelta(microseconds=1))
+
+def build_run_command(dbt: str, models: list, chunk: tuple, slot: int, target: str = None, extra_args: list = None, event_counts: bool = False) -> list:
+    """Build the dbt command to process a single chunk
+
+    Args:
+        dbt (str): The dbt executable to use
+        models (list): List of the normalize models to backfill
+        chunk (tuple): The (lower_limit, upper_limit) of the chunk
+        slot (int): The worker slot the chunk is running in, used to keep the scratch tables and target path of parallel chunks apart
+        target (str, optional): The dbt target to run against. Defaults to None.
+        extra_args (list, optional): Any extra arguments to pass to dbt. Defaults to None.
+        event_counts (bool, optional): Also rebuild the event counts of the chunk, needed when snowplow__skip_empty_models is enabled so models don't skip on the counts of the previous chunk. Defaults to False.
+
+    Returns:
+        list: The command as a list of arguments
+    """
+    backfill_vars = {
+        'snowplow__backfill_limits': {
+            'lower_limit': format_tstamp(chunk[0]),
+            'upper_limit': format_tstamp(chunk[1])
+        },
+        'snowplow__backfill_schema_suffix': f'_backfill_{slot}'
+    }
+    command = [dbt, 'run',
+               '--select', 'snowplow_normalize_base_new_event_limits', 'snowplow_normalize_base_events_this_run', *(['snowplow_normalize_base_event_counts_this_run'] if event_counts else []), *models,
+               '--vars', json.dumps(backfill_vars),
+               '--target-path', os.path.join('target', f'backfill_{slot}')]
+    if target is not None:
+        command.extend(['--target', target])
+    return command + (extra_args or [])
+
+def build_operation_command(dbt: str, macro: str, macro_args: dict, target: str = None) -> list:
+    """Build the dbt command to call one of the backfill run-operations
+
+    Args:
+        dbt (str): The dbt executable to use
+        macro (str): The name of the macro in the snowplow_normalize package
+        macro_args (dict): Arguments to pass to the macro
+        target (str, optional): The dbt target to run against. Defaults to None.
+
+    Returns:
+        list: The command as a list of arguments
+    """
+    command = [dbt, 'run-operation', 'snowplow_normalize.' + macro, '--args', json.dumps(macro_args)]
+    if target is not None:
+        command.extend(['--target', target])
+    return command
+
+def parse_status_output(output: str) -> dict:
+    """Parse the manifest status from the output of the get_backfill_status run-operation
+
+    Args:
+        output (str): The stdout of the run-operation
+
+    Raises:
+        ValueError: If the status line cannot be found in the output
+
+    Returns:
+        dict: Dictionary of model name to last_success (datetime or None)
+    """
+    for line in output.splitlines():
+        if 'SNOWPLOW_BACKFILL_STATUS: ' in line:
+            status = json.loads(line.split('SNOWPLOW_BACKFILL_STATUS: ', 1)[1])
+            return {model: parse_date(last_success) if last_success is not None else None for model, last_success in status.items()}
+    raise ValueError('Unable to find the backfill status in the dbt output, check the run-operation succeeded.')
+
+def parse_missing_output(output: str) -> list:
+    """Parse the models without a table from the output of the get_backfill_status run-operation
+
+    Args:
+        output (str): The stdout of the run-operation
+
+    Returns:
+        list: The names of the models that don't have a table yet, empty if the line cannot be found in the output
+    """
+    for line in output.splitlines():
+        if 'SNOWPLOW_BACKFILL_MISSING: ' in line:
+            return json.loads(line.split('SNOWPLOW_BACKFILL_MISSING: ', 1)[1])
+    return []
+
+def parse_counts_output(output: str) -> bool:
+    """Parse whether the event counts model is enabled from the output of the get_backfill_status run-operation
+
+    Args:
+        output (str): The stdout of the run-operation
+
+    Returns:
+        bool: True if snowplow__skip_empty_models is enabled so the counts model needs to run in each chunk, False if the line cannot be found in the output
+    """
+    for line in output.splitlines():
+        if 'SNOWPLOW_BACKFILL_COUNTS: ' in line:
+            return json.loads(line.split('SNOWPLOW_BACKFILL_COUNTS: ', 1)[1])
+    return False
+
+def is_concurrent_update_error(output: str) -> bool:
+    """Check if a failed chunk failed because another chunk was writing to the same table at the same time, and so can be retried
+
+    Args:
+        output (str): The stdout of the dbt run of the chunk
+
+    Returns:
+        bool: True if the output contains a concurrent update error of BigQuery, Databricks, Snowflake, or DuckDB
+    """
+    patterns = [
+        r'Could not serialize access to table .* due to concurrent update',
+        r'Concurrent\w*Exception',
+        r'number of waiters for this lock exceeds',
+        r'Transaction conflict',
+        r'Could not set lock on file'
+    ]
+    return any(re.search(pattern, output) for pattern in patterns)
+
+def parse_run_results(path: str) -> tuple:
+    """Summarise a dbt run_results.json file
+
+    Args:
+        path (str): Path to the run_results.json file
+
+    Returns:
+        tuple: The total rows affected (int), total execution time of the nodes (float), and a list of the names of nodes that did not succeed
+    """
+    with open(path, 'r') as f:
+        run_results = json.load(f)
+    rows = 0
+    execution_time = 0.0
+    failures = []
+    for result in run_results.get('results', []):
+        rows += (result.get('adapter_response') or {}).get('rows_affected') or 0
+        execution_time += result.get('execution_time') or 0.0
+        if result.get('status') != 'success':
+            failures.append(result.get('unique_id'))
+    return (rows, execution_time, failures)
+
+def format_throughput(chunk: tuple, elapsed: float, rows: int) -> str:
+    """Format the throughput report line for a completed chunk
+
+    Args:
+        chunk (tuple): The (lower_limit, upper_limit) of the chunk
+        elapsed (float): Wall clock seconds taken by the chunk
+        rows (int): Total rows affected across the models in the chunk
+
+    Returns:
+        str: A single line summary of the chunk
+    """
+    days = (chunk[1] - chunk[0]).total_seconds() / 86400
+    rows_per_sec = rows / elapsed if elapsed > 0 else 0
+    days_per_hour = days / elapsed * 3600 if elapsed > 0 else 0
+    return f'{format_tstamp(chunk[0])[:19]} -> {format_tstamp(chunk[1])[:19]}: {elapsed:.1f}s, {rows} rows ({rows_per_sec:.0f} rows/s, {days_per_hour:.1f} days/hour)'
+
+def run_command(command: list) -> subprocess.CompletedProcess:
+    """Run a command, capturing the output
+
+    Args:
+        command (list): The command as a list of arguments
+
+    Returns:
+        subprocess.CompletedProcess: The completed process
+    """
+    verboseprint(f'Running {" ".join(command)}')
+    return subprocess.run(command, capture_output=True, text=True)
+
+def parse_args(args: list):
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter, description = 'Backfill normalize models over a date range in chunks, optionally in parallel, recording progress in the incremental manifest')
+    parser.add_argument('--select', dest = 'models', nargs = '+', required = True, help = 'the normalize model(s) to backfill')
+    parser.add_argument('--start', dest = 'start', required = True, help = 'start date of the backfill (inclusive), YYYY-MM-DD')
+    parser.add_argument('--end', dest = 'end', required = True, help = 'end date of the backfill (exclusive), YYYY-MM-DD')
+    parser.add_argument('--chunkDays', dest = 'chunkDays', type = int, default = 7, help = 'number of days to process in each chunk, default 7')
+    parser.add_argument('--workers', dest = 'workers', type = int, default = 1, help = 'number of chunks to run at once, default 1. Only use more than 1 for models\nkeyed on the event (not the users table) as chunks may finish out of order')
+    parser.add_argument('--retries', dest = 'retries', type = int, default = 3, help = 'number of times to retry a chunk that failed on a concurrent update of the same table\nby another chunk, one chunk at a time, default 3')
+    parser.add_argument('--force', dest = 'force', action = 'store_true', default = False, help = 're-process the whole range even where the manifest shows it as processed, e.g. to populate\nnew columns of existing models. The manifest is never moved backwards, so a forced\nbackfill cannot be resumed, re-run it with a later --start instead')
+    parser.add_argument('--target', dest = 'target', default = None, help = 'dbt target to run against, default is the default target of your profile')
+    parser.add_argument('--dbt', dest = 'dbt', default = 'dbt', help = 'dbt executable to use, default dbt')
+    parser.add_argument('-v', '--verbose', dest = 'verbose', action = 'store_true', default = False, help = 'verbose flag for the running of the tool')
+    parser.add_argument('--dryRun', dest = 'dryRun', action = 'store_true', default = False, help = 'flag for a dry run (prints the chunks and commands only)')
+    return parser.parse_args(args)
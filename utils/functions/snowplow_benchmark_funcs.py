@@ -0,0 +1,256 @@
+from types import SimpleNamespace
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from .snowplow_model_gen_funcs import snakeify_case
+
+verboseprint = lambda *a, **k: None
+
+class MacroReturn(Exception):
+    """Raised by the return function of a macro, as dbt does, to return a value instead of the rendered text"""
+    def __init__(self, value):
+        self.value = value
+
+def macro_return(value):
+    raise MacroReturn(value)
+
+def wrap_macro(macro):
+    """Wrap a jinja macro so a call to return gives the returned value
+
+    Args:
+        macro (jinja2.runtime.Macro): The macro to wrap
+
+    Returns:
+        function: The wrapped macro
+    """
+    def call(*args, **kwargs):
+        try:
+            return macro(*args, **kwargs)
+        except MacroReturn as returned:
+            return returned.value
+    return call
+
+class Namespace:
+    """A package of macros, looked up by name, e.g. snowplow_normalize.snakeify_case"""
+    def __init__(self, macros: dict):
+        self.macros = macros
+
+    def __getattr__(self, name):
+        return self.macros[name]
+
+class Placeholder:
+    """A package of macros that are not loaded, every macro returns a placeholder of the call so the output size is still realistic"""
+    def __init__(self, package: str, overrides: dict = None):
+        self.package = package
+        self.overrides = overrides or {}
+
+    def __getattr__(self, name):
+        if name in self.overrides:
+            return self.overrides[name]
+        return lambda *args, **kwargs: f'{self.package}.{name}()'
+
+class Adapter:
+    """The parts of the dbt adapter used by the macros, dispatching to the macro of the warehouse and returning fixed columns for every relation"""
+    def __init__(self, macros: dict, warehouse: str, columns: list):
+        self.macros = macros
+        self.columns = columns
+        # Databricks falls back to spark macros, as dbt does
+        self.prefixes = [warehouse, 'spark', 'default'] if warehouse == 'databricks' else [warehouse, 'default']
+        self.introspections = 0
+
+    def dispatch(self, macro_name: str, macro_namespace: str = None):
+        for prefix in self.prefixes:
+            if f'{prefix}__{macro_name}' in self.macros:
+                return self.macros[f'{prefix}__{macro_name}']
+        raise KeyError(f'No implementation of {macro_name} for {self.prefixes[0]}')
+
+    def get_columns_in_relation(self, relation):
+        self.introspections += 1
+        return self.columns
+
+    def quote(self, identifier: str) -> str:
+        return f'"{identifier}"'
+
+def load_macros(macros_path: str, environment) -> dict:
+    """Load all macros of the package into a dictionary of callables
+
+    Args:
+        macros_path (str): Path to the macros folder
+        environment (jinja2.Environment): The environment to compile the macros in, its globals must already reference the returned dictionary
+
+    Returns:
+        dict: The wrapped macros, keyed by name
+    """
+    import jinja2
+    macros = {}
+    for path in sorted(glob.glob(os.path.join(macros_path, '**', '*.sql'), recursive = True)):
+        with open(path, 'r') as f:
+            source = f.read()
+        # Generic tests are macros named test_<name> to dbt, plain jinja does not know the test block
+        source = re.sub(r'{%(-?)\s*test\s+', r'{%\1 macro test_', source)
+        source = re.sub(r'{%(-?)\s*endtest\s*(-?)%}', r'{%\1 endmacro \2%}', source)
+        module = environment.from_string(source).module
+        for name in dir(module):
+            if isinstance(getattr(module, name), jinja2.runtime.Macro):
+                macros[name] = wrap_macro(getattr(module, name))
+    return macros
+
+def build_environment(macros_path: str, warehouse: str, columns: list = None) -> tuple:
+    """Build a minimal jinja environment with the package macros, stubbing the dbt context they use
+
+    Args:
+        macros_path (str): Path to the macros folder
+        warehouse (str): The target type to dispatch to, one of snowflake, bigquery, databricks, or duckdb
+        columns (list, optional): The columns returned for any relation, only read by the BigQuery macros. Defaults to None.
+
+    Returns:
+        tuple: The macros (dict), keyed by name, and the adapter stub (Adapter)
+    """
+    try:
+        import jinja2
+    except ImportError:
+        raise ImportError('The jinja2 python package is required to run the benchmark, it is installed with dbt or with "pip install jinja2".')
+    environment = jinja2.Environment(extensions = ['jinja2.ext.do', 'jinja2.ext.loopcontrols'])
+    macros = {}
+    adapter = Adapter(macros, warehouse, columns or [])
+
+    def run_query(sql):
+        raise RuntimeError('The benchmark only measures compilation, a macro ran a query with the default vars.')
+
+    def raise_compiler_error(msg):
+        raise RuntimeError(msg)
+
+    environment.globals.update({
+        'return': macro_return,
+        'adapter': adapter,
+        'var': lambda name, default = None: default,
+        'ref': lambda name: f'bench_scratch.{name}',
+        'source': lambda source_name, table_name: f'{source_name}.{table_name}',
+        'target': SimpleNamespace(type = warehouse, name = 'bench', schema = 'bench', database = 'bench', project = 'bench', dataset = 'bench'),
+        'snowplow_normalize': Namespace(macros),
+        'snowplow_utils': Placeholder('snowplow_utils', {
+            'get_value_by_target': lambda dev_value = None, default_value = None, dev_target_name = 'dev': default_value,
+            'get_value_by_target_type': lambda **kwargs: kwargs.get(warehouse + '_val')
+        }),
+        'dbt': Placeholder('dbt'),
+        'modules': SimpleNamespace(re = re),
+        'exceptions': SimpleNamespace(warn = lambda msg: '', raise_compiler_error = raise_compiler_error),
+        'execute': True,
+        'is_incremental': lambda: False,
+        'run_query': run_query,
+        'graph': {'nodes': {}},
+        'model': SimpleNamespace(name = 'bench_model'),
+        'this': 'bench.bench_model',
+        'invocation_id': 'bench',
+        'log': lambda *args, **kwargs: '',
+        'print': lambda *args, **kwargs: '',
+        'tojson': json.dumps,
+        'fromjson': json.loads,
+        'zip': zip
+    })
+    macros.update(load_macros(macros_path, environment))
+    return (macros, adapter)
+
+def camel_key(name: str, ind: int) -> str:
+    """A camel case key, so the snakeify_case macro has work to do"""
+    return f'{name}Key{ind}Value'
+
+def synthetic_model_inputs(model_ind: int, n_schemas: int, n_keys: int) -> dict:
+    """Get the arguments to normalize_events for a synthetic model, with 1 self describing event and the rest shared contexts
+
+    Args:
+        model_ind (int): The number of the model, used to name its event and self describing event
+        n_schemas (int): The number of schemas, the self describing event and n_schemas - 1 contexts
+        n_keys (int): The number of keys in each schema
+
+    Returns:
+        dict: The keyword arguments for normalize_events
+    """
+    key_types = ['string', 'integer', 'boolean', 'number', 'string']
+    context_names = [f'bench_context_{ind}' for ind in range(n_schemas - 1)]
+    return {
+        'event_names': [f'bench_event_{model_ind}'],
+        'flat_cols': ['app_id', 'platform'],
+        'sde_cols': [f'UNSTRUCT_EVENT_COM_ACME_BENCH_EVENT_{model_ind}_1_0_0'],
+        'sde_keys': [[camel_key('event', ind) for ind in range(n_keys)]],
+        'sde_types': [[key_types[ind % len(key_types)] for ind in range(n_keys)]],
+        'sde_aliases': [],
+        'context_cols': [f'CONTEXTS_COM_ACME_{name.upper()}_1_0_0' for name in context_names],
+        'context_keys': [[camel_key('context', ind) for ind in range(n_keys)] for name in context_names],
+        'context_types': [[key_types[ind % len(key_types)] for ind in range(n_keys)] for name in context_names],
+        'context_aliases': context_names
+    }
+
+def synthetic_columns(model_inputs: list) -> list:
+    """Get the BigQuery columns of the events this run table for the synthetic models, a struct (repeated for contexts) per schema with a field per key
+
+    Args:
+        model_inputs (list): The inputs of each model, as returned by synthetic_model_inputs
+
+    Returns:
+        list: The columns, with the name, mode, data_type, and fields that BigQuery columns have
+    """
+    columns = {}
+    for inputs in model_inputs:
+        for col, keys in zip(inputs['sde_cols'] + inputs['context_cols'], inputs['sde_keys'] + inputs['context_keys']):
+            fields = [SimpleNamespace(name = snakeify_case(key), mode = 'NULLABLE', data_type = 'STRING', fields = []) for key in keys]
+            columns[col.lower()] = SimpleNamespace(name = col.lower(), mode = 'REPEATED' if col.startswith('CONTEXTS_') else 'NULLABLE', data_type = 'RECORD', fields = fields)
+    return list(columns.values())
+
+def benchmark_scenario(macros_path: str, warehouse: str, n_models: int, n_schemas: int, n_keys: int) -> list:
+    """Render the macros for one scenario, as a single dbt compile of n_models event models, the users table, and snakeify_case of every key
+
+    Args:
+        macros_path (str): Path to the macros folder
+        warehouse (str): The target type to render for
+        n_models (int): The number of event models
+        n_schemas (int): The number of schemas in each model
+        n_keys (int): The number of keys in each schema
+
+    Returns:
+        list: A result per macro, with the render time in seconds and the output size in characters
+    """
+    model_inputs = [synthetic_model_inputs(ind, n_schemas, n_keys) for ind in range(n_models)]
+    load_start = time.perf_counter()
+    macros, adapter = build_environment(macros_path, warehouse, synthetic_columns(model_inputs))
+    scenario = {'warehouse': warehouse, 'models': n_models, 'schemas': n_schemas, 'keys': n_keys}
+    results = [{**scenario, 'macro': 'load_macros', 'seconds': time.perf_counter() - load_start, 'chars': 0}]
+
+    renders = [
+        ('normalize_events', lambda: [macros['normalize_events'](**inputs) for inputs in model_inputs]),
+        ('users_table', lambda: [macros['users_table']('user_id', '', '', model_inputs[0]['context_cols'], model_inputs[0]['context_keys'], model_inputs[0]['context_types'], 'user_id', ['app_id'])]),
+        ('snakeify_case', lambda: [macros['snakeify_case'](key) for inputs in model_inputs for col_keys in inputs['sde_keys'] + inputs['context_keys'] for key in col_keys])
+    ]
+    for macro, render in renders:
+        verboseprint(f'Rendering {macro} for {warehouse}, {n_models} models of {n_schemas} schemas of {n_keys} keys...')
+        render_start = time.perf_counter()
+        outputs = render()
+        results.append({**scenario, 'macro': macro, 'seconds': time.perf_counter() - render_start, 'chars': sum([len(str(output)) for output in outputs])})
+    return results
+
+def format_results(results: list) -> str:
+    """Format the benchmark results as a table
+
+    Args:
+        results (list): The results, as returned by benchmark_scenario
+
+    Returns:
+        str: The results table, one row per warehouse, scenario, and macro
+    """
+    header = f"{'warehouse':<11}{'models':>7}{'schemas':>8}{'keys':>6}  {'macro':<17}{'seconds':>10}{'chars':>12}"
+    rows = [f"{result['warehouse']:<11}{result['models']:>7}{result['schemas']:>8}{result['keys']:>6}  {result['macro']:<17}{result['seconds']:>10.3f}{result['chars']:>12}" for result in results]
+    return '\n'.join([header, '-' * len(header)] + rows)
+
+def parse_args(args: list):
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter, description = 'Measure the compile time of the normalize macros, rendering them with synthetic models in a minimal jinja environment without dbt or a warehouse')
+    parser.add_argument('--warehouses', dest = 'warehouses', nargs = '+', default = ['snowflake', 'bigquery', 'databricks', 'duckdb'], help = 'target types to render for, default snowflake bigquery databricks duckdb')
+    parser.add_argument('--models', dest = 'models', type = int, nargs = '+', default = [10, 100], help = 'numbers of event models to render, default 10 100')
+    parser.add_argument('--schemas', dest = 'schemas', type = int, nargs = '+', default = [1, 5], help = 'numbers of schemas (1 self describing event, the rest contexts) per model, default 1 5')
+    parser.add_argument('--keys', dest = 'keys', type = int, nargs = '+', default = [10, 100], help = 'numbers of keys per schema, default 10 100')
+    parser.add_argument('--macrosPath', dest = 'macrosPath', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'macros'), help = 'path to the macros folder, default the macros of this package')
+    parser.add_argument('--output', dest = 'output', default = None, help = 'path to also write the results to as json')
+    parser.add_argument('-v', '--verbose', dest = 'verbose', action = 'store_true', default = False, help = 'verbose flag for the running of the tool')
+    return parser.parse_args(args)
@@ -7,6 +7,9 @@ from urllib.parse import urlparse
 import json
 import argparse
 import copy
+import re
+import fnmatch
+import hashlib
 
 verboseprint = lambda *a, **k: None
 
@@ -56,6 +59,129 @@ def get_types(jsonData: dict) -> list:
             raise ValueError(f'Excpted one of "type" or "enum" in property {val}')
     return [type if type != 'null' else 'boolean' for type in types] # Can't have a null type column, everything else exists in snowflake as is, not needed for other warehouses
 
+def get_precise_types(jsonData: dict) -> list:
+    """Get a list of precise types from a Snowplow schema, using the format, length, bounds, and enum of each property
+
+    Properties with more than one (non-null) type, or nothing to narrow them by, keep the type from get_types.
+
+    Args:
+        jsonData (dict): A parsed Snowplow self-describing event or entity schema
+
+    Returns:
+        list: A list of types for the properties in your schema, e.g. timestamp, date, int, bigint, double, varchar(n)
+    """
+    types = []
+    for val, base_type in zip(jsonData['properties'].values(), get_types(jsonData)):
+        cur_type = val.get('type') or []
+        non_null_types = set([cur_type.lower()] if isinstance(cur_type, str) else [type.lower() for type in cur_type]).difference({'null'})
+        enum = [option for option in val.get('enum') or [] if option is not None]
+        if len(non_null_types) > 1:
+            types.append(base_type)
+        elif base_type == 'string' and val.get('format') == 'date-time':
+            types.append('timestamp')
+        elif base_type == 'string' and val.get('format') == 'date':
+            types.append('date')
+        elif base_type == 'string' and val.get('maxLength') is not None:
+            types.append(f"varchar({val.get('maxLength')})")
+        elif base_type == 'string' and len(enum) > 0:
+            types.append(f'varchar({max([len(str(option)) for option in enum])})')
+        elif base_type in ['integer', 'number'] and len(enum) > 0:
+            # Enums without a type are numbers if all options are numeric, see get_types
+            if all([float(option).is_integer() for option in enum]):
+                types.append(get_integer_type(min([float(option) for option in enum]), max([float(option) for option in enum])))
+            else:
+                types.append('double')
+        elif base_type == 'integer':
+            types.append(get_integer_type(val.get('minimum'), val.get('maximum')))
+        elif base_type == 'number':
+            types.append('double')
+        else:
+            types.append(base_type)
+    return types
+
+def get_integer_type(minimum: float, maximum: float) -> str:
+    """Get the smallest integer type that holds all values between the bounds
+
+    Args:
+        minimum (float): The minimum value, None if unbounded
+        maximum (float): The maximum value, None if unbounded
+
+    Returns:
+        str: int if the bounds fit in 32 bits, otherwise bigint
+    """
+    if minimum is not None and maximum is not None and minimum >= -2**31 and maximum <= 2**31 - 1:
+        return 'int'
+    return 'bigint'
+
+def cast_field(field: str, field_type: str, warehouse: str) -> str:
+    """Cast a field to a precise type, matching the cast_field macro for BigQuery and Databricks
+
+    Args:
+        field (str): The field expression to cast
+        field_type (str): The type of the field, as returned by get_types or get_precise_types
+        warehouse (str): The warehouse to cast for, one of bigquery or databricks
+
+    Returns:
+        str: The cast field, or the field unchanged if the type is already the type of the column
+    """
+    cast_type = cast_types[warehouse].get((field_type or '').split('(')[0])
+    return f'cast({field} as {cast_type})' if cast_type is not None else field
+
+def flatten_properties(properties: dict, depth: int, parent: str = '') -> dict:
+    """Flatten the nested object properties of a schema into dot separated keys, down to a maximum depth
+
+    Only objects with defined properties are flattened, arrays and free-form objects are kept as a single column.
+
+    Args:
+        properties (dict): The properties of a Snowplow schema, or of a nested object within one
+        depth (int): How many levels of nested objects to flatten, 0 keeps all properties as they are
+        parent (str, optional): The dot separated path to the properties, used when recursing. Defaults to ''.
+
+    Returns:
+        dict: The flattened properties, keyed by their dot separated path e.g. parent.child
+    """
+    flat_properties = {}
+    for key, val in properties.items():
+        cur_type = val.get('type') or []
+        cur_types = [cur_type.lower()] if isinstance(cur_type, str) else [type.lower() for type in cur_type]
+        if depth > 0 and 'object' in cur_types and val.get('properties'):
+            flat_properties.update(flatten_properties(val.get('properties'), depth - 1, parent + key + '.'))
+        else:
+            flat_properties[parent + key] = val
+    return flat_properties
+
+def property_matches(key: str, patterns: list) -> bool:
+    """Check if a property key, or any parent of a flattened key, matches any of the glob patterns
+
+    Args:
+        key (str): The (flattened) property key
+        patterns (list): Glob patterns of properties
+
+    Returns:
+        bool: If the key matches any of the patterns
+    """
+    parts = key.split('.')
+    paths = ['.'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+    return any([fnmatch.fnmatchcase(path, pattern) for path in paths for pattern in patterns])
+
+def filter_properties(properties: dict, include: list = None, exclude: list = None) -> dict:
+    """Filter the properties of a schema to those matching the include patterns and not matching the exclude patterns
+
+    Patterns are globs matched against the property key, or any parent of a flattened key, so `customer` and `customer.*` both match `customer.address`.
+
+    Args:
+        properties (dict): The (flattened) properties of a Snowplow schema
+        include (list, optional): Glob patterns of the properties to keep, all are kept if not provided. Defaults to None.
+        exclude (list, optional): Glob patterns of the properties to remove, applied after include. Defaults to None.
+
+    Returns:
+        dict: The filtered properties
+    """
+    filtered_properties = {key: val for key, val in properties.items() if (include is None or property_matches(key, include)) and not property_matches(key, exclude or [])}
+    if len(filtered_properties) == 0:
+        warnings.warn(f'No properties left after applying include {include} and exclude {exclude} to properties {list(properties.keys())}')
+    return filtered_properties
+
 def url_to_column(str: str) -> str:
     """convert url string to database column format
 
@@ -120,6 +246,54 @@ def get_schema(url: str, repo_keys: dict) -> Union[dict, list]:
     schema = json.loads(schema)
     return(schema)
 
+def get_registry_schemas(resolver_file_path: str) -> dict:
+    """Load and validate a resolver config, and get the list of all schemas on each registry, storing the api keys of each registry in repo_keys
+
+    Args:
+        resolver_file_path (str): Path to the resolver config, or 'default' to use Iglu Central
+
+    Raises:
+        FileNotFoundError: If the resolver config does not exist
+        ValueError: If the resolver config is not valid
+        KeyError: If a private registry uri does not end in /api
+
+    Returns:
+        dict: The list of schemas on each registry, keyed by the registry uri in order of priority
+    """
+    if resolver_file_path != 'default':
+        if not os.path.exists(resolver_file_path):
+            raise FileNotFoundError(f'File {resolver_file_path} not found, to use default Iglu Central please set value to "default".')
+        try:
+            with open(resolver_file_path, 'r') as f:
+                iglu_resolver_parsed = json.load(f)
+        except json.decoder.JSONDecodeError:
+            print(f'Error parsing resolver config at {resolver_file_path}, please ensure this a valid JSON file.')
+            raise
+    else:
+        iglu_resolver_parsed = default_resolver
+
+    if not validate_json(iglu_resolver_parsed.get('data'), schema = resolver_schema, validate = True):
+        raise ValueError(f'Resolver config at {resolver_file_path} is not valid, see https://docs.snowplow.io/docs/pipeline-components-and-applications/iglu/iglu-resolver/ for more details.')
+
+    # Loop over all registries and get the priority and list of all schemas on that registry, store api keys as well
+    for repo in iglu_resolver_parsed.get('data').get('repositories'):
+        # Get uri and netloc
+        repo_uri = repo.get('connection').get('http').get('uri')
+        parsed_uri = urlparse(repo_uri)
+        repo_netloc = parsed_uri.netloc
+        priority.append(repo.get('priority'))
+        # Store the api key if it's needed, None if it doesn't exist
+        repo_key = repo.get('connection').get('http').get('apikey')
+        if repo_key is not None and repo_uri[-4:] != '/api':
+            raise KeyError(f'A private registry uri should end in "/api", {repo_uri} does not, see https://docs.snowplow.io/docs/pipeline-components-and-applications/iglu/iglu-resolver/ for more details.')
+        repo_keys[repo_netloc] = repo_key
+        # Get all schemas in each repo
+        repo_schemas = get_schema(repo_uri + '/schemas', repo_keys)
+        schemas_list[repo_uri] = repo_schemas
+
+    # Organise list in order of priority
+    return {x[0]: x[1] for _, x in sorted(zip(priority, schemas_list.items()))}
+
 def validate_json(jsonData: dict, schema: dict = None, validate: bool = True, schemas_list: dict = None, repo_keys: dict = None) -> bool:
     """Validates a JSON against a schema
 
@@ -180,7 +354,235 @@ def generate_names(event_names: list, sde_urls: list, versions: list, table_name
     return model_names
 
 
-def cleanup_models(event_names: list, sde_urls: list, versions: list, table_names: list, models_prefix: str, models_folder: str, user_table_name: str, filtered_events_table_name: str, dry_run: bool) -> None:
+def get_model_columns(flat_cols: list, sde_keys: list, sde_aliases: list, context_keys: list, context_aliases: list) -> list:
+    """Get the names of the columns selected from the events by a model, matching the aliases of the normalize_events and users_table macros
+
+    Args:
+        flat_cols (list): List of flat columns from the events table
+        sde_keys (list): List of lists of the keys of each self describing event column
+        sde_aliases (list): List of aliases of each self describing event column, if any
+        context_keys (list): List of lists of the keys of each context column
+        context_aliases (list): List of aliases of each context column, if any
+
+    Returns:
+        list: The lower case column names, in the order they are selected
+    """
+    columns = list(flat_cols or [])
+    for keys, aliases in [(sde_keys, sde_aliases), (context_keys, context_aliases)]:
+        for col_ind, col_keys in enumerate(keys or []):
+            prefix = aliases[col_ind] + '_' if aliases else ''
+            columns.extend([prefix + snakeify_case(key).replace('.', '_') for key in col_keys])
+    return [column.lower() for column in columns]
+
+
+def compare_model_columns(previous_columns: dict, model_columns: dict) -> dict:
+    """Compare the columns of each model to those recorded when the models were last generated
+
+    Args:
+        previous_columns (dict): The columns of each model when last generated, keyed by model name
+        model_columns (dict): The columns of each model now, keyed by model name
+
+    Returns:
+        dict: The added and removed columns of each model that existed before and whose columns have changed
+    """
+    changes = {}
+    for model, columns in model_columns.items():
+        if model not in previous_columns:
+            continue
+        added = [column for column in columns if column not in previous_columns[model]]
+        removed = [column for column in previous_columns[model] if column not in columns]
+        if len(added) > 0 or len(removed) > 0:
+            changes[model] = {'added': added, 'removed': removed}
+    return changes
+
+
+def get_property_null_rates(profile: dict, model_names: list, keys: list, aliases: list) -> list:
+    """Get the null rate of the column of each key of a model from a profile report, as printed by the profile_columns macro
+
+    Args:
+        profile (dict): The profile report, keyed by model name
+        model_names (list): The names of the models the columns are split across, e.g. a model and its cold model
+        keys (list): List of lists of the keys of each self describing event or context column
+        aliases (list): List of aliases of each column, if any
+
+    Returns:
+        list: List of lists of the null rate of each key, 0 where the model or column was not profiled or had no rows so is assumed to be populated
+    """
+    columns = {}
+    for model_name in model_names:
+        columns.update(profile.get(model_name, {}).get('columns', {}))
+    null_rates = []
+    for col_ind, col_keys in enumerate(keys or []):
+        prefix = aliases[col_ind] + '_' if aliases else ''
+        null_rates.append([columns.get((prefix + snakeify_case(key).replace('.', '_')).lower(), {}).get('null_rate') or 0.0 for key in col_keys])
+    return null_rates
+
+
+def update_property_null_rates(property_null_rates: dict, urls: list, keys: list, null_rates: list) -> None:
+    """Record the lowest null rate of each property of each schema across the models that extract it
+
+    Args:
+        property_null_rates (dict): The null rate of each property, keyed by url then key
+        urls (list): List of the `iglu:com.` type urls of the columns
+        keys (list): List of lists of the keys of each column
+        null_rates (list): List of lists of the null rate of each key, as returned by get_property_null_rates
+    """
+    for url, col_keys, col_null_rates in zip(urls or [], keys or [], null_rates or []):
+        url_null_rates = property_null_rates.setdefault(url, {})
+        for key, null_rate in zip(col_keys, col_null_rates):
+            url_null_rates[key] = min(url_null_rates.get(key, 1.0), null_rate)
+
+
+def prune_unused_keys(keys: list, types: list, null_rates: list) -> tuple:
+    """Remove the keys whose columns were null in every profiled row
+
+    Args:
+        keys (list): List of lists of the keys of each column
+        types (list): List of lists of the types of each key
+        null_rates (list): List of lists of the null rate of each key, as returned by get_property_null_rates
+
+    Returns:
+        tuple: The keys (list of lists) and types (list of lists) that are populated
+    """
+    if keys is None:
+        return (keys, types)
+    pruned = [[(key, key_type) for key, key_type, null_rate in zip(col_keys, col_types, col_null_rates) if null_rate < 1] for col_keys, col_types, col_null_rates in zip(keys, types, null_rates)]
+    return ([[key for key, _ in col] for col in pruned], [[key_type for _, key_type in col] for col in pruned])
+
+
+def get_event_table_id(model_name: str) -> int:
+    """Get a stable integer id for a model in the filtered events table, derived from the model name so it does not change as models are added or removed
+
+    Args:
+        model_name (str): The name of the model
+
+    Returns:
+        int: A positive 31 bit integer id for the model
+    """
+    return int(hashlib.md5(model_name.encode('utf-8')).hexdigest()[:8], 16) >> 1
+
+
+def get_cold_names(model_names: list, hot_properties: list) -> list:
+    """Get the names of the cold models of the event models that have hot properties
+
+    Args:
+        model_names (list): List of the event model names
+        hot_properties (list): List of the hot properties of each event model from the config file, None if it has none
+
+    Returns:
+        list: List of the cold model names, the event model name with a _cold suffix
+    """
+    return [model_name + '_cold' for model_name, model_hot_properties in zip(model_names, hot_properties) if model_hot_properties is not None]
+
+
+def split_hot_columns(cols: list, keys: list, types: list, aliases: list, hot_properties: list) -> tuple:
+    """Split the keys of the self describing event or context columns into hot keys, matching the hot properties, and cold keys
+
+    Args:
+        cols (list): List of the self describing event or context columns
+        keys (list): List of lists of the keys of each column
+        types (list): List of lists of the types of each key
+        aliases (list): List of aliases of each column, if any
+        hot_properties (list): Glob patterns of the hot properties
+
+    Returns:
+        tuple: The hot and cold columns, each a tuple of the columns (list), keys (list of lists), types (list of lists), and aliases (list), without the columns that have no keys left
+    """
+    hot = ([], [], [], [] if aliases else None)
+    cold = ([], [], [], [] if aliases else None)
+    for col_ind, (col, col_keys, col_types) in enumerate(zip(cols or [], keys or [], types or [])):
+        for part, is_hot in [(hot, True), (cold, False)]:
+            part_keys = [(key, key_type) for key, key_type in zip(col_keys, col_types) if property_matches(key, hot_properties) == is_hot]
+            if len(part_keys) > 0:
+                part[0].append(col)
+                part[1].append([key for key, _ in part_keys])
+                part[2].append([key_type for _, key_type in part_keys])
+                if aliases:
+                    part[3].append(aliases[col_ind])
+    # Keep None for no columns, as returned by get_cols_keys_types_aliases
+    return tuple((part[0] or None, part[1] or None, part[2] or None, part[3]) for part in [hot, cold])
+
+
+def get_rollup_names(model_names: list, rollups: list) -> list:
+    """Get the names of the daily rollup models of each event model
+
+    Args:
+        model_names (list): List of the event model names
+        rollups (list): List of the rollups of each event model from the config file, None if it has none
+
+    Returns:
+        list: List of all rollup model names, a rollup without a table_name is named after its event model with a _daily suffix
+    """
+    return [rollup.get('table_name') or model_name + '_daily' for model_name, model_rollups in zip(model_names, rollups) for rollup in model_rollups or []]
+
+
+def get_rollup_measures(measures: list, columns: list) -> list:
+    """Check the columns of each rollup measure are selected by the event model, and give each measure an alias
+
+    Args:
+        measures (list): List of the measures of a rollup from the config file
+        columns (list): The columns of the event model the rollup aggregates
+
+    Returns:
+        list: The measures with their type, lower case column, and alias
+    """
+    rollup_measures = []
+    for measure in measures:
+        measure_type = measure.get('type')
+        column = (measure.get('column') or '').lower()
+        if measure_type != 'count' and column not in columns:
+            raise ValueError(f"Rollup measure {measure_type} is on column '{column}', which is not a column of the event model. Columns: {columns}")
+        alias = measure.get('alias') or {'count': 'n_events', 'count_distinct': 'approx_distinct_' + column, 'sum': 'sum_' + column, 'hll_sketch': column + '_sketch'}[measure_type]
+        rollup_measures.append({'type': measure_type, 'column': column, 'alias': alias.lower()})
+    return rollup_measures
+
+
+def get_rollup_model(model_name: str, event_names: list, dimensions: list, measures: list) -> str:
+    """Get the model for a daily rollup of an event model
+
+    Args:
+        model_name (str): The name of the event model to aggregate
+        event_names (list): The event names of the event model, used to find the days with events in the run
+        dimensions (list): The columns of the event model to group by, as well as the day
+        measures (list): The measures of the rollup, as returned by get_rollup_measures
+
+    Returns:
+        str: The content of the rollup model
+    """
+    # Each run replaces the days it touched, so the approximate distinct counts are never summed across runs
+    return f"""{{{{ config(
+    tags = "snowplow_normalize_incremental",
+    materialized = "incremental",
+    on_schema_change = "append_new_columns",
+    incremental_strategy = snowplow_normalize.get_incremental_strategy("insert_overwrite"),
+    unique_key = "rollup_date",
+    partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={{
+      "field": "rollup_date",
+      "data_type": "date"
+    }}, databricks_val='rollup_date'),
+    tblproperties={{
+      'delta.autoOptimize.optimizeWrite' : 'true',
+      'delta.autoOptimize.autoCompact' : 'true'
+    }}
+) }}}}
+{{% call set_sql_header(config) -%}}
+{{{{ snowplow_normalize.set_query_tag() }}}}
+{{%- endcall %}}
+
+{{%- set event_names = {event_names} -%}}
+{{%- set dimensions = {dimensions} -%}}
+{{%- set measures = {measures} -%}}
+
+{{{{ snowplow_normalize.daily_rollup(
+    ref('{model_name}'),
+    event_names,
+    dimensions,
+    measures
+) }}}}
+"""
+
+
+def cleanup_models(event_names: list, sde_urls: list, versions: list, table_names: list, models_prefix: str, models_folder: str, user_table_name: str, filtered_events_table_name: str, dry_run: bool, filtered_events_key: str = 'string', rollups: list = None, hot_properties: list = None) -> None:
     """Clean up excess models not present in your config file and quit
 
     Args:
@@ -193,15 +595,22 @@ def cleanup_models(event_names: list, sde_urls: list, versions: list, table_name
         user_table_name (string): Name of your users table from your config
         filtered_events_table_name (string): Name of your filtered events table from your config
         dry_run (boolean): Do as a dry run or not
+        filtered_events_key (string, optional): The merge key of your filtered events table from your config, keeps the table id model unless string. Defaults to 'string'.
+        rollups (list, optional): List of the rollups of each event model from your config, keeps their rollup models. Defaults to None.
+        hot_properties (list, optional): List of the hot properties of each event model from your config, keeps the cold models of those that have them. Defaults to None.
     """
     verboseprint('Starting cleanup...')
     model_names = generate_names(event_names, sde_urls, versions, table_names, models_prefix)
+    model_names.extend(get_rollup_names(model_names, rollups or [None] * len(model_names)) + get_cold_names(model_names, hot_properties or [None] * len(model_names)))
     if filtered_events_table_name is not None:
         model_names.extend([user_table_name, filtered_events_table_name])
+        if filtered_events_key != 'string':
+            model_names.append(filtered_events_table_name + '_tables')
     else:
         model_names.append(user_table_name)
 
-    cur_models = os.listdir(os.path.join('models', models_folder))
+    # Only model files are cleaned up, so the column state file is kept
+    cur_models = [file for file in os.listdir(os.path.join('models', models_folder)) if file.endswith('.sql')]
     extra_models = set(cur_models).difference(set([model + '.sql' for model in model_names]))
     if len(extra_models) == 0:
         print('No models to clean up, quitting...')
@@ -227,9 +636,11 @@ def parse_args(args: list):
     parser.add_argument('--dryRun', dest = 'dryRun', action = 'store_true', default = False, help ='flag for a dry run (does not write/delete any files)')
     parser.add_argument('--configHelp', dest = 'configHelp', action = 'version', version = config_help, help = 'prints information relating to the structure of the config file')
     parser.add_argument('--cleanUp', dest = 'cleanUp', action = 'store_true', default = False, help = 'delete any models not present in your config and exit (no models will be generated)')
+    parser.add_argument('--profileReport', dest = 'profileReport', default = None, help = 'relative path to a column profile, saved from dbt --quiet run-operation profile_columns, to report the schema properties never populated')
+    parser.add_argument('--applyProfile', dest = 'applyProfile', action = 'store_true', default = False, help = 'remove the columns never populated in the column profile from the models, requires --profileReport')
     return parser.parse_args(args)
 
-def get_cols_keys_types_aliases(urls: list, aliases: list, prefix: str, schemas_list: dict, repo_keys: dict, validate_schemas: bool) -> tuple:
+def get_cols_keys_types_aliases(urls: list, aliases: list, prefix: str, schemas_list: dict, repo_keys: dict, validate_schemas: bool, flatten_depth: int = 0, flatten_overrides: dict = None, precise_types: bool = False, include_properties: dict = None, exclude_properties: dict = None) -> tuple:
     """Get the columns, keys, types, and aliases for the sdes or contexts
 
     Args:
@@ -239,6 +650,11 @@ def get_cols_keys_types_aliases(urls: list, aliases: list, prefix: str, schemas_
         schemas_list (dict): Dictionary of schemas to use in validate_json
         repo_keys (dict): Dictionmary of registry keys to use in validate_json
         validate_schemas (bool): Boolean to validate the jsons or not
+        flatten_depth (int, optional): Depth of nested object properties to flatten into their own keys. Defaults to 0.
+        flatten_overrides (dict, optional): Flatten depth for specific schemas, keyed by url. Defaults to None.
+        precise_types (bool, optional): Use get_precise_types instead of get_types. Defaults to False.
+        include_properties (dict, optional): Glob patterns of the properties to keep for specific schemas, keyed by url. Defaults to None.
+        exclude_properties (dict, optional): Glob patterns of the properties to remove for specific schemas, keyed by url. Defaults to None.
 
     Raises:
         ValueError: If schemas do not validate against their schemas
@@ -256,8 +672,10 @@ def get_cols_keys_types_aliases(urls: list, aliases: list, prefix: str, schemas_
                 raise ValueError(f'Validation of schema {urls[i]} failed.')
         # Generate final form data for insert into model
         cols = [prefix + url_to_column(url) for url in url_cut]
-        keys = [list(sde.get('properties').keys()) for sde in jsons]
-        types = [get_types(sde) for sde in jsons]
+        flat_properties = [filter_properties(flatten_properties(sde.get('properties'), (flatten_overrides or {}).get(url, flatten_depth)), (include_properties or {}).get(url), (exclude_properties or {}).get(url))
+                            for url, sde in zip(urls, jsons)]
+        keys = [list(properties.keys()) for properties in flat_properties]
+        types = [(get_precise_types if precise_types else get_types)({'properties': properties}) for properties in flat_properties]
         if aliases is None and len(urls) > 1:
             aliases = [event.get('self').get('name') for event in jsons]
     else:
@@ -267,8 +685,197 @@ def get_cols_keys_types_aliases(urls: list, aliases: list, prefix: str, schemas_
 
     return (cols, keys, types, aliases)
 
+def snakeify_case(text: str) -> str:
+    """Convert a string in camel/pascal case to snakecase, matching the snakeify_case macro
+
+    Args:
+        text (str): The text to convert
+
+    Returns:
+        str: The text in snakecase
+    """
+    text = re.sub(r'([A-Z]+)([A-Z][a-z])', r'\1_\2', text)
+    text = re.sub(r'([a-z\d])([A-Z])', r'\1_\2', text)
+    return text.replace('-', '_').lower()
+
+def get_projection(sde_cols: list, sde_keys: list, sde_types: list, sde_aliases: list, context_cols: list, context_keys: list, context_types: list, context_aliases: list) -> dict:
+    """Pre-resolve the column expressions for the sdes and contexts of a model for each warehouse, as produced by the normalize_events macro
+
+    Args:
+        sde_cols (list): List of the sde columns
+        sde_keys (list): List of lists of the keys within each sde column
+        sde_types (list): List of lists of the types of each key within each sde column
+        sde_aliases (list): List of prefixes for the aliases of each sde column, can be empty
+        context_cols (list): List of the context columns
+        context_keys (list): List of lists of the keys within each context column
+        context_types (list): List of lists of the types of each key within each context column
+        context_aliases (list): List of prefixes for the aliases of each context column, can be empty
+
+    Returns:
+        dict: Column expressions for snowflake and databricks, the column prefix, keys, aliases, and types to coalesce for bigquery, and the keys and snakecase keys, each space separated, to check against the snakeify_case macro
+    """
+    projection = {'snowflake': [], 'databricks': [], 'bigquery': []}
+    all_keys = []
+    all_snake_keys = []
+    for cols, keys, types, aliases, index in [(sde_cols, sde_keys, sde_types, sde_aliases, ''), (context_cols, context_keys, context_types, context_aliases, '[0]')]:
+        for col_ind, col in enumerate(cols or []):
+            # Remove down to major version, drop 2 last _X values
+            col_clean = '_'.join(col.split('_')[:-2])
+            snake_keys = [snakeify_case(key) for key in keys[col_ind]]
+            # Flattened nested keys are a dot separated path, with the parts joined by an underscore in the alias
+            col_aliases = [aliases[col_ind] + '_' + key.replace('.', '_') if aliases else key.replace('.', '_') for key in snake_keys]
+            for key, key_type, snake_key, alias in zip(keys[col_ind], types[col_ind], snake_keys, col_aliases):
+                projection['snowflake'].append(f'{col_clean}{index}:{key}::{key_type} as {alias}')
+                projection['databricks'].append(f"{cast_field(f'{col_clean}{index}.{snake_key}', key_type, 'databricks')} as {alias}")
+            projection['bigquery'].append([col_clean.lower(), snake_keys, col_aliases, types[col_ind]])
+            all_keys.extend(keys[col_ind])
+            all_snake_keys.extend(snake_keys)
+    # Snakecasing only looks at neighbouring characters, so the macro can check every key of the model in one call
+    projection['snakeify_check'] = [' '.join(all_keys), ' '.join(all_snake_keys)]
+    return projection
+
+def format_projection(projection: dict) -> str:
+    """Format a projection as a compact Jinja dictionary literal for a model file
+
+    Args:
+        projection (dict): The projection, as returned by get_projection
+
+    Returns:
+        str: The projection with one line per warehouse
+    """
+    lines = [f'    "{warehouse}": {json.dumps(columns)}' for warehouse, columns in projection.items()]
+    return '{\n' + ',\n'.join(lines) + '\n}'
+
+def get_tested_names(model_names: list, cold_names: list, materializations: list) -> list:
+    """Get the names of the event models to generate tests for, the incremental models and their cold models
+
+    Table and view models are rebuilt from all events since snowplow__start_date, so a windowed test of them would still read the full history
+
+    Args:
+        model_names (list): List of the event model names
+        cold_names (list): List of the cold model names, as returned by get_cold_names
+        materializations (list): List of the materialization of each event model
+
+    Returns:
+        list: List of the incremental event model names, followed by their cold model names
+    """
+    incremental_names = [model_name for model_name, materialization in zip(model_names, materializations) if materialization == 'incremental']
+    return incremental_names + [cold_name for cold_name in cold_names if cold_name[:-len('_cold')] in incremental_names]
+
+def get_tests_yml(event_models: list, users_model: str = None, user_id_column: str = None, filtered_model: str = None, filtered_events_key: str = 'string') -> str:
+    """Get the yml of the window_unique and window_not_null tests of the generated models, tested from the lower limit of the last run unless snowplow__test_full_history is set
+
+    Args:
+        event_models (list): List of the incremental event model names, including any cold models, as returned by get_tested_names
+        users_model (str, optional): The name of the users model, if generated. Defaults to None.
+        user_id_column (str, optional): The user id column of the users model. Defaults to None.
+        filtered_model (str, optional): The name of the filtered events model, if generated. Defaults to None.
+        filtered_events_key (str, optional): The merge key of the filtered events model, one of string, composite, or hash. Defaults to 'string'.
+
+    Returns:
+        str: The content of the yml file
+    """
+    event_id_tests = """
+      - name: event_id
+        tests:
+          - snowplow_normalize.window_unique
+          - snowplow_normalize.window_not_null
+      - name: collector_tstamp
+        tests:
+          - snowplow_normalize.window_not_null"""
+    tests_yml = """version: 2
+
+models:"""
+    for model in event_models:
+        tests_yml += f"""
+  - name: {model}
+    columns:{event_id_tests}"""
+    if filtered_model is not None:
+        # Events can be in more than one model of the filtered events table, so the event_id alone is not unique
+        if filtered_events_key == 'composite':
+            tests_yml += f"""
+  - name: {filtered_model}
+    tests:
+      - snowplow_normalize.window_unique:
+          combination_of_columns: ['event_id', 'event_table_id']
+    columns:"""
+        else:
+            tests_yml += f"""
+  - name: {filtered_model}
+    columns:
+      - name: unique_id
+        tests:
+          - snowplow_normalize.window_unique
+          - snowplow_normalize.window_not_null"""
+        tests_yml += """
+      - name: event_id
+        tests:
+          - snowplow_normalize.window_not_null"""
+    if users_model is not None:
+        tests_yml += f"""
+  - name: {users_model}
+    columns:
+      - name: {user_id_column}
+        tests:
+          - snowplow_normalize.window_unique:
+              tstamp_column: latest_collector_tstamp
+          - snowplow_normalize.window_not_null:
+              tstamp_column: latest_collector_tstamp"""
+    return tests_yml + '\n'
+
+def get_event_model_config(materialization: str = 'incremental', incremental_strategy: str = None) -> str:
+    """Get the config block for an event model
+
+    Args:
+        materialization (str, optional): One of incremental, table, or view. Defaults to 'incremental'.
+        incremental_strategy (str, optional): One of merge or delete+insert, mapped to the closest supported strategy for each warehouse by the get_incremental_strategy macro. Defaults to None, the warehouse default.
+
+    Raises:
+        ValueError: If the incremental strategy is not merge or delete+insert
+
+    Returns:
+        str: The config block for the model
+    """
+    # Append can't replace the events reprocessed in the lookback window, and insert_overwrite replaces whole days with only the events of the run
+    if incremental_strategy not in [None, 'merge', 'delete+insert']:
+        raise ValueError(f'Incremental strategy {incremental_strategy} is not supported for event models, please use merge or delete+insert.')
+    if materialization != 'incremental':
+        # Non-incremental models can't be in the manifest, so have their own tag
+        return f"""{{{{ config(
+    tags = "snowplow_normalize_tiered",
+    materialized = "{materialization}"
+) }}}}
+{{% call set_sql_header(config) -%}}
+{{{{ snowplow_normalize.set_query_tag() }}}}
+{{%- endcall %}}
+"""
+    strategy_config = f'''
+    incremental_strategy = snowplow_normalize.get_incremental_strategy("{incremental_strategy}"),''' if incremental_strategy is not None else ''
+    return f"""{{{{ config(
+    tags = "snowplow_normalize_incremental",
+    materialized = "incremental",
+    on_schema_change = "append_new_columns",{strategy_config}
+    unique_key = "event_id",
+    upsert_date_key = "collector_tstamp",
+    disable_upsert_lookback = var('snowplow__disable_upsert_lookback', false),
+    partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={{
+      "field": "collector_tstamp",
+      "data_type": "timestamp"
+    }}, databricks_val='collector_tstamp_date'),
+    tblproperties={{
+      'delta.autoOptimize.optimizeWrite' : 'true',
+      'delta.autoOptimize.autoCompact' : 'true'
+    }},
+    snowplow_optimize=true
+) }}}}
+{{% call set_sql_header(config) -%}}
+{{{{ snowplow_normalize.set_query_tag() }}}}
+{{%- endcall %}}
+"""
 
 # Lookups
+column_state_file = 'snowplow_normalize_columns.json'
+tests_file = 'snowplow_normalize_tests.yml'
 schema_cache = {}
 schemas_list = {}
 repo_keys = {}
@@ -283,11 +890,16 @@ type_hierarchy = {
     "object": 5,
     "string": 6
 }
+# Types to cast to in each warehouse, other types are already the type of the column from the loader
+cast_types = {
+    "bigquery": {"timestamp": "timestamp", "date": "date", "int": "int64", "bigint": "int64", "double": "float64"},
+    "databricks": {"timestamp": "timestamp", "date": "date", "int": "int", "bigint": "bigint", "double": "double"}
+}
 
 # Hard coded default resolver and schemas to use before we have checked the resolver is valid
 default_resolver = {"schema": "iglu:com.snowplowanalytics.iglu/resolver-config/jsonschema/1-0-1", "data": {"cacheSize": 500, "repositories": [{"name": "Iglu Central", "priority": 0, "vendorPrefixes": [ "com.snowplowanalytics" ], "connection": {"http": {"uri": "http://iglucentral.com"}}}]}}
 resolver_schema = {"$schema": "http://iglucentral.com/schemas/com.snowplowanalytics.self-desc/schema/jsonschema/1-0-0#", "self":{"vendor": "com.snowplowanalytics.iglu", "name": "resolver-config", "format": "jsonschema", "version": "1-0-3"}, "type": "object", "properties": {"cacheSize": {"type": "number"}, "cacheTtl": {"type": ["integer", "null"], "minimum": 0}, "repositories": {"type": "array", "items": {"type": "object", "properties": {"name": {"type": "string"}, "priority": {"type": "number"}, "vendorPrefixes": {"type": "array", "items": {"type": "string"}}, "connection": {"type": "object", "oneOf": [{"properties": {"embedded": {"type": "object", "properties": {"path": {"type": "string"}}, "required": ["path"], "additionalProperties":  False }}, "required": ["embedded"], "additionalProperties":  False}, {"properties": {"http": {"type": "object", "properties": {"uri": {"type": "string", "format": "uri"}, "apikey": {"type": ["string", "null"]}}, "required": [ "uri" ], "additionalProperties":  False } }, "required": [ "http" ], "additionalProperties":  False }]}}, "required": [ "name", "priority", "vendorPrefixes", "connection" ], "additionalProperties":  False }}}}
-config_schema = { "description": "Schema for the Snowplow dbt normalize python script configuration", "self": { "name": "normalize-config", "format": "jsonschema", "version": "2-1-0" }, "properties": { "config": { "type": "object", "properties": { "resolver_file_path": { "type": "string", "description": "relative path to your resolver config json, or 'default' to use iglucentral only" }, "filtered_events_table_name": { "type": "string", "description": "name of filtered events table, if not provided it will not be generated" }, "users_table_name": { "type": "string", "description": "name of users table, default events_users if user schema(s) provided" }, "validate_schemas": { "type": "boolean", "description": "if you want to validate schemas loaded from each iglu registry or not, default true" }, "overwrite": { "type": "boolean", "description": "overwrite existing model files or not, default true" }, "models_folder": { "type": "string", "description": "folder under models/ to place the models, default snowplow_normalized_events" }, "models_prefix": { "type": "string", "description": "prefix used for models when table_name is not provided, use '' for no prefix, default snowplow" } }, "required": [ "resolver_file_path" ], "additionalProperties": False }, "events": { "type": "array", "items": { "type": "object", "properties": { "event_names": { "type": "array", "items": { "type": "string", "minItems": 1 }, "description": "name(s) of the event type(s), value of the event_name column in your warehouse" }, "event_columns": { "type": "array", "items": { "type": "string" }, "description": "array of strings of flat column names from the events table to include in the model" }, "self_describing_event_schemas": { "type": "array", "items": { "type": "string" }, "description": "`iglu:com.` type url(s) for the self-describing event(s) to include in the model" }, "self_describing_event_aliases": { "type": "array", "items": { "type": "string" }, "description": "array of strings of prefixes to the column alias for self describing events" }, "context_schemas": { "type": "array", "items": { "type": "string" }, "description": "array of strings of `iglu:com.` type url(s) for the context/entities to include in the model" }, "context_aliases": { "type": "array", "items": { "type": "string" }, "description": "array of strings of prefixes to the column alias for context/entities" }, "table_name": { "type": "string", "description": "name of the model, default is the event_name" }, "version": { "type": "string", "minLength": 1, "maxLength": 1, "description": "version number to append to table name, if (one) self_describing_event_schema is provided uses major version number from that, default 1" } }, "if": { "properties": { "event_names": { "minItems": 2 } } }, "then": { "anyOf": [ { "required": [ "event_names", "self_describing_event_schemas", "version", "table_name" ] }, { "required": [ "event_names", "context_schemas", "version", "table_name" ] }, { "required": [ "event_names", "event_columns", "version", "table_name" ] } ] }, "else": { "anyOf": [ { "required": [ "event_names", "self_describing_event_schemas" ] }, { "required": [ "event_names", "context_schemas" ] }, { "required": [ "event_names", "event_columns" ] } ] }, "additionalProperties": False }, "minItems": 1 }, "users": { "type": "object", "properties": { "user_id": { "type": "object", "properties": { "id_column": { "type": "string", "description": "name of column or attribute in the schema that defines your user_id, will be converted to a string in Snowflake" }, "id_self_describing_event_schema": { "type": "string", "description": "`iglu:com.` type url for the self-describing event schema that your user_id column is in, used over id_context_schema if both provided" }, "id_context_schema": { "type": "string", "description": "`iglu:com.` type url for the context schema that your user_id column is in" }, "alias": { "type": "string", "description": "alias to apply to the id column" } }, "additionalProperties": False, "required": [ "id_column" ] }, "user_contexts": { "type": "array", "items": { "type": "string", "description": "array of strings of iglu:com. type url(s) for the context/entities to add to your users table as columns" } }, "user_columns": { "type": "array", "items": { "type": "string", "description": "array of strings of flat column names from the events table to include in the model" } } }, "anyOf" : [ {"required": [ "user_contexts" ]}, {"required": [ "user_columns" ]} ], "additionalProperties": False } }, "additionalProperties": False, "type": "object", "required": [ "config", "events" ]}
+config_schema = { "description": "Schema for the Snowplow dbt normalize python script configuration", "self": { "name": "normalize-config", "format": "jsonschema", "version": "2-1-0" }, "properties": { "config": { "type": "object", "properties": { "resolver_file_path": { "type": "string", "description": "relative path to your resolver config json, or 'default' to use iglucentral only" }, "filtered_events_table_name": { "type": "string", "description": "name of filtered events table, if not provided it will not be generated" }, "filtered_events_key": { "type": "string", "enum": [ "string", "composite", "hash" ], "description": "merge key of the filtered events table, string (event_id and model name), composite (event_id and event_table_id), or hash (fixed width md5 of both), default string" }, "generate_tests": { "type": "boolean", "description": "generate window_unique and window_not_null tests of the incremental event, users, and filtered events models, default false" }, "users_table_name": { "type": "string", "description": "name of users table, default events_users if user schema(s) provided" }, "validate_schemas": { "type": "boolean", "description": "if you want to validate schemas loaded from each iglu registry or not, default true" }, "overwrite": { "type": "boolean", "description": "overwrite existing model files or not, default true" }, "models_folder": { "type": "string", "description": "folder under models/ to place the models, default snowplow_normalized_events" }, "models_prefix": { "type": "string", "description": "prefix used for models when table_name is not provided, use '' for no prefix, default snowplow" }, "precompute_projection": { "type": "boolean", "description": "resolve the column expressions for each warehouse in the script instead of at compile time, an overridden snakeify_case macro is not applied and compilation fails if it would change a column name, default false" }, "flatten_nested_depth": { "type": "integer", "minimum": 0, "description": "how many levels of nested object properties to flatten into their own columns, e.g. parent_child, default 0" }, "flatten_nested_overrides": { "type": "object", "additionalProperties": { "type": "integer", "minimum": 0 }, "description": "flatten depth for specific schemas, keyed by `iglu:com.` type url, overrides flatten_nested_depth" }, "precise_types": { "type": "boolean", "description": "use the format, maxLength, minimum/maximum, and enum of each property to type columns e.g. timestamp, date, int, varchar(n), default false" }, "incremental_strategy": { "type": "string", "enum": [ "merge", "delete+insert" ], "description": "incremental strategy for all event models, mapped to the closest strategy each warehouse supports, default the warehouse default (merge)" }, "include_properties": { "type": "object", "additionalProperties": { "type": "array", "items": { "type": "string" } }, "description": "glob patterns of the properties to include for specific schemas, keyed by `iglu:com.` type url, default all properties" }, "exclude_properties": { "type": "object", "additionalProperties": { "type": "array", "items": { "type": "string" } }, "description": "glob patterns of the properties to exclude for specific schemas, keyed by `iglu:com.` type url, applied after include_properties" } }, "required": [ "resolver_file_path" ], "additionalProperties": False }, "events": { "type": "array", "items": { "type": "object", "properties": { "event_names": { "type": "array", "items": { "type": "string", "minItems": 1 }, "description": "name(s) of the event type(s), value of the event_name column in your warehouse" }, "event_columns": { "type": "array", "items": { "type": "string" }, "description": "array of strings of flat column names from the events table to include in the model" }, "self_describing_event_schemas": { "type": "array", "items": { "type": "string" }, "description": "`iglu:com.` type url(s) for the self-describing event(s) to include in the model" }, "self_describing_event_aliases": { "type": "array", "items": { "type": "string" }, "description": "array of strings of prefixes to the column alias for self describing events" }, "context_schemas": { "type": "array", "items": { "type": "string" }, "description": "array of strings of `iglu:com.` type url(s) for the context/entities to include in the model" }, "context_aliases": { "type": "array", "items": { "type": "string" }, "description": "array of strings of prefixes to the column alias for context/entities" }, "table_name": { "type": "string", "description": "name of the model, default is the event_name" }, "version": { "type": "string", "minLength": 1, "maxLength": 1, "description": "version number to append to table name, if (one) self_describing_event_schema is provided uses major version number from that, default 1" }, "incremental_strategy": { "type": "string", "enum": [ "merge", "delete+insert" ], "description": "incremental strategy for this model, overrides the strategy in config" }, "materialization": { "type": "string", "enum": [ "incremental", "table", "view" ], "description": "materialization of the model, table and view read all events since snowplow__start_date from snowplow__events, filtered and deduplicated, instead of only the new events, default incremental" }, "hot_properties": { "type": "array", "items": { "type": "string" }, "minItems": 1, "description": "glob patterns of the self describing event and context properties to keep in the model, the other properties are split into a <model>_cold model keyed by event_id and collector_tstamp" }, "rollups": { "type": "array", "items": { "type": "object", "properties": { "table_name": { "type": "string", "description": "name of the rollup model, default the event model name with a _daily suffix" }, "dimensions": { "type": "array", "items": { "type": "string" }, "description": "columns of the event model to group by, as well as the day" }, "measures": { "type": "array", "items": { "type": "object", "properties": { "type": { "type": "string", "enum": [ "count", "count_distinct", "sum", "hll_sketch" ], "description": "count of events, approximate count distinct, sum, or a sketch of the distinct values of the column" }, "column": { "type": "string", "description": "column of the event model to aggregate, required unless type is count" }, "alias": { "type": "string", "description": "name of the measure column" } }, "required": [ "type" ], "if": { "properties": { "type": { "const": "count" } } }, "else": { "required": [ "type", "column" ] }, "additionalProperties": False }, "minItems": 1 } }, "required": [ "measures" ], "additionalProperties": False }, "description": "daily rollup models of the event model, each rebuilds the days with events in the run" } }, "if": { "properties": { "event_names": { "minItems": 2 } } }, "then": { "anyOf": [ { "required": [ "event_names", "self_describing_event_schemas", "version", "table_name" ] }, { "required": [ "event_names", "context_schemas", "version", "table_name" ] }, { "required": [ "event_names", "event_columns", "version", "table_name" ] } ] }, "else": { "anyOf": [ { "required": [ "event_names", "self_describing_event_schemas" ] }, { "required": [ "event_names", "context_schemas" ] }, { "required": [ "event_names", "event_columns" ] } ] }, "additionalProperties": False }, "minItems": 1 }, "users": { "type": "object", "properties": { "user_id": { "type": "object", "properties": { "id_column": { "type": "string", "description": "name of column or attribute in the schema that defines your user_id, will be converted to a string in Snowflake" }, "id_self_describing_event_schema": { "type": "string", "description": "`iglu:com.` type url for the self-describing event schema that your user_id column is in, used over id_context_schema if both provided" }, "id_context_schema": { "type": "string", "description": "`iglu:com.` type url for the context schema that your user_id column is in" }, "alias": { "type": "string", "description": "alias to apply to the id column" } }, "additionalProperties": False, "required": [ "id_column" ] }, "user_contexts": { "type": "array", "items": { "type": "string", "description": "array of strings of iglu:com. type url(s) for the context/entities to add to your users table as columns" } }, "user_columns": { "type": "array", "items": { "type": "string", "description": "array of strings of flat column names from the events table to include in the model" } } }, "anyOf" : [ {"required": [ "user_contexts" ]}, {"required": [ "user_columns" ]} ], "additionalProperties": False } }, "additionalProperties": False, "type": "object", "required": [ "config", "events" ]}
 
 config_help = """
 JSON Config file structure:
@@ -295,11 +907,20 @@ JSON Config file structure:
     "config":{
         "resolver_file_path": <required - string: relative path to your resolver config json, or "default" to use iglucentral only>,
         "filtered_events_table_name": <optional - string: name of filtered events table, if not provided it will not be generated>,
+        "filtered_events_key": <optional - string: one of string, composite, hash, the merge key of the filtered events table, composite and hash store an event_table_id instead of the model name and generate a <filtered_events_table_name>_tables model mapping ids to names, default string>,
+        "generate_tests": <optional - boolean: generate window_unique and window_not_null tests of the incremental event, users, and filtered events models in snowplow_normalize_tests.yml, tested from the lower limit of the last run unless snowplow__test_full_history is set, default false>,
         "users_table_name": <optional - string: name of users table, default events_users if user schema(s) provided>,
         "validate_schemas": <optional - boolean: if you want to validate schemas loaded from each iglu registry or not, default true>,
         "overwrite": <optional - boolean: overwrite existing model files or not, default true>,
         "models_folder": <optional - string: folder under models/ to place the models, default snowplow_normalized_events>,
-        "models_prefix": <optional - string: prefix used for models when table_name is not provided, use '' for no prefix, default snowplow>
+        "models_prefix": <optional - string: prefix used for models when table_name is not provided, use '' for no prefix, default snowplow>,
+        "precompute_projection": <optional - boolean: resolve the column expressions for each warehouse in the script instead of at compile time, an overridden snakeify_case macro is not applied and compilation fails if it would change a column name, default false>,
+        "flatten_nested_depth": <optional - integer: how many levels of nested object properties to flatten into their own columns, e.g. parent_child, default 0>,
+        "flatten_nested_overrides": <optional - object: flatten depth for specific schemas, keyed by `iglu:com.` type url, overrides flatten_nested_depth>,
+        "precise_types": <optional - boolean: use the format, maxLength, minimum/maximum, and enum of each property to type columns e.g. timestamp, date, int, varchar(n), default false>,
+        "incremental_strategy": <optional - string: one of merge, delete+insert, the incremental strategy for all event models, mapped to the closest strategy each warehouse supports, default the warehouse default (merge)>,
+        "include_properties": <optional - object: glob patterns of the properties to include for specific schemas, keyed by `iglu:com.` type url, default all properties>,
+        "exclude_properties": <optional - object: glob patterns of the properties to exclude for specific schemas, keyed by `iglu:com.` type url, applied after include_properties>
     },
     "events":[
         {
@@ -310,7 +931,23 @@ JSON Config file structure:
             "context_schemas": <optional (>=1 of) - array: array of strings of `iglu:com.` type url(s) for the context/entities to include in the model>,
             "context_aliases": <optional - array: array of strings of prefixes to the column alias for context/entities>,
             "table_name": <optional if only 1 event name, otherwise required - string: name of the model, default is the event_name>,
-            "version": <optional if only 1 event name, otherwise required - string (length 1): version number to append to table name, if (one) self_describing_event_schema is provided uses major version number from that, default 1>
+            "version": <optional if only 1 event name, otherwise required - string (length 1): version number to append to table name, if (one) self_describing_event_schema is provided uses major version number from that, default 1>,
+            "incremental_strategy": <optional - string: one of merge, delete+insert, incremental strategy for this model, overrides the strategy in config>,
+            "materialization": <optional - string: one of incremental, table, view, table and view read all events since snowplow__start_date from snowplow__events, filtered and deduplicated, instead of only the new events, default incremental>,
+            "hot_properties": <optional - array: glob patterns of the self describing event and context properties to keep in the model, the other properties are split into a <model>_cold model with the same event_id and collector_tstamp, so common queries read a narrow table>,
+            "rollups": <optional - array: daily rollup models of the event model, each rebuilds the days with events in the run>[
+                {
+                    "table_name": <optional - string: name of the rollup model, default the event model name with a _daily suffix>,
+                    "dimensions": <optional - array: columns of the event model to group by, as well as the day>,
+                    "measures": <required - array: the measures of the rollup>[
+                        {
+                            "type": <required - string: one of count, count_distinct, sum, hll_sketch, the count of events, an approximate count distinct, a sum, or a sketch of the distinct values that can be combined across days (not DuckDB)>,
+                            "column": <optional if type is count, otherwise required - string: column of the event model to aggregate>,
+                            "alias": <optional - string: name of the measure column, default n_events, approx_distinct_<column>, sum_<column>, or <column>_sketch>
+                        }
+                    ]
+                }
+            ]
         },
         {
             ...
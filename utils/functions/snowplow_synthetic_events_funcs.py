@@ -0,0 +1,176 @@
+from datetime import datetime
+import argparse
+
+verboseprint = lambda *a, **k: None
+
+def duckdb_type(field_type: str) -> str:
+    """Get the DuckDB type of a field from its schema type
+
+    Args:
+        field_type (str): The type of the field, as returned by get_types or get_precise_types
+
+    Returns:
+        str: The DuckDB type, free-form objects are stored as json and arrays as a list of strings
+    """
+    base_type = (field_type or 'string').split('(')[0]
+    return duckdb_types.get(base_type, 'varchar')
+
+def value_expression(field_type: str, salt: str, tstamp: str = 'collector_tstamp') -> str:
+    """Get a SQL expression for a deterministic pseudo-random value of a field for row i
+
+    Args:
+        field_type (str): The type of the field, as returned by get_types or get_precise_types
+        salt (str): A value unique to the field, so each field gets different values for the same row
+        tstamp (str, optional): The expression of the timestamp of the row, used for timestamp and date fields. Defaults to 'collector_tstamp'.
+
+    Returns:
+        str: The SQL expression for the value
+    """
+    hashed = f"hash(i, '{salt}')"
+    cur_type = duckdb_type(field_type)
+    if cur_type == 'varchar':
+        value = f"'{salt.split('.')[-1]}_' || ({hashed} % 100)::varchar"
+    elif cur_type in ['integer', 'bigint']:
+        value = f'({hashed} % 1000)::{cur_type}'
+    elif cur_type == 'double':
+        value = f'({hashed} % 100000) / 100.0'
+    elif cur_type == 'boolean':
+        value = f'{hashed} % 2 = 0'
+    elif cur_type == 'timestamp':
+        value = f'{tstamp} - to_seconds(({hashed} % 86400)::bigint)'
+    elif cur_type == 'date':
+        value = f'cast({tstamp} as date)'
+    elif cur_type == 'varchar[]':
+        value = f"['item_' || ({hashed} % 10)::varchar]"
+    else:
+        value = f"json_object('id', ({hashed} % 100)::integer)"
+    return value
+
+def struct_expression(keys: list, types: list, salt: str, tstamp: str = 'collector_tstamp') -> str:
+    """Get a SQL expression for a struct with a value for each key, with dot separated keys nested in their own struct
+
+    Args:
+        keys (list): The snake case keys of the struct, nested keys are a dot separated path
+        types (list): The type of each key
+        salt (str): A value unique to the column, so each column gets different values for the same keys
+        tstamp (str, optional): The expression of the timestamp of the row. Defaults to 'collector_tstamp'.
+
+    Returns:
+        str: The SQL expression for the struct
+    """
+    # Group the keys by their first part, keeping the order they first appear
+    fields = {}
+    for key, key_type in zip(keys, types):
+        first, _, rest = key.partition('.')
+        fields.setdefault(first, []).append((rest, key_type))
+    parts = []
+    for field, children in fields.items():
+        if len(children) == 1 and children[0][0] == '':
+            parts.append(f'{field} := {value_expression(children[0][1], salt + "." + field, tstamp)}')
+        else:
+            parts.append(f'{field} := {struct_expression([child for child, _ in children], [child_type for _, child_type in children], salt + "." + field, tstamp)}')
+    return 'struct_pack(' + ', '.join(parts) + ')'
+
+def add_column_spec(column_specs: dict, cols: list, keys: list, types: list, event_names: list = None) -> None:
+    """Add the sde or context columns of an event to the column specs, merging the keys and event names of columns already present
+
+    Args:
+        column_specs (dict): The column specs to add to, keyed by column name
+        cols (list): The columns, as returned by get_cols_keys_types_aliases
+        keys (list): The snake case keys of each column
+        types (list): The types of the keys of each column
+        event_names (list, optional): The event names the columns are populated for, None for all events. Defaults to None.
+    """
+    for col, col_keys, col_types in zip(cols or [], keys or [], types or []):
+        # Events are loaded with a column per major version, drop 2 last _X values
+        col_major = '_'.join(col.split('_')[:-2]).lower()
+        spec = column_specs.setdefault(col_major, {'keys': [], 'types': [], 'event_names': [], 'all_events': False})
+        for key, key_type in zip(col_keys, col_types):
+            if key not in spec['keys']:
+                spec['keys'].append(key)
+                spec['types'].append(key_type)
+        if event_names is None:
+            spec['all_events'] = True
+        else:
+            spec['event_names'].extend([name for name in event_names if name not in spec['event_names']])
+
+def build_events_query(event_names: list, column_specs: dict, flat_cols: list, rows: int, start: datetime, days: int, users: int = 10000, duplicate_rate: float = 0.0) -> str:
+    """Build the query to generate the synthetic events, one row per value of i
+
+    Args:
+        event_names (list): The event names to generate, spread evenly over the rows
+        column_specs (dict): The sde and context columns, as built by add_column_spec
+        flat_cols (list): Extra atomic columns to populate with strings
+        rows (int): The number of rows to generate
+        start (datetime): The collector_tstamp of the first event
+        days (int): The number of days to spread the events over
+        users (int, optional): The number of distinct users. Defaults to 10000.
+        duplicate_rate (float, optional): The fraction of rows that repeat the event_id of an earlier row, to exercise deduplication. Defaults to 0.0.
+
+    Returns:
+        str: The select statement for the events
+    """
+    span_microseconds = days * 24 * 60 * 60 * 1000000
+    tstamp = f"timestamp '{start.strftime('%Y-%m-%d %H:%M:%S')}' + to_microseconds((i * {span_microseconds} // {rows})::bigint)"
+    # A row is a copy when its hash is under the rate, and takes the event_id of the latest row before it that isn't a copy
+    event_id_row = f"coalesce(max(case when hash(i, 'duplicate') % 10000 >= {round(duplicate_rate * 10000)} then i end) over (order by i), i)" if duplicate_rate > 0 else 'i'
+    names = "['" + "', '".join(event_names) + "']"
+    columns = [
+        f'md5(({event_id_row})::varchar) as event_id',
+        f'{names}[(i % {len(event_names)}) + 1] as event_name',
+        "'synthetic' as app_id",
+        "'web' as platform",
+        f'{tstamp} as collector_tstamp',
+        f'{tstamp} - interval 1 second as dvce_created_tstamp',
+        f'{tstamp} as dvce_sent_tstamp',
+        f'{tstamp} - interval 1 second as derived_tstamp',
+        f'{tstamp} + interval 1 minute as etl_tstamp',
+        f"'user_' || (hash(i, 'user_id') % {users})::varchar as user_id",
+        f"'domain_user_' || (hash(i, 'user_id') % {users})::varchar as domain_userid",
+    ]
+    standard_cols = ['event_id', 'event_name', 'app_id', 'platform', 'collector_tstamp', 'dvce_created_tstamp', 'dvce_sent_tstamp', 'derived_tstamp', 'etl_tstamp', 'user_id', 'domain_userid']
+    for col in flat_cols:
+        if col.lower() not in standard_cols:
+            columns.append(f"'{col.lower()}_' || (hash(i, '{col.lower()}') % 100)::varchar as {col.lower()}")
+            standard_cols.append(col.lower())
+    for col, spec in column_specs.items():
+        value = struct_expression(spec['keys'], spec['types'], col, tstamp)
+        # Contexts are an array of entities, only the first is used by the models
+        if col.startswith('contexts_'):
+            value = f'[{value}]'
+        if spec['all_events']:
+            columns.append(f'{value} as {col}')
+        else:
+            columns.append(f"case when {names}[(i % {len(event_names)}) + 1] in ('" + "', '".join(spec['event_names']) + f"') then {value} end as {col}")
+    return 'select\n    ' + ',\n    '.join(columns) + f'\nfrom range({rows}) as t(i)'
+
+def parse_args(args: list):
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter, description = 'Generate a synthetic Snowplow events table in DuckDB, with the self describing event and context columns of your configuration file, to run the normalize package locally at scale')
+    parser.add_argument('config', help = 'relative path to your configuration file, the same as used to generate the models')
+    parser.add_argument('--rows', dest = 'rows', type = int, default = 1000000, help = 'number of events to generate, default 1000000')
+    parser.add_argument('--start', dest = 'start', default = '2022-10-01', help = 'collector_tstamp of the first event, YYYY-MM-DD, default 2022-10-01')
+    parser.add_argument('--days', dest = 'days', type = int, default = 7, help = 'number of days to spread the events over, default 7')
+    parser.add_argument('--users', dest = 'users', type = int, default = 10000, help = 'number of distinct users, default 10000')
+    parser.add_argument('--duplicateRate', dest = 'duplicateRate', type = float, default = 0.0, help = 'fraction of events with a duplicated event_id, default 0')
+    parser.add_argument('--database', dest = 'database', default = 'synthetic_events.duckdb', help = 'DuckDB database file to write to, default synthetic_events.duckdb')
+    parser.add_argument('--schema', dest = 'schema', default = 'atomic', help = 'schema of the events table, default atomic')
+    parser.add_argument('--table', dest = 'table', default = 'events', help = 'name of the events table, default events')
+    parser.add_argument('-v', '--verbose', dest = 'verbose', action = 'store_true', default = False, help = 'verbose flag for the running of the tool')
+    parser.add_argument('--dryRun', dest = 'dryRun', action = 'store_true', default = False, help = 'flag for a dry run (prints the query only)')
+    return parser.parse_args(args)
+
+# Lookups
+duckdb_types = {
+    "string": "varchar",
+    "varchar": "varchar",
+    "integer": "bigint",
+    "int": "integer",
+    "bigint": "bigint",
+    "number": "double",
+    "double": "double",
+    "boolean": "boolean",
+    "timestamp": "timestamp",
+    "date": "date",
+    "array": "varchar[]",
+    "object": "json"
+}
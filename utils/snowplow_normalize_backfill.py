@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functions.snowplow_backfill_funcs import *
+
+## NOTE ##
+# Each chunk runs in its own scratch schema (suffixed with the worker slot) and target path, so chunks do not overwrite each other's this run tables
+# The manifest is only moved forward to the end of the contiguous block of completed chunks, so an interrupted backfill can be resumed by running the same command again
+# If a model doesn't have a table yet the first chunk runs on its own to create it, otherwise parallel chunks would each create (and replace) the table
+# With snowplow__skip_empty_models each chunk also rebuilds the event counts, models only skip on counts built in the same dbt run
+# Parallel merges into the same table can conflict, a chunk that fails on a conflict is retried while holding a lock so retries run one at a time
+
+##############
+# Parse args #
+##############
+args = parse_args(sys.argv[1:])
+
+####################################
+# Check running from dbt proj root #
+####################################
+if not os.path.isdir('models') or not os.path.isfile('dbt_project.yml'):
+    raise FileNotFoundError('Not in a valid root dbt project folder, please run from the folder containing dbt_project.yml')
+
+# Overwrite default verboseprint now we have flag
+verboseprint = print if args.verbose else lambda *a, **k: None
+
+if args.workers < 1:
+    raise ValueError('--workers must be at least 1.')
+if args.retries < 0:
+    raise ValueError('--retries must be at least 0.')
+
+start = parse_date(args.start)
+end = parse_date(args.end)
+if start >= end:
+    raise ValueError(f'Start date {args.start} must be before end date {args.end}.')
+
+#############################
+# Get status to resume from #
+#############################
+verboseprint('Getting backfill status from the manifest...')
+status_result = run_command(build_operation_command(args.dbt, 'get_backfill_status', {'models': args.models}, args.target))
+if status_result.returncode != 0:
+    print(status_result.stdout)
+    raise RuntimeError('Unable to get the status of the models from the manifest.')
+status = parse_status_output(status_result.stdout)
+missing_models = parse_missing_output(status_result.stdout)
+event_counts = parse_counts_output(status_result.stdout)
+for model, last_success in status.items():
+    verboseprint(f'Model {model} last success: {last_success}')
+
+resume_start = get_resume_start(start, status, args.force)
+if resume_start >= end:
+    print('All models already processed up to the end date, nothing to backfill. Use --force to re-process them.')
+    quit()
+if resume_start > start:
+    print(f'Resuming backfill from {format_tstamp(resume_start)}')
+
+chunks = plan_chunks(resume_start, end, args.chunkDays)
+print(f'Backfilling {len(args.models)} model(s) in {len(chunks)} chunk(s) of up to {args.chunkDays} day(s), {args.workers} at a time')
+# Nothing to gain from running the first chunk on its own with a single worker
+create_first = len(missing_models) > 0 and args.workers > 1 and len(chunks) > 1
+if create_first:
+    print(f'Model(s) {missing_models} have no table yet, running the first chunk on its own to create them')
+
+if args.dryRun:
+    for i, chunk in enumerate(chunks):
+        print(' '.join(build_run_command(args.dbt, args.models, chunk, i % args.workers, args.target, event_counts = event_counts)))
+    quit()
+
+##################
+# Process chunks #
+##################
+completed = set()
+manifest_watermark = None
+total_rows = 0
+free_slots = list(range(args.workers))
+slot_lock = threading.Lock()
+retry_lock = threading.Lock()
+
+def run_chunk(chunk: tuple, slot: int) -> tuple:
+    chunk_start = time.time()
+    result = run_command(build_run_command(args.dbt, args.models, chunk, slot, args.target, event_counts = event_counts))
+    elapsed = time.time() - chunk_start
+    run_results = os.path.join('target', f'backfill_{slot}', 'run_results.json')
+    rows, _, failures = parse_run_results(run_results) if os.path.exists(run_results) else (0, 0.0, [])
+    return (result, elapsed, rows, failures)
+
+def process_chunk(i: int, chunk: tuple) -> tuple:
+    with slot_lock:
+        slot = free_slots.pop()
+    try:
+        result, elapsed, rows, failures = run_chunk(chunk, slot)
+        retries = 0
+        # Re-running a chunk is safe as every model merges on its unique key
+        while (result.returncode != 0 or len(failures) > 0) and retries < args.retries and is_concurrent_update_error(result.stdout):
+            retries += 1
+            print(f'Chunk {format_tstamp(chunk[0])} to {format_tstamp(chunk[1])} conflicted with a concurrent update, retrying ({retries}/{args.retries})')
+            with retry_lock:
+                result, elapsed, rows, failures = run_chunk(chunk, slot)
+        if result.returncode != 0 or len(failures) > 0:
+            verboseprint(result.stdout)
+            raise RuntimeError(f'Chunk {format_tstamp(chunk[0])} to {format_tstamp(chunk[1])} failed: {failures or result.stdout[-500:]}')
+        return (i, elapsed, rows)
+    finally:
+        with slot_lock:
+            free_slots.append(slot)
+
+def record_chunk(i: int, elapsed: float, rows: int):
+    global total_rows, manifest_watermark
+    total_rows += rows
+    print(format_throughput(chunks[i], elapsed, rows))
+    # Record the contiguous progress so a failed or interrupted backfill can resume
+    completed.add(i)
+    watermark = contiguous_watermark(chunks, completed)
+    if watermark is not None and watermark != manifest_watermark:
+        update_result = run_command(build_operation_command(args.dbt, 'update_backfill_manifest', {'models': args.models, 'last_success': format_tstamp(watermark)}, args.target))
+        if update_result.returncode != 0:
+            print(update_result.stdout)
+            raise RuntimeError('Unable to update the manifest with the backfill progress.')
+        manifest_watermark = watermark
+
+backfill_start = time.time()
+if create_first:
+    record_chunk(*process_chunk(0, chunks[0]))
+with ThreadPoolExecutor(max_workers = args.workers) as executor:
+    futures = [executor.submit(process_chunk, i, chunk) for i, chunk in enumerate(chunks) if i not in completed]
+    try:
+        for future in as_completed(futures):
+            record_chunk(*future.result())
+    except BaseException:
+        # Don't start any more chunks, those in flight will finish but won't be recorded so they are re-run on resume
+        for future in futures:
+            future.cancel()
+        raise
+
+total_elapsed = time.time() - backfill_start
+print(f'Finished backfill of {len(chunks)} chunk(s) in {total_elapsed:.1f}s, {total_rows} rows ({total_rows / total_elapsed if total_elapsed > 0 else 0:.0f} rows/s)')
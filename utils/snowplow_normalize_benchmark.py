@@ -0,0 +1,34 @@
+import sys
+import itertools
+from functions.snowplow_benchmark_funcs import *
+
+## NOTE ##
+# Times are of rendering the macros in plain jinja, without the overhead of dbt itself, so compare them between versions of the macros rather than to the time of a dbt compile.
+# Each scenario is rendered in a fresh environment, so the column cache is shared across the models of a scenario as it is across the models of one dbt invocation
+
+##############
+# Parse args #
+##############
+args = parse_args(sys.argv[1:])
+
+# Overwrite default verboseprint now we have flag
+verboseprint = print if args.verbose else lambda *a, **k: None
+
+if min(args.models + args.schemas + args.keys) < 1:
+    raise ValueError('--models, --schemas, and --keys must be at least 1.')
+if not os.path.isdir(args.macrosPath):
+    raise FileNotFoundError(f'Macros folder {args.macrosPath} not found.')
+
+#################
+# Run scenarios #
+#################
+results = []
+for warehouse, n_models, n_schemas, n_keys in itertools.product(args.warehouses, args.models, args.schemas, args.keys):
+    results.extend(benchmark_scenario(args.macrosPath, warehouse, n_models, n_schemas, n_keys))
+
+print(format_results(results))
+
+if args.output is not None:
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f'Saved results to {args.output}')
@@ -39,6 +39,8 @@ if not validate_json(config, schema = config_schema, validate = True):
 
 # Parse config values
 filtered_events_table_name = config.get('config').get('filtered_events_table_name')
+filtered_events_key = config.get('config').get('filtered_events_key') or 'string'
+generate_tests = config.get('config').get('generate_tests') or False
 event_names = []
 sde_urls = []
 sde_aliases = []
@@ -47,6 +49,10 @@ flat_cols = []
 context_aliases = []
 table_names = []
 versions = []
+incremental_strategies = []
+materializations = []
+rollups = []
+hot_properties = []
 for event in config.get('events'):
     # Check for things you can't in jsonschema i.e. lengths match. Also check aliases only provided if schema is to avoid overly complex schema rules
     if event.get('self_describing_event_aliases') is not None:
@@ -70,6 +76,10 @@ for event in config.get('events'):
     context_aliases.append(event.get('context_aliases'))
     table_names.append(event.get('table_name'))
     versions.append(event.get('version'))
+    incremental_strategies.append(event.get('incremental_strategy') or config.get('config').get('incremental_strategy'))
+    materializations.append(event.get('materialization') or 'incremental')
+    rollups.append(event.get('rollups'))
+    hot_properties.append(event.get('hot_properties'))
 
 
 # Parse users
@@ -100,17 +110,38 @@ resolver_file_path = config.get('config').get('resolver_file_path')
 models_folder = config.get('config').get('models_folder') or 'snowplow_normalized_events'
 user_table_name = config.get('config').get('users_table_name') or 'snowplow_events_users'
 models_prefix = config.get('config').get('models_prefix') or 'snowplow'
+precompute_projection = config.get('config').get('precompute_projection') or False
+flatten_nested_depth = config.get('config').get('flatten_nested_depth') or 0
+flatten_nested_overrides = config.get('config').get('flatten_nested_overrides') or {}
+precise_types = config.get('config').get('precise_types') or False
+include_properties = config.get('config').get('include_properties') or {}
+exclude_properties = config.get('config').get('exclude_properties') or {}
+
+# Load the column profile, to find the properties that are never populated
+profile = None
+property_null_rates = {}
+if args.applyProfile and args.profileReport is None:
+    raise ValueError('--applyProfile requires a column profile, please provide one with --profileReport.')
+if args.profileReport is not None:
+    if not os.path.exists(args.profileReport):
+        raise FileNotFoundError(f'File {args.profileReport} not found.')
+    verboseprint('Loading column profile...')
+    with open(args.profileReport, 'r') as f:
+        profile = json.load(f)
 
 # Run Cleanup if required
 if args.cleanUp:
-    cleanup_models(event_names, sde_urls, versions, table_names, models_prefix, models_folder, user_table_name, filtered_events_table_name, args.dryRun)
+    cleanup_models(event_names, sde_urls, versions, table_names, models_prefix, models_folder, user_table_name, filtered_events_table_name, args.dryRun, filtered_events_key, rollups, hot_properties)
 
 model_names = generate_names(event_names, sde_urls, versions, table_names, models_prefix)
+rollup_names = get_rollup_names(model_names, rollups)
+cold_names = get_cold_names(model_names, hot_properties)
 
 # Check for duplicate model names
 seen = set()
 dupes = []
-for x in model_names + [filtered_events_table_name, user_table_name]:
+filtered_events_tables_name = filtered_events_table_name + '_tables' if filtered_events_table_name is not None and filtered_events_key != 'string' else None
+for x in model_names + rollup_names + cold_names + [filtered_events_table_name, user_table_name] + ([filtered_events_tables_name] if filtered_events_tables_name is not None else []):
     if x in seen:
         dupes.append(x)
     else:
@@ -123,42 +154,19 @@ if len(dupes) > 0:
 # Load resolver and get schemas #
 #################################
 
-# Load the resolver config to get list of regestries, and validate the structure
+# Load the resolver config, then get the list of all schemas on each registry (in priority order) for comparison later
 if resolver_file_path != 'default':
     verboseprint('Loading resolver...')
-    if not os.path.exists(resolver_file_path):
-        raise FileNotFoundError(f'File {resolver_file_path} not found, to use default Iglu Central please set value to "default".')
-    try:
-        with open(resolver_file_path, 'r') as f:
-            iglu_resolver_parsed = json.load(f)
-    except json.decoder.JSONDecodeError:
-        print(f'Error parsing resolver config at {resolver_file_path}, please ensure this a valid JSON file.')
-        raise
-else:
-    iglu_resolver_parsed = default_resolver
-
-if not validate_json(iglu_resolver_parsed.get('data'), schema = resolver_schema, validate = True):
-    raise ValueError(f'Resolver config at {resolver_file_path} is not valid, see https://docs.snowplow.io/docs/pipeline-components-and-applications/iglu/iglu-resolver/ for more details.')
-
-# Loop over all registries and get the priority and list of all schemas on that registry for comparison later, store api keys as well
 verboseprint('Getting schema lists from registries...')
-for repo in iglu_resolver_parsed.get('data').get('repositories'):
-    # Get uri and netloc
-    repo_uri = repo.get('connection').get('http').get('uri')
-    parsed_uri = urlparse(repo_uri)
-    repo_netloc = parsed_uri.netloc
-    priority.append(repo.get('priority'))
-    # Store the api key if it's needed, None if it doesn't exist
-    repo_key = repo.get('connection').get('http').get('apikey')
-    if repo_key is not None and repo_uri[-4:] != '/api':
-        raise KeyError(f'A private registry uri should end in "/api", {repo_uri} does not, see https://docs.snowplow.io/docs/pipeline-components-and-applications/iglu/iglu-resolver/ for more details.')
-    repo_keys[repo_netloc] = repo_key
-    # Get all schemas in each repo
-    repo_schemas = get_schema(repo_uri + '/schemas', repo_keys)
-    schemas_list[repo_uri] = repo_schemas
-
-# Organise list in order of priority
-schemas_list = {x[0]: x[1] for _, x in sorted(zip(priority, schemas_list.items()))}
+schemas_list = get_registry_schemas(resolver_file_path)
+
+# Load the columns of each model from when they were last generated, to report the columns added or removed
+column_state_path = os.path.join('models', models_folder, column_state_file)
+previous_columns = {}
+if os.path.exists(column_state_path):
+    with open(column_state_path, 'r') as f:
+        previous_columns = json.load(f)
+model_columns = {}
 
 ######################
 # Produce each model #
@@ -186,28 +194,57 @@ for i in range(len(event_names)):
     context_alias = context_aliases[i]
     sde_alias = sde_aliases[i]
 
-    sde_cols, sde_keys, sde_types, sde_alias = get_cols_keys_types_aliases(sde_url, sde_alias, 'UNSTRUCT_EVENT_', schemas_list, repo_keys, validate_schemas)
-    context_cols, context_keys, context_types, context_alias = get_cols_keys_types_aliases(context_url, context_alias, 'CONTEXTS_', schemas_list, repo_keys, validate_schemas)
-
+    sde_cols, sde_keys, sde_types, sde_alias = get_cols_keys_types_aliases(sde_url, sde_alias, 'UNSTRUCT_EVENT_', schemas_list, repo_keys, validate_schemas, flatten_nested_depth, flatten_nested_overrides, precise_types, include_properties, exclude_properties)
+    context_cols, context_keys, context_types, context_alias = get_cols_keys_types_aliases(context_url, context_alias, 'CONTEXTS_', schemas_list, repo_keys, validate_schemas, flatten_nested_depth, flatten_nested_overrides, precise_types, include_properties, exclude_properties)
+    if profile is not None:
+        profile_names = [model_name] + get_cold_names([model_name], [hot_properties[i]])
+        sde_null_rates = get_property_null_rates(profile, profile_names, sde_keys, sde_alias)
+        context_null_rates = get_property_null_rates(profile, profile_names, context_keys, context_alias)
+        update_property_null_rates(property_null_rates, sde_url, sde_keys, sde_null_rates)
+        update_property_null_rates(property_null_rates, context_url, context_keys, context_null_rates)
+        if args.applyProfile:
+            sde_keys, sde_types = prune_unused_keys(sde_keys, sde_types, sde_null_rates)
+            context_keys, context_types = prune_unused_keys(context_keys, context_types, context_null_rates)
+    # Split the properties that are not hot into a cold model, extracted by the same macro so the two can be joined on event_id
+    cold_part = None
+    if hot_properties[i] is not None:
+        (sde_cols, sde_keys, sde_types, sde_alias), cold_sde = split_hot_columns(sde_cols, sde_keys, sde_types, sde_alias, hot_properties[i])
+        (context_cols, context_keys, context_types, context_alias), cold_context = split_hot_columns(context_cols, context_keys, context_types, context_alias, hot_properties[i])
+        # A cold model with no properties would only repeat the event_id and collector_tstamp of every event
+        if cold_sde[0] is None and cold_context[0] is None:
+            cold_names.remove(model_name + '_cold')
+            verboseprint(f'All properties of {model_name} are hot, skipping its cold model')
+            if os.path.exists(os.path.join('models', models_folder, model_name + '_cold.sql')):
+                print(f'Model {model_name}_cold has no properties left so is no longer generated, delete its file and table manually if no longer needed.')
+        else:
+            cold_part = (model_name + '_cold', [], *cold_sde, *cold_context)
+    model_parts = [(model_name, flat_col, sde_cols, sde_keys, sde_types, sde_alias, context_cols, context_keys, context_types, context_alias)]
+    if cold_part is not None:
+        model_parts.append(cold_part)
+
+    for part_name, flat_col, sde_cols, sde_keys, sde_types, sde_alias, context_cols, context_keys, context_types, context_alias in model_parts:
+        filename = os.path.join('models', models_folder, part_name + '.sql')
+        model_columns[part_name] = get_model_columns(flat_col, sde_keys, sde_alias, context_keys, context_alias)
+        # Write model string
+        materialization = materializations[i]
+        model_content = get_event_model_config(materialization, incremental_strategies[i])
+        # Table and view models are rebuilt from all events each run, not just the new ones
+        tier_args = ",\n    remove_new_event_check = true,\n    events_relation = var('snowplow__events')" if materialization != 'incremental' else ''
+        if precompute_projection:
+            projection = get_projection(sde_cols, sde_keys, sde_types, sde_alias, context_cols, context_keys, context_types, context_alias)
+            model_content += f"""
+{{%- set event_names = {event_name} -%}}
+{{%- set flat_cols = {flat_col or []} -%}}
+{{%- set projection = {format_projection(projection)} -%}}
 
-    # Write model string
-    model_content = f"""{{{{ config(
-    tags = "snowplow_normalize_incremental",
-    materialized = "incremental",
-    unique_key = "event_id",
-    upsert_date_key = "collector_tstamp",
-    partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={{
-      "field": "collector_tstamp",
-      "data_type": "timestamp"
-    }}, databricks_val='collector_tstamp_date'),
-    sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt')),
-    tblproperties={{
-      'delta.autoOptimize.optimizeWrite' : 'true',
-      'delta.autoOptimize.autoCompact' : 'true'
-    }},
-    snowplow_optimize=true
+{{{{ snowplow_normalize.normalize_events_projection(
+    event_names,
+    flat_cols,
+    projection{tier_args}
 ) }}}}
-
+"""
+        else:
+            model_content += f"""
 {{%- set event_names = {event_name} -%}}
 {{%- set flat_cols = {flat_col or []} -%}}
 {{%- set sde_cols = {sde_cols or []} -%}}
@@ -229,16 +266,36 @@ for i in range(len(event_names)):
     context_cols,
     context_keys,
     context_types,
-    context_alias
+    context_alias{tier_args}
 ) }}}}
 """
 
 
-    # Write out to file
-    verboseprint(f'Model content for {model_name}, saving to {filename}:')
-    verboseprint(model_content)
-    if not args.dryRun:
-        write_model_file(filename, model_content, overwrite = overwrite)
+        # Write out to file
+        verboseprint(f'Model content for {part_name}, saving to {filename}:')
+        verboseprint(model_content)
+        if not args.dryRun:
+            write_model_file(filename, model_content, overwrite = overwrite)
+
+    # Write each rollup of the model
+    available_columns = ['event_id', 'collector_tstamp'] + model_columns[model_name]
+    for rollup in rollups[i] or []:
+        rollup_name = rollup.get('table_name') or model_name + '_daily'
+        dimensions = [dimension.lower() for dimension in rollup.get('dimensions', [])]
+        if len(set(dimensions).difference(available_columns)) > 0:
+            raise ValueError(f'Rollup {rollup_name} has dimension(s) {sorted(set(dimensions).difference(available_columns))} that are not columns of {model_name}. Columns: {available_columns}')
+        measures = get_rollup_measures(rollup.get('measures'), available_columns)
+        rollup_columns = ['rollup_date'] + dimensions + [measure['alias'] for measure in measures]
+        if len(set(rollup_columns)) != len(rollup_columns):
+            raise ValueError(f'Rollup {rollup_name} has duplicate column names, please alias the measures. Columns: {rollup_columns}')
+        model_columns[rollup_name] = rollup_columns
+
+        rollup_content = get_rollup_model(model_name, event_name, dimensions, measures)
+        rollup_filename = os.path.join('models', models_folder, rollup_name + '.sql')
+        verboseprint(f'Model content for {rollup_name}, saving to {rollup_filename}:')
+        verboseprint(rollup_content)
+        if not args.dryRun:
+            write_model_file(rollup_filename, rollup_content, overwrite = overwrite)
 
 
 ############################
@@ -247,25 +304,44 @@ for i in range(len(event_names)):
 if filtered_events_table_name is not None:
     verboseprint('Generating filtered events table model...')
     n_models = len(event_names)
+    # The composite and hash keys store a stable id per model instead of repeating the model name, so check no two models share an id
+    event_table_ids = [get_event_table_id(model) for model in model_names]
+    if len(set(event_table_ids)) != len(event_table_ids):
+        raise ValueError(f'Model names lead to a duplicate event_table_id, please rename one of the models or use filtered_events_key string. Models: {model_names}')
     filtered_model_content = f"""{{{{ config(
     tags = "snowplow_normalize_incremental",
     materialized = "incremental",
-    unique_key = "unique_id",
+    on_schema_change = "append_new_columns",
+    unique_key = {'["event_id", "event_table_id"]' if filtered_events_key == 'composite' else '"unique_id"'},
     upsert_date_key = "collector_tstamp",
+    disable_upsert_lookback = var('snowplow__disable_upsert_lookback', false),
     partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={{
       "field": "collector_tstamp",
       "data_type": "timestamp"
     }}, databricks_val='collector_tstamp_date'),
-    sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt')),
     tblproperties={{
       'delta.autoOptimize.optimizeWrite' : 'true',
       'delta.autoOptimize.autoCompact' : 'true'
     }},
     snowplow_optimize=true
 ) }}}}
+{{% call set_sql_header(config) -%}}
+{{{{ snowplow_normalize.set_query_tag() }}}}
+{{%- endcall %}}
 """
 
-    for n, (model, event_name) in enumerate(zip(model_names, event_names)):
+    # Each branch is windowed on the earlier of its event model and the filtered events table, so events of a newly added model are backfilled
+    for n, (model, event_name, event_table_id) in enumerate(zip(model_names, event_names, event_table_ids)):
+        if filtered_events_key == 'string':
+            key_cols = f"""
+    , '{model}' as event_table_name
+    , event_id||'-'||'{model}' as unique_id"""
+        else:
+            key_cols = f"""
+    , cast({event_table_id} as {{{{ dbt.type_int() }}}}) as event_table_id"""
+            if filtered_events_key == 'hash':
+                key_cols += f"""
+    , {{{{ snowplow_normalize.event_table_key('event_id', {event_table_id}) }}}} as unique_id"""
 
         filtered_model_content += f"""
 select
@@ -274,14 +350,18 @@ select
     {{% if target.type in ['databricks', 'spark'] -%}}
     , DATE(collector_tstamp) as collector_tstamp_date
     {{%- endif %}}
-    , event_name
-    , '{model}' as event_table_name
-    , event_id||'-'||'{model}' as unique_id
+    , event_name{key_cols}
 from
     {{{{ ref('snowplow_normalize_base_events_this_run') }}}}
 where
     event_name in ('{"','".join(event_name)}')
     and {{{{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}}}
+    {{% if var('snowplow__independent_model_windows', false) -%}}
+    and {{{{ snowplow_normalize.model_window_filter(model_name = ['{model}', model.name]) }}}}
+    {{%- endif %}}
+    {{% if var('snowplow__skip_empty_models', false) -%}}
+    and {{{{ snowplow_normalize.event_count_filter({event_name}) }}}}
+    {{%- endif %}}
         """
         if n != n_models -1:
             filtered_model_content += """
@@ -293,6 +373,28 @@ UNION ALL
     verboseprint(filtered_model_content)
     if not args.dryRun:
         write_model_file(filename, filtered_model_content, overwrite = overwrite)
+
+    if filtered_events_tables_name is not None:
+        verboseprint('Generating filtered events table ids model...')
+        tables_model_content = """{{ config(
+    materialized = "table"
+) }}
+{% call set_sql_header(config) -%}
+{{ snowplow_normalize.set_query_tag() }}
+{%- endcall %}
+"""
+        tables_model_content += """
+UNION ALL
+""".join([f"""
+select
+    cast({event_table_id} as {{{{ dbt.type_int() }}}}) as event_table_id
+    , '{model}' as event_table_name
+""" for model, event_table_id in zip(model_names, event_table_ids)])
+        filename = os.path.join('models', models_folder, filtered_events_tables_name + '.sql')
+        verboseprint(f'Model content for {filtered_events_tables_name}, saving to {filename}:')
+        verboseprint(tables_model_content)
+        if not args.dryRun:
+            write_model_file(filename, tables_model_content, overwrite = overwrite)
 else:
     verboseprint('No filtered events table model to generate...')
 
@@ -310,31 +412,44 @@ if user_urls is not None or user_flat_cols is not None:
                 raise ValueError(f'Validation of schema {user_urls[i]} failed.')
     # Generate final form data for insert into model
         user_cols = ['CONTEXTS_' + url_to_column(url) for url in user_url_cut]
-        user_keys = [list(user.get('properties').keys()) for user in user_jsons]
-        user_types = [get_types(user) for user in user_jsons]
+        user_properties = [filter_properties(flatten_properties(user.get('properties'), flatten_nested_overrides.get(url, flatten_nested_depth)), include_properties.get(url), exclude_properties.get(url))
+                           for url, user in zip(user_urls, user_jsons)]
+        user_keys = [list(properties.keys()) for properties in user_properties]
+        user_types = [(get_precise_types if precise_types else get_types)({'properties': properties}) for properties in user_properties]
 
         # Raise an error if user_id is in the context columns,
         for key_set in user_keys:
             for key in key_set:
-                if re.sub(r'(?<!^)(?=[A-Z])', '_', key).lower() == re.sub(r'(?<!^)(?=[A-Z])', '_', user_alias).lower():
+                if re.sub(r'(?<!^)(?=[A-Z])', '_', key.replace('.', '_')).lower() == re.sub(r'(?<!^)(?=[A-Z])', '_', user_alias).lower():
                     raise KeyError(f'The user id alias ({user_alias}) exists as a key in one of your contexts (once converted to snakecase), please provide an alternative user id alias in the users section of your config.')
 
+        if profile is not None:
+            user_null_rates = get_property_null_rates(profile, [user_table_name], user_keys, None)
+            update_property_null_rates(property_null_rates, user_urls, user_keys, user_null_rates)
+            if args.applyProfile:
+                user_keys, user_types = prune_unused_keys(user_keys, user_types, user_null_rates)
+
+    model_columns[user_table_name] = get_model_columns(user_flat_cols, user_keys if user_urls is not None else None, None, None, None)
+
     users_model_content = f"""{{{{ config(
     tags = "snowplow_normalize_incremental",
     materialized = "incremental",
+    on_schema_change = "append_new_columns",
     unique_key = "{user_alias}",
     upsert_date_key = "latest_collector_tstamp",
     partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={{
       "field": "latest_collector_tstamp",
       "data_type": "timestamp"
     }}, databricks_val='latest_collector_tstamp_date'),
-    sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt')),
     tblproperties={{
       'delta.autoOptimize.optimizeWrite' : 'true',
       'delta.autoOptimize.autoCompact' : 'true'
     }},
     snowplow_optimize=true
 ) }}}}
+{{% call set_sql_header(config) -%}}
+{{{{ snowplow_normalize.set_query_tag() }}}}
+{{%- endcall %}}
 
 {{%- set user_flat_cols = {user_flat_cols or []} -%}}
 {{%- set user_cols = {user_cols or []} -%}}
@@ -362,4 +477,41 @@ else:
     verboseprint('No users events table model to generate...')
 
 
+#################################
+# Report and save column states #
+#################################
+# A property is only unused if it was never populated in any of the models that extract it
+unused_properties = {url: [key for key, null_rate in null_rates.items() if null_rate >= 1] for url, null_rates in property_null_rates.items()}
+unused_properties = {url: keys for url, keys in unused_properties.items() if len(keys) > 0}
+if len(unused_properties) > 0:
+    print(f'Properties never populated in the column profile{", removed from the models" if args.applyProfile else ""}. To stop extracting them, add them to exclude_properties in your config:')
+    print(json.dumps(unused_properties, indent=4))
+
+# Models are generated with on_schema_change append_new_columns, so added columns are added to the existing tables on the next run
+for model, change in compare_model_columns(previous_columns, model_columns).items():
+    if len(change['added']) > 0:
+        print(f"Model {model} has new column(s) {change['added']}, these will be added to the table on the next run and are null for events processed before then. "
+              f"To populate them for a recent window, run: python utils/snowplow_normalize_backfill.py --select {model} --start <YYYY-MM-DD> --end <YYYY-MM-DD> --force")
+    if len(change['removed']) > 0:
+        print(f"Model {model} no longer selects column(s) {change['removed']}, these are kept in the table and are null for new events, drop them manually if no longer needed.")
+
+######################
+# Produce tests file #
+######################
+if generate_tests:
+    verboseprint('Generating tests...')
+    users_generated = user_urls is not None or user_flat_cols is not None
+    tests_content = get_tests_yml(get_tested_names(model_names, cold_names, materializations), user_table_name if users_generated else None, snakeify_case(user_alias) if users_generated else None, filtered_events_table_name, filtered_events_key)
+    filename = os.path.join('models', models_folder, tests_file)
+    verboseprint(f'Tests content, saving to {filename}:')
+    verboseprint(tests_content)
+    if not args.dryRun:
+        write_model_file(filename, tests_content, overwrite = overwrite)
+
+if not args.dryRun:
+    verboseprint(f'Saving model columns to {column_state_path}...')
+    os.makedirs(os.path.dirname(column_state_path), exist_ok=True)
+    with open(column_state_path, 'w') as f:
+        json.dump({**previous_columns, **model_columns}, f, indent=4, sort_keys=True)
+
 verboseprint('Finished!')
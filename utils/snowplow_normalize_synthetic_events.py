@@ -0,0 +1,91 @@
+import sys
+import time
+from datetime import datetime
+from functions.snowplow_model_gen_funcs import *
+from functions.snowplow_synthetic_events_funcs import *
+
+## NOTE ##
+# Events are generated with the same shape as Databricks (and the lake loader), a struct column per major version of each schema and an array of structs for contexts,
+# which is what the duckdb versions of the normalize macros read. Values are a deterministic hash of the row number, so the same arguments always produce the same table
+
+##############
+# Parse args #
+##############
+args = parse_args(sys.argv[1:])
+
+# Overwrite default verboseprint now we have flag
+verboseprint = print if args.verbose else lambda *a, **k: None
+
+if args.rows < 1 or args.days < 1 or args.users < 1:
+    raise ValueError('--rows, --days, and --users must be at least 1.')
+if args.duplicateRate < 0 or args.duplicateRate >= 1:
+    raise ValueError('--duplicateRate must be at least 0 and less than 1.')
+
+#######################
+# Load + Parse config #
+#######################
+config_path = args.config
+if not os.path.exists(config_path):
+    raise FileNotFoundError(f'File {config_path} not found.')
+
+verboseprint('Loading config...')
+with open(config_path, 'r') as f:
+    config = json.load(f)
+
+if not validate_json(config, schema = config_schema, validate = True):
+    raise ValueError('Invalid config file format, run snowplow_normalize_model_gen.py with flag --configHelp for more information.')
+
+resolver_file_path = config.get('config').get('resolver_file_path')
+flatten_nested_depth = config.get('config').get('flatten_nested_depth') or 0
+flatten_nested_overrides = config.get('config').get('flatten_nested_overrides') or {}
+precise_types = config.get('config').get('precise_types') or False
+include_properties = config.get('config').get('include_properties') or {}
+exclude_properties = config.get('config').get('exclude_properties') or {}
+
+#################################
+# Load resolver and get schemas #
+#################################
+verboseprint('Getting schema lists from registries...')
+schemas_list = get_registry_schemas(resolver_file_path)
+
+##########################
+# Build the column specs #
+##########################
+event_names = []
+flat_cols = []
+column_specs = {}
+for event in config.get('events'):
+    event_names.extend([name for name in event.get('event_names') if name not in event_names])
+    flat_cols.extend(event.get('event_columns', []))
+    for urls, prefix in [(event.get('self_describing_event_schemas'), 'UNSTRUCT_EVENT_'), (event.get('context_schemas'), 'CONTEXTS_')]:
+        cols, keys, types, _ = get_cols_keys_types_aliases(urls, None, prefix, schemas_list, repo_keys, True, flatten_nested_depth, flatten_nested_overrides, precise_types, include_properties, exclude_properties)
+        add_column_spec(column_specs, cols, [[snakeify_case(key) for key in col_keys] for col_keys in keys or []], types, event.get('event_names'))
+
+# User contexts and the user id are populated for every event, so every event has a user
+users = config.get('users', {})
+flat_cols.extend(users.get('user_columns', []))
+user_id = users.get('user_id', {})
+for urls, prefix in [(users.get('user_contexts'), 'CONTEXTS_'), ([user_id.get('id_self_describing_event_schema')] if user_id.get('id_self_describing_event_schema') else None, 'UNSTRUCT_EVENT_'), ([user_id.get('id_context_schema')] if user_id.get('id_context_schema') else None, 'CONTEXTS_')]:
+    cols, keys, types, _ = get_cols_keys_types_aliases(urls, None, prefix, schemas_list, repo_keys, True, flatten_nested_depth, flatten_nested_overrides, precise_types, include_properties, exclude_properties)
+    add_column_spec(column_specs, cols, [[snakeify_case(key) for key in col_keys] for col_keys in keys or []], types)
+
+query = build_events_query(event_names, column_specs, flat_cols, args.rows, datetime.strptime(args.start, '%Y-%m-%d'), args.days, args.users, args.duplicateRate)
+
+if args.dryRun:
+    print(query)
+    quit()
+
+###################
+# Write to DuckDB #
+###################
+try:
+    import duckdb
+except ImportError:
+    raise ImportError('The duckdb python package is required to write the synthetic events, install it with "pip install duckdb" or use --dryRun to print the query only.')
+
+print(f'Generating {args.rows} events over {args.days} day(s) into {args.database} {args.schema}.{args.table}...')
+generate_start = time.time()
+with duckdb.connect(args.database) as con:
+    con.execute(f'create schema if not exists {args.schema}')
+    con.execute(f'create or replace table {args.schema}.{args.table} as {query}')
+print(f'Generated {args.rows} events with {len(column_specs)} self describing event and context column(s) in {time.time() - generate_start:.1f}s')
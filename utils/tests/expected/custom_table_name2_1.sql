@@ -1,19 +1,23 @@
 {{ config(
     tags = "snowplow_normalize_incremental",
     materialized = "incremental",
+    on_schema_change = "append_new_columns",
     unique_key = "event_id",
     upsert_date_key = "collector_tstamp",
+    disable_upsert_lookback = var('snowplow__disable_upsert_lookback', false),
     partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={
       "field": "collector_tstamp",
       "data_type": "timestamp"
     }, databricks_val='collector_tstamp_date'),
-    sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt')),
     tblproperties={
       'delta.autoOptimize.optimizeWrite' : 'true',
       'delta.autoOptimize.autoCompact' : 'true'
     },
     snowplow_optimize=true
 ) }}
+{% call set_sql_header(config) -%}
+{{ snowplow_normalize.set_query_tag() }}
+{%- endcall %}
 
 {%- set event_names = ['event_name2'] -%}
 {%- set flat_cols = ['app_id', 'domain_userid'] -%}
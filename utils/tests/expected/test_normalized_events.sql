@@ -1,19 +1,23 @@
 {{ config(
     tags = "snowplow_normalize_incremental",
     materialized = "incremental",
+    on_schema_change = "append_new_columns",
     unique_key = "unique_id",
     upsert_date_key = "collector_tstamp",
+    disable_upsert_lookback = var('snowplow__disable_upsert_lookback', false),
     partition_by = snowplow_utils.get_value_by_target_type(bigquery_val={
       "field": "collector_tstamp",
       "data_type": "timestamp"
     }, databricks_val='collector_tstamp_date'),
-    sql_header=snowplow_utils.set_query_tag(var('snowplow__query_tag', 'snowplow_dbt')),
     tblproperties={
       'delta.autoOptimize.optimizeWrite' : 'true',
       'delta.autoOptimize.autoCompact' : 'true'
     },
     snowplow_optimize=true
 ) }}
+{% call set_sql_header(config) -%}
+{{ snowplow_normalize.set_query_tag() }}
+{%- endcall %}
 
 select
     event_id
@@ -29,6 +33,12 @@ from
 where
     event_name in ('event_name1')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['itsaprefix_event_name1_1', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name1']) }}
+    {%- endif %}
 
 UNION ALL
 
@@ -46,6 +56,12 @@ from
 where
     event_name in ('event_name2')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['custom_table_name2_1', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name2']) }}
+    {%- endif %}
 
 UNION ALL
 
@@ -63,6 +79,12 @@ from
 where
     event_name in ('event_name3')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['custom_table_name3_2', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name3']) }}
+    {%- endif %}
 
 UNION ALL
 
@@ -80,6 +102,12 @@ from
 where
     event_name in ('event_name4')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['custom_table_name4_1', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name4']) }}
+    {%- endif %}
 
 UNION ALL
 
@@ -97,6 +125,12 @@ from
 where
     event_name in ('event_name5','event_name6')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['custom_table_name5_9', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name5', 'event_name6']) }}
+    {%- endif %}
 
 UNION ALL
 
@@ -114,6 +148,12 @@ from
 where
     event_name in ('event_name7','event_name8')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['custom_table_name6_6', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name7', 'event_name8']) }}
+    {%- endif %}
 
 UNION ALL
 
@@ -131,3 +171,9 @@ from
 where
     event_name in ('event_name9','event_name10')
     and {{ snowplow_utils.is_run_with_new_events("snowplow_normalize") }}
+    {% if var('snowplow__independent_model_windows', false) -%}
+    and {{ snowplow_normalize.model_window_filter(model_name = ['custom_table_name7_6', model.name]) }}
+    {%- endif %}
+    {% if var('snowplow__skip_empty_models', false) -%}
+    and {{ snowplow_normalize.event_count_filter(['event_name9', 'event_name10']) }}
+    {%- endif %}
@@ -0,0 +1,140 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from utils.functions.snowplow_backfill_funcs import *
+
+@pytest.mark.parametrize("test_input,expected", [
+    ("2023-01-01", datetime(2023, 1, 1)),
+    ("2023-01-01 10:11:12", datetime(2023, 1, 1, 10, 11, 12)),
+    ("2023-01-01 10:11:12.123456", datetime(2023, 1, 1, 10, 11, 12, 123456)),
+    ("2023-01-01T10:11:12+00:00", datetime(2023, 1, 1, 10, 11, 12)),
+    ("2023-01-01 10:11:12.123 UTC", datetime(2023, 1, 1, 10, 11, 12, 123000))
+    ])
+def test_parse_date(test_input, expected):
+    assert parse_date(test_input) == expected
+
+def test_parse_date_raises():
+    with pytest.raises(ValueError):
+        parse_date('01/01/2023')
+
+class Test_plan_chunks:
+    def test_even_chunks(self):
+        chunks = plan_chunks(datetime(2023, 1, 1), datetime(2023, 1, 15), 7)
+        assert chunks == [(datetime(2023, 1, 1), datetime(2023, 1, 7, 23, 59, 59, 999999)),
+                          (datetime(2023, 1, 8), datetime(2023, 1, 14, 23, 59, 59, 999999))]
+
+    def test_partial_last_chunk(self):
+        chunks = plan_chunks(datetime(2023, 1, 1), datetime(2023, 1, 10), 7)
+        assert len(chunks) == 2
+        assert chunks[-1] == (datetime(2023, 1, 8), datetime(2023, 1, 9, 23, 59, 59, 999999))
+
+    def test_chunks_do_not_overlap(self):
+        chunks = plan_chunks(datetime(2023, 1, 1, 3), datetime(2023, 3, 1), 3)
+        for prev, cur in zip(chunks, chunks[1:]):
+            assert cur[0] - prev[1] == timedelta(microseconds=1)
+        assert chunks[0][0] == datetime(2023, 1, 1, 3)
+        assert chunks[-1][1] == datetime(2023, 3, 1) - timedelta(microseconds=1)
+
+    def test_empty_range(self):
+        assert plan_chunks(datetime(2023, 1, 1), datetime(2023, 1, 1), 7) == []
+
+    def test_invalid_chunk_days(self):
+        with pytest.raises(ValueError):
+            plan_chunks(datetime(2023, 1, 1), datetime(2023, 1, 10), 0)
+
+class Test_contiguous_watermark:
+    chunks = plan_chunks(datetime(2023, 1, 1), datetime(2023, 1, 5), 1)
+
+    def test_none_completed(self):
+        assert contiguous_watermark(self.chunks, set()) is None
+
+    def test_first_not_completed(self):
+        assert contiguous_watermark(self.chunks, {1, 2}) is None
+
+    def test_gap(self):
+        assert contiguous_watermark(self.chunks, {0, 1, 3}) == self.chunks[1][1]
+
+    def test_all_completed(self):
+        assert contiguous_watermark(self.chunks, {0, 1, 2, 3}) == self.chunks[3][1]
+
+class Test_get_resume_start:
+    def test_new_model(self):
+        assert get_resume_start(datetime(2023, 1, 1), {'model_a': datetime(2023, 2, 1), 'model_b': None}) == datetime(2023, 1, 1)
+
+    def test_resume(self):
+        assert get_resume_start(datetime(2023, 1, 1), {'model_a': datetime(2023, 2, 1), 'model_b': datetime(2023, 1, 10)}) == datetime(2023, 1, 10, 0, 0, 0, 1)
+
+    def test_manifest_before_start(self):
+        assert get_resume_start(datetime(2023, 1, 1), {'model_a': datetime(2022, 1, 1)}) == datetime(2023, 1, 1)
+
+    def test_force(self):
+        # Existing models are past the window, e.g. when populating new columns, so the manifest is ignored
+        assert get_resume_start(datetime(2023, 1, 1), {'model_a': datetime(2023, 2, 1)}, force = True) == datetime(2023, 1, 1)
+        assert parse_args(['--select', 'model_a', '--start', '2023-01-01', '--end', '2023-01-08', '--force']).force
+        assert not parse_args(['--select', 'model_a', '--start', '2023-01-01', '--end', '2023-01-08']).force
+
+def test_build_run_command():
+    command = build_run_command('dbt', ['model_a', 'model_b'], (datetime(2023, 1, 1), datetime(2023, 1, 7, 23, 59, 59, 999999)), 2, 'prod')
+    assert command[:7] == ['dbt', 'run', '--select', 'snowplow_normalize_base_new_event_limits', 'snowplow_normalize_base_events_this_run', 'model_a', 'model_b']
+    assert json.loads(command[command.index('--vars') + 1]) == {'snowplow__backfill_limits': {'lower_limit': '2023-01-01 00:00:00.000000', 'upper_limit': '2023-01-07 23:59:59.999999'},
+                                                                'snowplow__backfill_schema_suffix': '_backfill_2'}
+    assert command[command.index('--target-path') + 1] == os.path.join('target', 'backfill_2')
+    assert command[-2:] == ['--target', 'prod']
+
+def test_build_run_command_event_counts():
+    # Each chunk rebuilds the counts, otherwise models skip on the counts the previous chunk left in the slot's scratch schema
+    chunk = (datetime(2023, 1, 1), datetime(2023, 1, 7, 23, 59, 59, 999999))
+    command = build_run_command('dbt', ['model_a'], chunk, 0, event_counts = True)
+    assert command[:7] == ['dbt', 'run', '--select', 'snowplow_normalize_base_new_event_limits', 'snowplow_normalize_base_events_this_run', 'snowplow_normalize_base_event_counts_this_run', 'model_a']
+    assert 'snowplow_normalize_base_event_counts_this_run' not in build_run_command('dbt', ['model_a'], chunk, 0)
+
+def test_build_operation_command():
+    assert build_operation_command('dbt', 'get_backfill_status', {'models': ['model_a']}) == ['dbt', 'run-operation', 'snowplow_normalize.get_backfill_status', '--args', '{"models": ["model_a"]}']
+
+class Test_parse_status_output:
+    def test_status(self):
+        output = '10:00:00  Running with dbt=1.5.0\n10:00:01  SNOWPLOW_BACKFILL_STATUS: {"model_a": "2023-01-01 10:00:00+00:00", "model_b": null}\n'
+        assert parse_status_output(output) == {'model_a': datetime(2023, 1, 1, 10), 'model_b': None}
+
+    def test_missing_status(self):
+        with pytest.raises(ValueError):
+            parse_status_output('10:00:00  Encountered an error')
+
+class Test_parse_missing_output:
+    def test_missing(self):
+        output = '10:00:01  SNOWPLOW_BACKFILL_STATUS: {"model_a": null}\n10:00:01  SNOWPLOW_BACKFILL_MISSING: ["model_a"]\n'
+        assert parse_missing_output(output) == ['model_a']
+
+    def test_no_line(self):
+        assert parse_missing_output('10:00:01  SNOWPLOW_BACKFILL_STATUS: {"model_a": null}') == []
+
+class Test_parse_counts_output:
+    def test_counts(self):
+        output = '10:00:01  SNOWPLOW_BACKFILL_MISSING: []\n10:00:01  SNOWPLOW_BACKFILL_COUNTS: true\n'
+        assert parse_counts_output(output)
+        assert not parse_counts_output(output.replace('true', 'false'))
+
+    def test_no_line(self):
+        assert not parse_counts_output('10:00:01  SNOWPLOW_BACKFILL_MISSING: []')
+
+@pytest.mark.parametrize("test_input,expected", [
+    ("Could not serialize access to table proj:ds.model_a due to concurrent update", True),
+    ("io.delta.exceptions.ConcurrentAppendException: Files were added to the root of the table", True),
+    ("Statement 01ab was aborted because the number of waiters for this lock exceeds the 20 statements limit", True),
+    ("TransactionContext Error: Transaction conflict: cannot update a table that has been altered", True),
+    ("Database Error in model model_a: syntax error at or near \"from\"", False)
+    ])
+def test_is_concurrent_update_error(test_input, expected):
+    assert is_concurrent_update_error(test_input) == expected
+
+def test_parse_run_results(tmpdir):
+    run_results = {'results': [{'unique_id': 'model.a', 'status': 'success', 'execution_time': 1.5, 'adapter_response': {'rows_affected': 10}},
+                               {'unique_id': 'model.b', 'status': 'success', 'execution_time': 2.0, 'adapter_response': {}},
+                               {'unique_id': 'model.c', 'status': 'error', 'execution_time': 0.5, 'adapter_response': {'rows_affected': 5}}]}
+    path = tmpdir.join('run_results.json')
+    path.write(json.dumps(run_results))
+    assert parse_run_results(str(path)) == (15, 4.0, ['model.c'])
+
+def test_format_throughput():
+    line = format_throughput((datetime(2023, 1, 1), datetime(2023, 1, 1, 23, 59, 59, 999999)), 3600.0, 7200)
+    assert line == '2023-01-01 00:00:00 -> 2023-01-01 23:59:59: 3600.0s, 7200 rows (2 rows/s, 1.0 days/hour)'
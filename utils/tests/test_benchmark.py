@@ -0,0 +1,74 @@
+import pytest
+import os
+import re
+from types import SimpleNamespace
+from utils.functions.snowplow_benchmark_funcs import *
+
+macros_path = os.path.join('macros')
+
+def test_synthetic_model_inputs():
+    inputs = synthetic_model_inputs(3, 3, 2)
+    assert inputs['event_names'] == ['bench_event_3']
+    assert inputs['sde_cols'] == ['UNSTRUCT_EVENT_COM_ACME_BENCH_EVENT_3_1_0_0']
+    assert inputs['sde_keys'] == [['eventKey0Value', 'eventKey1Value']]
+    assert inputs['context_cols'] == ['CONTEXTS_COM_ACME_BENCH_CONTEXT_0_1_0_0', 'CONTEXTS_COM_ACME_BENCH_CONTEXT_1_1_0_0']
+    assert inputs['context_aliases'] == ['bench_context_0', 'bench_context_1']
+    assert len(inputs['context_types'][1]) == 2
+
+def test_synthetic_columns():
+    columns = synthetic_columns([synthetic_model_inputs(0, 2, 2), synthetic_model_inputs(1, 2, 2)])
+    # The context is shared by both models so is only one column
+    assert [column.name for column in columns] == ['unstruct_event_com_acme_bench_event_0_1_0_0', 'contexts_com_acme_bench_context_0_1_0_0', 'unstruct_event_com_acme_bench_event_1_1_0_0']
+    assert columns[1].mode == 'REPEATED'
+    assert [field.name for field in columns[0].fields] == ['event_key0_value', 'event_key1_value']
+
+class Test_build_environment:
+    def test_dispatch(self):
+        macros, adapter = build_environment(macros_path, 'duckdb')
+        assert adapter.dispatch('get_incremental_strategy', 'snowplow_normalize') == macros['duckdb__get_incremental_strategy']
+        assert adapter.dispatch('snakeify_case', 'snowplow_normalize') == macros['default__snakeify_case']
+
+    def test_return(self):
+        macros, adapter = build_environment(macros_path, 'snowflake')
+        assert macros['snakeify_case']('testKeyValue') == 'test_key_value'
+        assert macros['get_incremental_strategy']('insert_overwrite') == 'delete+insert'
+
+    def test_bigquery_columns(self):
+        inputs = synthetic_model_inputs(0, 1, 2)
+        macros, adapter = build_environment(macros_path, 'bigquery', synthetic_columns([inputs]))
+        output = macros['normalize_events'](**inputs)
+        assert 'coalesce(unstruct_event_com_acme_bench_event_0_1_0_0.event_key1_value) as event_key1_value' in output
+        assert adapter.introspections == 1
+
+@pytest.mark.parametrize("warehouse, expected", [('bigquery', 'countif(array_length("ctx") > 0)'), ('snowflake', 'count("ctx")')])
+def test_profile_count(warehouse, expected):
+    # BigQuery REPEATED columns are never null, so an empty array counts as unpopulated
+    macros, adapter = build_environment(macros_path, warehouse)
+    assert macros['profile_count'](SimpleNamespace(name = 'ctx', mode = 'REPEATED', data_type = 'RECORD')) == expected
+    assert macros['profile_count'](SimpleNamespace(name = 'col', mode = 'NULLABLE', data_type = 'STRING')) == 'count("col")'
+
+@pytest.mark.parametrize("project_file", ['dbt_project.yml', os.path.join('integration_tests', 'dbt_project.yml')])
+def test_package_version(project_file):
+    # The query tag reports the version from the macro, as dbt has no context variable for the version of a package
+    macros, adapter = build_environment(macros_path, 'snowflake')
+    with open(project_file) as f:
+        version = re.search(r"^version: '(.*)'", f.read(), re.M).group(1)
+    assert macros['get_package_version']().strip() == version
+
+@pytest.mark.parametrize("warehouse", ['snowflake', 'bigquery', 'databricks', 'duckdb'])
+def test_benchmark_scenario(warehouse):
+    results = benchmark_scenario(macros_path, warehouse, 2, 2, 3)
+    assert [result['macro'] for result in results] == ['load_macros', 'normalize_events', 'users_table', 'snakeify_case']
+    assert all(result['chars'] > 0 for result in results[1:])
+    assert all(result['warehouse'] == warehouse and result['models'] == 2 for result in results)
+
+def test_format_results():
+    output = format_results([{'warehouse': 'duckdb', 'models': 10, 'schemas': 1, 'keys': 5, 'macro': 'normalize_events', 'seconds': 0.01234, 'chars': 500}])
+    assert output.split('\n')[2] == 'duckdb          10       1     5  normalize_events      0.012         500'
+
+def test_parse_args():
+    args = parse_args(['--models', '1', '5', '--warehouses', 'duckdb'])
+    assert args.models == [1, 5]
+    assert args.warehouses == ['duckdb']
+    assert args.keys == [10, 100]
+    assert args.output is None
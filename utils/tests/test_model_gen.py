@@ -101,6 +101,85 @@ class Test_types:
     def test_type_hierarchy(self):
         assert sorted(type_hierarchy.keys(), key = lambda x: type_hierarchy[x]) == ['null', 'boolean', 'integer', 'number', 'array', 'object', 'string']
 
+    def test_get_precise_types(self):
+        input = {'properties': {
+            'col1': {'type': 'string', 'format': 'date-time'}, # timestamp
+            'col2': {'type': ['string', 'null'], 'format': 'date'}, # nullable date
+            'col3': {'type': 'string', 'maxLength': 36}, # bounded string
+            'col4': {'type': 'string'}, # unbounded string
+            'col5': {'enum': ['a', 'bcd', None]}, # string enum
+            'col6': {'type': 'integer', 'minimum': 0, 'maximum': 100}, # bounded integer
+            'col7': {'type': 'integer', 'minimum': 0}, # unbounded integer
+            'col8': {'type': 'integer', 'minimum': 0, 'maximum': 2**31}, # too large for an int
+            'col9': {'type': ['number', 'null']}, # number
+            'col10': {'enum': ['1', '4', '5']}, # integer enum
+            'col11': {'enum': ['999', '-4', '5.7']}, # decimal enum
+            'col12': {'type': ['string', 'integer'], 'maxLength': 5}, # mixed types are not narrowed
+            'col13': {'type': 'boolean'},
+            'col14': {'type': 'null'},
+            'col15': {'type': 'array'}
+            }
+        }
+        output = ['timestamp', 'date', 'varchar(36)', 'string', 'varchar(3)', 'int', 'bigint', 'bigint', 'double', 'int', 'double', 'string', 'boolean', 'boolean', 'array']
+
+        assert get_precise_types(input) == output
+
+    @pytest.mark.parametrize("test_input,expected", [
+        (("UNSTRUCT_EVENT_TEST_1.col", "timestamp", "databricks"), "cast(UNSTRUCT_EVENT_TEST_1.col as timestamp)"),
+        (("coalesce(col)", "int", "bigquery"), "cast(coalesce(col) as int64)"),
+        (("coalesce(col)", "varchar(10)", "bigquery"), "coalesce(col)"),
+        (("UNSTRUCT_EVENT_TEST_1.col", "string", "databricks"), "UNSTRUCT_EVENT_TEST_1.col"),
+        (("UNSTRUCT_EVENT_TEST_1.col", None, "databricks"), "UNSTRUCT_EVENT_TEST_1.col")
+        ])
+    def test_cast_field(self, test_input, expected):
+        assert cast_field(*test_input) == expected
+
+class Test_flatten_properties:
+    properties = {
+        'col1': {'type': 'string'},
+        'col2': {'type': ['object', 'null'], 'properties': {
+            'nested1': {'type': 'integer'},
+            'nested2': {'type': 'object', 'properties': {'deeper': {'type': 'boolean'}}}
+            }},
+        'col3': {'type': 'object'}, # free-form object
+        'col4': {'type': 'array', 'items': {'type': 'object', 'properties': {'item': {'type': 'string'}}}}
+    }
+
+    def test_no_depth(self):
+        assert flatten_properties(self.properties, 0) == self.properties
+
+    def test_depth_one(self):
+        flat = flatten_properties(self.properties, 1)
+        assert list(flat.keys()) == ['col1', 'col2.nested1', 'col2.nested2', 'col3', 'col4']
+        assert get_types({'properties': flat}) == ['string', 'integer', 'object', 'object', 'array']
+
+    def test_full_depth(self):
+        flat = flatten_properties(self.properties, 5)
+        assert list(flat.keys()) == ['col1', 'col2.nested1', 'col2.nested2.deeper', 'col3', 'col4']
+        assert flat['col2.nested2.deeper'] == {'type': 'boolean'}
+
+class Test_filter_properties:
+    properties = {'elementId': {}, 'elementClasses': {}, 'targetUrl': {}, 'customer.customerId': {}, 'customer.address.postCode': {}}
+
+    def test_no_filters(self):
+        assert filter_properties(self.properties) == self.properties
+
+    def test_include(self):
+        assert list(filter_properties(self.properties, include = ['element*', 'targetUrl']).keys()) == ['elementId', 'elementClasses', 'targetUrl']
+
+    def test_exclude(self):
+        assert list(filter_properties(self.properties, exclude = ['*Classes', 'customer.address.*']).keys()) == ['elementId', 'targetUrl', 'customer.customerId']
+
+    def test_include_and_exclude(self):
+        assert list(filter_properties(self.properties, include = ['element*'], exclude = ['elementClasses']).keys()) == ['elementId']
+
+    def test_parent_match(self):
+        assert list(filter_properties(self.properties, include = ['customer']).keys()) == ['customer.customerId', 'customer.address.postCode']
+
+    def test_case_sensitive(self):
+        with pytest.warns(UserWarning):
+            assert filter_properties(self.properties, include = ['elementid']) == {}
+
 class Test_parse_args:
     def test_verbose(self):
         args = parse_args(['-v', 'config_path'])
@@ -134,6 +213,12 @@ class Test_parse_args:
         args2 = parse_args(['config_path'])
         assert args.cleanUp and not args2.cleanUp
 
+    def test_profile(self):
+        args = parse_args(['--profileReport', 'profile.json', '--applyProfile', 'config_path'])
+        args2 = parse_args(['config_path'])
+        assert args.profileReport == 'profile.json' and args.applyProfile
+        assert args2.profileReport is None and not args2.applyProfile
+
 class Test_write_model_file:
     def test_basic_write(self, tmpdir):
         file = tmpdir.join('output.txt')
@@ -239,6 +324,131 @@ class Test_get_schema:
         got_schema2 = get_schema('http://iglucentral.com/schemas/com.snowplowanalytics.snowplow/link_click/jsonschema/1-0-1', {})
         assert got_schema == got_schema2
 
+class Test_model_columns:
+    def test_get_model_columns(self):
+        assert get_model_columns(['app_id'], [['elementId', 'parent.childKey']], [], [['spiderOrRobot']], ['yauaa']) == ['app_id', 'element_id', 'parent_child_key', 'yauaa_spider_or_robot']
+
+    def test_get_model_columns_none(self):
+        assert get_model_columns(None, None, None, None, None) == []
+
+    def test_compare_model_columns(self):
+        previous = {'model_a': ['col_a', 'col_b'], 'model_b': ['col_a'], 'model_c': ['col_a']}
+        current = {'model_a': ['col_a', 'col_c'], 'model_b': ['col_a'], 'model_d': ['col_a']}
+        assert compare_model_columns(previous, current) == {'model_a': {'added': ['col_c'], 'removed': ['col_b']}}
+
+class Test_get_event_table_id:
+    def test_stable(self):
+        assert get_event_table_id('snowplow_link_click_1') == 783665664
+
+    def test_range(self):
+        ids = [get_event_table_id(f'model_{i}') for i in range(1000)]
+        assert all(0 <= id < 2**31 for id in ids)
+        assert len(set(ids)) == len(ids)
+
+class Test_profile:
+    profile = {'model_a': {'rows': 10, 'columns': {'test_id': {'null_rate': 0.0}, 'test_class': {'null_rate': 1.0}, 'ctx_nested_key': {'null_rate': 1.0}, 'ctx_other': {'null_rate': None}}}}
+
+    def test_null_rates(self):
+        assert get_property_null_rates(self.profile, ['model_a'], [['testId', 'testClass', 'notProfiled']], None) == [[0.0, 1.0, 0.0]]
+        assert get_property_null_rates(self.profile, ['model_a'], [['nested.key', 'other']], ['ctx']) == [[1.0, 0.0]]
+
+    def test_missing_model(self):
+        assert get_property_null_rates(self.profile, ['model_b'], [['testClass']], None) == [[0.0]]
+
+    def test_split_models(self):
+        profile = {**self.profile, 'model_a_cold': {'rows': 10, 'columns': {'cold_key': {'null_rate': 1.0}}}}
+        assert get_property_null_rates(profile, ['model_a', 'model_a_cold'], [['testClass', 'coldKey']], None) == [[1.0, 1.0]]
+
+    def test_update_null_rates(self):
+        property_null_rates = {}
+        update_property_null_rates(property_null_rates, ['iglu:com.acme/test/jsonschema/1-0-0'], [['testId', 'testClass']], [[1.0, 1.0]])
+        update_property_null_rates(property_null_rates, ['iglu:com.acme/test/jsonschema/1-0-0'], [['testId']], [[0.5]])
+        update_property_null_rates(property_null_rates, None, None, None)
+        assert property_null_rates == {'iglu:com.acme/test/jsonschema/1-0-0': {'testId': 0.5, 'testClass': 1.0}}
+
+    def test_prune(self):
+        assert prune_unused_keys([['testId', 'testClass'], ['other']], [['string', 'string'], ['int']], [[0.0, 1.0], [1.0]]) == ([['testId'], []], [['string'], []])
+        assert prune_unused_keys(None, None, []) == (None, None)
+
+class Test_hot_cold:
+    def test_cold_names(self):
+        assert get_cold_names(['model_a', 'model_b'], [None, ['test*']]) == ['model_b_cold']
+
+    def test_property_matches(self):
+        assert property_matches('customer.address', ['customer'])
+        assert property_matches('testId', ['test*'])
+        assert not property_matches('otherId', ['test*'])
+
+    def test_split(self):
+        hot, cold = split_hot_columns(['COL_A_1_0_0', 'COL_B_1_0_0'], [['testId', 'other'], ['more']], [['string', 'int'], ['boolean']], ['a', 'b'], ['test*'])
+        assert hot == (['COL_A_1_0_0'], [['testId']], [['string']], ['a'])
+        assert cold == (['COL_A_1_0_0', 'COL_B_1_0_0'], [['other'], ['more']], [['int'], ['boolean']], ['a', 'b'])
+
+    def test_split_no_aliases(self):
+        hot, cold = split_hot_columns(['COL_A_1_0_0'], [['testId']], [['string']], None, ['test*'])
+        assert hot == (['COL_A_1_0_0'], [['testId']], [['string']], None)
+        assert cold == (None, None, None, None)
+
+    def test_split_none(self):
+        assert split_hot_columns(None, None, None, None, ['test*']) == ((None, None, None, None), (None, None, None, None))
+
+class Test_tests_yml:
+    def test_event_models(self):
+        tests_yml = get_tests_yml(['model_a', 'model_a_cold'])
+        assert tests_yml.startswith('version: 2\n\nmodels:\n  - name: model_a\n')
+        assert '  - name: model_a_cold\n' in tests_yml
+        assert tests_yml.count('snowplow_normalize.window_unique') == 2
+        assert tests_yml.count('snowplow_normalize.window_not_null') == 4
+
+    def test_tested_names(self):
+        # Table and view models read the full history, so only the incremental models and their cold models are tested
+        tested = get_tested_names(['model_a', 'model_b', 'model_c'], ['model_a_cold', 'model_b_cold'], ['incremental', 'table', 'view'])
+        assert tested == ['model_a', 'model_a_cold']
+
+    def test_users(self):
+        tests_yml = get_tests_yml([], 'users', 'user_id')
+        assert '  - name: users\n    columns:\n      - name: user_id\n' in tests_yml
+        assert tests_yml.count('tstamp_column: latest_collector_tstamp') == 2
+
+    @pytest.mark.parametrize("key", ['string', 'hash'])
+    def test_filtered_unique_id(self, key):
+        tests_yml = get_tests_yml([], filtered_model = 'filtered', filtered_events_key = key)
+        assert '  - name: filtered\n    columns:\n      - name: unique_id\n' in tests_yml
+        assert 'combination_of_columns' not in tests_yml
+
+    def test_filtered_composite(self):
+        tests_yml = get_tests_yml([], filtered_model = 'filtered', filtered_events_key = 'composite')
+        assert "combination_of_columns: ['event_id', 'event_table_id']" in tests_yml
+        assert 'unique_id' not in tests_yml
+        assert tests_yml.count('snowplow_normalize.window_not_null') == 1
+
+class Test_rollups:
+    def test_rollup_names(self):
+        rollups = [[{'measures': []}, {'table_name': 'custom_rollup', 'measures': []}], None, [{'measures': []}]]
+        assert get_rollup_names(['model_a', 'model_b', 'model_c'], rollups) == ['model_a_daily', 'custom_rollup', 'model_c_daily']
+
+    def test_measure_aliases(self):
+        measures = [{'type': 'count'}, {'type': 'count_distinct', 'column': 'User_Id'}, {'type': 'sum', 'column': 'value', 'alias': 'Total'}, {'type': 'hll_sketch', 'column': 'user_id'}]
+        assert get_rollup_measures(measures, ['event_id', 'user_id', 'value']) == [
+            {'type': 'count', 'column': '', 'alias': 'n_events'},
+            {'type': 'count_distinct', 'column': 'user_id', 'alias': 'approx_distinct_user_id'},
+            {'type': 'sum', 'column': 'value', 'alias': 'total'},
+            {'type': 'hll_sketch', 'column': 'user_id', 'alias': 'user_id_sketch'}
+        ]
+
+    def test_measure_missing_column(self):
+        with pytest.raises(ValueError):
+            get_rollup_measures([{'type': 'sum', 'column': 'not_a_column'}], ['event_id', 'value'])
+
+    def test_rollup_model(self):
+        model = get_rollup_model('snowplow_link_click_1', ['link_click'], ['app_id'], [{'type': 'count', 'column': '', 'alias': 'n_events'}])
+        assert 'tags = "snowplow_normalize_incremental",' in model
+        assert 'incremental_strategy = snowplow_normalize.get_incremental_strategy("insert_overwrite"),' in model
+        assert 'unique_key = "rollup_date",' in model
+        assert "{%- set event_names = ['link_click'] -%}" in model
+        assert "{%- set dimensions = ['app_id'] -%}" in model
+        assert "ref('snowplow_link_click_1')," in model
+
 class Test_cleanup_models:
     @pytest.fixture(scope='function')
     def setup_teardown(self):
@@ -388,6 +598,73 @@ class Test_cleanup_models:
         assert out == 'No models to clean up, quitting...\n'
         assert set(files) == set(expected_files)
 
+    # Only model files are cleaned up, so the column state file is kept
+    def test_keep_column_state(self, setup_teardown, capfd):
+        state_file = os.path.join('models', setup_teardown.get('model_folder'), column_state_file)
+        with open(state_file, 'w') as f:
+            f.write('{}')
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            cleanup_models(
+                event_names = setup_teardown.get('event_names'),
+                sde_urls = setup_teardown.get('sde_urls'),
+                versions = setup_teardown.get('versions'),
+                table_names= setup_teardown.get('table_names'),
+                models_folder= setup_teardown.get('model_folder'),
+                user_table_name= setup_teardown.get('users_table'),
+                filtered_events_table_name= setup_teardown.get('filtered_table'),
+                models_prefix = '',
+                dry_run= False
+            )
+        out, err = capfd.readouterr()
+        assert out == 'No models to clean up, quitting...\n'
+        assert os.path.exists(state_file)
+
+    # Keep the table ids model of the filtered table when it uses a composite or hash key
+    def test_keep_filtered_tables(self, setup_teardown, capfd):
+        tables_file = os.path.join('models', setup_teardown.get('model_folder'), setup_teardown.get('filtered_table') + '_tables.sql')
+        with open(tables_file, 'w') as f:
+            f.write('')
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            cleanup_models(
+                event_names = setup_teardown.get('event_names'),
+                sde_urls = setup_teardown.get('sde_urls'),
+                versions = setup_teardown.get('versions'),
+                table_names= setup_teardown.get('table_names'),
+                models_folder= setup_teardown.get('model_folder'),
+                user_table_name= setup_teardown.get('users_table'),
+                filtered_events_table_name= setup_teardown.get('filtered_table'),
+                models_prefix = '',
+                dry_run= False,
+                filtered_events_key = 'hash'
+            )
+        out, err = capfd.readouterr()
+        assert out == 'No models to clean up, quitting...\n'
+        assert os.path.exists(tables_file)
+
+    # Keep the rollup models of the event models
+    def test_keep_rollups(self, setup_teardown, capfd):
+        rollups = [None] * len(setup_teardown.get('event_names'))
+        rollups[0] = [{'table_name': 'custom_rollup', 'measures': [{'type': 'count'}]}]
+        rollup_file = os.path.join('models', setup_teardown.get('model_folder'), 'custom_rollup.sql')
+        with open(rollup_file, 'w') as f:
+            f.write('')
+        with pytest.raises(SystemExit) as pytest_wrapped_e:
+            cleanup_models(
+                event_names = setup_teardown.get('event_names'),
+                sde_urls = setup_teardown.get('sde_urls'),
+                versions = setup_teardown.get('versions'),
+                table_names= setup_teardown.get('table_names'),
+                models_folder= setup_teardown.get('model_folder'),
+                user_table_name= setup_teardown.get('users_table'),
+                filtered_events_table_name= setup_teardown.get('filtered_table'),
+                models_prefix = '',
+                dry_run= False,
+                rollups = rollups
+            )
+        out, err = capfd.readouterr()
+        assert out == 'No models to clean up, quitting...\n'
+        assert os.path.exists(rollup_file)
+
     # remove one file (named table), decline, expect all files remain
     def test_decline_del_n(self, setup_teardown, monkeypatch, capfd):
         # monkeypatch the "input" function, so that it returns "n".
@@ -698,3 +975,110 @@ class Test_model_output:
             expected = file.read()
 
         assert compare(output, expected)
+
+# Matches the cases in the snakeify_case integration test
+@pytest.mark.parametrize("test_input,expected", [
+    ("hello", "hello"),
+    ("hello_world", "hello_world"),
+    ("HelloWorld", "hello_world"),
+    ("helloWorld", "hello_world"),
+    ("helloWorldEarth", "hello_world_earth"),
+    ("helloWorldEARTH", "hello_world_earth"),
+    ("helloWORLDEarth", "hello_world_earth"),
+    ("helloWorld-Earth", "hello_world_earth"),
+    ("helloWorld23Earth", "hello_world23_earth")
+    ])
+def test_snakeify_case(test_input, expected):
+    assert snakeify_case(test_input) == expected
+
+class Test_projection:
+    def test_sde_only(self):
+        projection = get_projection(['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId', 'testClass']], [['string', 'boolean']], [], None, None, None, None)
+        assert projection == {
+            'snowflake': ['UNSTRUCT_EVENT_TEST_1:testId::string as test_id', 'UNSTRUCT_EVENT_TEST_1:testClass::boolean as test_class'],
+            'databricks': ['UNSTRUCT_EVENT_TEST_1.test_id as test_id', 'UNSTRUCT_EVENT_TEST_1.test_class as test_class'],
+            'bigquery': [['unstruct_event_test_1', ['test_id', 'test_class'], ['test_id', 'test_class'], ['string', 'boolean']]],
+            'snakeify_check': ['testId testClass', 'test_id test_class']
+        }
+
+    def test_contexts_with_aliases(self):
+        projection = get_projection([], [], [], [], ['CONTEXTS_TEST_1_0_0', 'CONTEXTS_TEST2_1_0_5'], [['contextTestId'], ['contextTestClass2']], [['boolean'], ['string']], ['test1', 'test2'])
+        assert projection == {
+            'snowflake': ['CONTEXTS_TEST_1[0]:contextTestId::boolean as test1_context_test_id', 'CONTEXTS_TEST2_1[0]:contextTestClass2::string as test2_context_test_class2'],
+            'databricks': ['CONTEXTS_TEST_1[0].context_test_id as test1_context_test_id', 'CONTEXTS_TEST2_1[0].context_test_class2 as test2_context_test_class2'],
+            'bigquery': [['contexts_test_1', ['context_test_id'], ['test1_context_test_id'], ['boolean']], ['contexts_test2_1', ['context_test_class2'], ['test2_context_test_class2'], ['string']]],
+            'snakeify_check': ['contextTestId contextTestClass2', 'context_test_id context_test_class2']
+        }
+
+    def test_sde_and_context_order(self):
+        projection = get_projection(['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId']], [['string']], ['sde'], ['CONTEXTS_TEST_1_0_0'], [['testId']], [['string']], ['ctx'])
+        assert projection['snowflake'] == ['UNSTRUCT_EVENT_TEST_1:testId::string as sde_test_id', 'CONTEXTS_TEST_1[0]:testId::string as ctx_test_id']
+
+    def test_nested_keys(self):
+        projection = get_projection(['UNSTRUCT_EVENT_TEST_1_0_1'], [['parentObj.childKey']], [['string']], ['sde'], ['CONTEXTS_TEST_1_0_0'], [['parentObj.childKey']], [['string']], [])
+        assert projection == {
+            'snowflake': ['UNSTRUCT_EVENT_TEST_1:parentObj.childKey::string as sde_parent_obj_child_key', 'CONTEXTS_TEST_1[0]:parentObj.childKey::string as parent_obj_child_key'],
+            'databricks': ['UNSTRUCT_EVENT_TEST_1.parent_obj.child_key as sde_parent_obj_child_key', 'CONTEXTS_TEST_1[0].parent_obj.child_key as parent_obj_child_key'],
+            'bigquery': [['unstruct_event_test_1', ['parent_obj.child_key'], ['sde_parent_obj_child_key'], ['string']], ['contexts_test_1', ['parent_obj.child_key'], ['parent_obj_child_key'], ['string']]],
+            'snakeify_check': ['parentObj.childKey parentObj.childKey', 'parent_obj.child_key parent_obj.child_key']
+        }
+
+    def test_precise_types(self):
+        projection = get_projection(['UNSTRUCT_EVENT_TEST_1_0_1'], [['createdAt', 'status']], [['timestamp', 'varchar(10)']], [], None, None, None, None)
+        assert projection['snowflake'] == ['UNSTRUCT_EVENT_TEST_1:createdAt::timestamp as created_at', 'UNSTRUCT_EVENT_TEST_1:status::varchar(10) as status']
+        assert projection['databricks'] == ['cast(UNSTRUCT_EVENT_TEST_1.created_at as timestamp) as created_at', 'UNSTRUCT_EVENT_TEST_1.status as status']
+
+    def test_empty(self):
+        assert get_projection(None, None, None, None, None, None, None, None) == {'snowflake': [], 'databricks': [], 'bigquery': [], 'snakeify_check': ['', '']}
+
+    def test_snakeify_check_joined(self):
+        # The macro snakecases the joined keys, so it must give the same as joining the snakecased keys
+        keys = ['testId', 'HTTPResponseCode', 'user-agent', 'parentObj.childKey', 'ABTest', 'a1B']
+        projection = get_projection(['UNSTRUCT_EVENT_TEST_1_0_1'], [keys], [['string'] * len(keys)], [], None, None, None, None)
+        assert snakeify_case(projection['snakeify_check'][0]) == projection['snakeify_check'][1]
+
+    def test_format_projection(self):
+        projection = get_projection(['UNSTRUCT_EVENT_TEST_1_0_1'], [['testId']], [['string']], [], None, None, None, None)
+        assert format_projection(projection) == '''{
+    "snowflake": ["UNSTRUCT_EVENT_TEST_1:testId::string as test_id"],
+    "databricks": ["UNSTRUCT_EVENT_TEST_1.test_id as test_id"],
+    "bigquery": [["unstruct_event_test_1", ["test_id"], ["test_id"], ["string"]]],
+    "snakeify_check": ["testId", "test_id"]
+}'''
+
+class Test_event_model_config:
+    def test_default(self):
+        with open(os.path.join('utils', 'tests', 'expected', 'event_name1_1.sql')) as file:
+            expected = file.read()
+        assert expected.startswith(get_event_model_config())
+
+    def test_merge(self):
+        config = get_event_model_config('incremental', 'merge')
+        assert 'incremental_strategy = snowplow_normalize.get_incremental_strategy("merge"),' in config
+        assert 'unique_key = "event_id",' in config
+
+    def test_delete_insert(self):
+        config = get_event_model_config('incremental', 'delete+insert')
+        assert 'incremental_strategy = snowplow_normalize.get_incremental_strategy("delete+insert"),' in config
+        assert 'unique_key = "event_id",' in config
+
+    def test_upsert_lookback(self):
+        # Exact upsert limits insert duplicates arriving in a later run as new rows, so the lookback stays the default
+        config = get_event_model_config()
+        assert 'upsert_date_key = "collector_tstamp",' in config
+        assert "disable_upsert_lookback = var('snowplow__disable_upsert_lookback', false)," in config
+        with open(os.path.join('utils', 'tests', 'expected', 'test_events_users.sql')) as file:
+            assert 'disable_upsert_lookback' not in file.read()
+
+    @pytest.mark.parametrize("strategy", ['append', 'insert_overwrite'])
+    def test_unsafe_strategy(self, strategy):
+        with pytest.raises(ValueError):
+            get_event_model_config('incremental', strategy)
+
+    @pytest.mark.parametrize("materialization", ['table', 'view'])
+    def test_tiers(self, materialization):
+        config = get_event_model_config(materialization, 'merge')
+        assert f'materialized = "{materialization}"\n) }}}}' in config
+        assert '{{ snowplow_normalize.set_query_tag() }}' in config
+        assert 'tags = "snowplow_normalize_tiered",' in config
+        assert 'incremental_strategy' not in config and 'unique_key' not in config
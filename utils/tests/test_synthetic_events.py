@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime
+from utils.functions.snowplow_synthetic_events_funcs import *
+
+@pytest.mark.parametrize("test_input,expected", [
+    ("string", "varchar"),
+    ("varchar(36)", "varchar"),
+    ("integer", "bigint"),
+    ("int", "integer"),
+    ("number", "double"),
+    ("boolean", "boolean"),
+    ("timestamp", "timestamp"),
+    ("array", "varchar[]"),
+    ("object", "json"),
+    (None, "varchar")
+    ])
+def test_duckdb_type(test_input, expected):
+    assert duckdb_type(test_input) == expected
+
+class Test_value_expression:
+    def test_string(self):
+        assert value_expression('string', 'col.test_id') == "'test_id_' || (hash(i, 'col.test_id') % 100)::varchar"
+
+    def test_integer(self):
+        assert value_expression('int', 'col.count') == "(hash(i, 'col.count') % 1000)::integer"
+
+    def test_timestamp_uses_row_tstamp(self):
+        assert value_expression('timestamp', 'col.created_at', 'row_tstamp') == "row_tstamp - to_seconds((hash(i, 'col.created_at') % 86400)::bigint)"
+
+    def test_salt_changes_value(self):
+        assert value_expression('boolean', 'col_a.flag') != value_expression('boolean', 'col_b.flag')
+
+class Test_struct_expression:
+    def test_flat_keys(self):
+        assert struct_expression(['test_id', 'test_flag'], ['string', 'boolean'], 'col') == "struct_pack(test_id := 'test_id_' || (hash(i, 'col.test_id') % 100)::varchar, test_flag := hash(i, 'col.test_flag') % 2 = 0)"
+
+    def test_nested_keys(self):
+        output = struct_expression(['parent_obj.child_key', 'parent_obj.other_key', 'test_id'], ['string', 'int', 'string'], 'col')
+        assert output.startswith('struct_pack(parent_obj := struct_pack(child_key := ')
+        assert "other_key := (hash(i, 'col.parent_obj.other_key') % 1000)::integer), test_id := " in output
+
+class Test_add_column_spec:
+    def test_major_version_column(self):
+        specs = {}
+        add_column_spec(specs, ['UNSTRUCT_EVENT_COM_ACME_TEST_1_0_1'], [['test_id']], [['string']], ['test'])
+        assert specs == {'unstruct_event_com_acme_test_1': {'keys': ['test_id'], 'types': ['string'], 'event_names': ['test'], 'all_events': False}}
+
+    def test_merge_columns(self):
+        specs = {}
+        add_column_spec(specs, ['CONTEXTS_COM_ACME_USER_1_0_0'], [['user_id']], [['string']], ['event_a'])
+        add_column_spec(specs, ['CONTEXTS_COM_ACME_USER_1_0_0'], [['user_id', 'plan']], [['string', 'string']], ['event_a', 'event_b'])
+        add_column_spec(specs, ['CONTEXTS_COM_ACME_USER_1_0_0'], [['user_id']], [['string']])
+        assert specs == {'contexts_com_acme_user_1': {'keys': ['user_id', 'plan'], 'types': ['string', 'string'], 'event_names': ['event_a', 'event_b'], 'all_events': True}}
+
+    def test_none(self):
+        specs = {}
+        add_column_spec(specs, None, None, None)
+        assert specs == {}
+
+class Test_build_events_query:
+    def test_events_and_columns(self):
+        specs = {}
+        add_column_spec(specs, ['UNSTRUCT_EVENT_COM_ACME_TEST_1_0_1'], [['test_id']], [['string']], ['test'])
+        add_column_spec(specs, ['CONTEXTS_COM_ACME_USER_1_0_0'], [['user_id']], [['string']])
+        query = build_events_query(['test', 'page_view'], specs, ['app_id', 'page_url'], 100, datetime(2022, 10, 1), 1)
+        assert "['test', 'page_view'][(i % 2) + 1] as event_name" in query
+        assert "timestamp '2022-10-01 00:00:00' + to_microseconds((i * 86400000000 // 100)::bigint) as collector_tstamp" in query
+        assert "case when ['test', 'page_view'][(i % 2) + 1] in ('test') then struct_pack(" in query
+        assert "end as unstruct_event_com_acme_test_1" in query
+        assert "[struct_pack(user_id := 'user_id_' || (hash(i, 'contexts_com_acme_user_1.user_id') % 100)::varchar)] as contexts_com_acme_user_1" in query
+        assert "'page_url_' || (hash(i, 'page_url') % 100)::varchar as page_url" in query
+        assert query.count(' as app_id') == 1
+        assert query.endswith('from range(100) as t(i)')
+
+    def test_duplicates(self):
+        assert 'md5((i)::varchar) as event_id' in build_events_query(['test'], {}, [], 10, datetime(2022, 10, 1), 1)
+        assert "md5((coalesce(max(case when hash(i, 'duplicate') % 10000 >= 500 then i end) over (order by i), i))::varchar) as event_id" in build_events_query(['test'], {}, [], 10, datetime(2022, 10, 1), 1, duplicate_rate = 0.05)
+
+    @pytest.mark.parametrize("duplicate_rate", [0.05, 0.6, 0.7, 0.9])
+    def test_duplicate_rate(self, duplicate_rate):
+        duckdb = pytest.importorskip('duckdb')
+        query = build_events_query(['test'], {}, [], 100000, datetime(2022, 10, 1), 1, duplicate_rate = duplicate_rate)
+        rows, event_ids = duckdb.sql(f'select count(*), count(distinct event_id) from ({query})').fetchone()
+        assert abs(1 - event_ids / rows - duplicate_rate) < 0.01
+
+def test_parse_args():
+    args = parse_args(['config.json', '--rows', '500', '--dryRun'])
+    assert args.config == 'config.json'
+    assert args.rows == 500
+    assert args.days == 7
+    assert args.dryRun